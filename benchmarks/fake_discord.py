@@ -0,0 +1,331 @@
+"""
+Description:
+🐍 A local stand-in for the Discord REST API and the objects the benchmarks drive the cogs with.
+
+`FakeDiscordAPI` replaces the aiohttp session inside discord.py's `HTTPClient`, so requests still go
+through discord.py's own bucket and 429 handling while the "server" injects latency, per-route
+rate limits and random 429s, and counts every call by route.
+
+Version: 6.2.0
+"""
+
+import asyncio
+import datetime
+import json
+import random
+import re
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import discord
+from multidict import CIMultiDict
+
+API_PREFIX = re.compile(r"^https?://[^/]+/api/v\d+")
+SNOWFLAKE = re.compile(r"/\d{5,}")
+
+
+def snowflake(counter=iter(range(1, 1 << 30))) -> int:
+    return (int(time.time() * 1000) - 1420070400000 << 22) + next(counter)
+
+
+def user_payload(user_id: int, *, bot: bool = False) -> Dict[str, Any]:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id % 100000}",
+        "discriminator": "0",
+        "global_name": None,
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user_id: int, roles: List[int], nick: Optional[str] = None, *, bot: bool = False) -> Dict[str, Any]:
+    return {
+        "user": user_payload(user_id, bot=bot),
+        "roles": [str(role_id) for role_id in roles],
+        "nick": nick,
+        "joined_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: Any, headers: Dict[str, str]) -> None:
+        self.status = status
+        self.reason = {200: "OK", 204: "No Content", 429: "Too Many Requests"}.get(status, "Error")
+        self.headers = CIMultiDict(headers)
+        if body is None:
+            self._text = ""
+        else:
+            self._text = json.dumps(body)
+            self.headers["content-type"] = "application/json"
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return self._text
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+class _Bucket:
+    __slots__ = ("remaining", "reset_at")
+
+    def __init__(self) -> None:
+        self.remaining = 0
+        self.reset_at = 0.0
+
+
+class FakeDiscordAPI:
+    """
+    Answers discord.py's requests like Discord would, from an in-memory guild.
+
+    :param latency: The mean round-trip time of a request, in seconds.
+    :param jitter: The standard deviation of the round-trip time, in seconds.
+    :param rate_limit_chance: The chance that a request is answered with a 429 regardless of its bucket.
+    :param bucket_limit: The number of requests each route accepts per `bucket_window` seconds.
+    :param bucket_window: The length of a rate limit window, in seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.04,
+        jitter: float = 0.01,
+        rate_limit_chance: float = 0.0,
+        bucket_limit: int = 50,
+        bucket_window: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_chance = rate_limit_chance
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.members: Dict[int, Dict[str, Any]] = {}
+        self.bot_user_id = 0
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def round_trip(self) -> None:
+        await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+
+    async def simulate(self, route: str) -> None:
+        """
+        Count and delay a call that does not go through discord.py's HTTP client, e.g. an interaction callback.
+        """
+        self.calls[route] += 1
+        await self.round_trip()
+
+    async def close(self) -> None:
+        return None
+
+    def request(self, method: str, url: str, **kwargs: Any) -> "_PendingRequest":
+        return _PendingRequest(self, method, url, kwargs)
+
+    async def respond(self, method: str, url: str, kwargs: Dict[str, Any]) -> FakeResponse:
+        path = API_PREFIX.sub("", url.split("?")[0])
+        route = f"{method} {SNOWFLAKE.sub('/{id}', path)}"
+        self.calls[route] += 1
+        await self.round_trip()
+
+        now = time.monotonic()
+        bucket = self._buckets.setdefault((method, route), _Bucket())
+        if now >= bucket.reset_at:
+            bucket.remaining = self.bucket_limit
+            bucket.reset_at = now + self.bucket_window
+        reset_after = max(bucket.reset_at - now, 0.001)
+        if bucket.remaining <= 0 or self.random.random() < self.rate_limit_chance:
+            self.rate_limited[route] += 1
+            retry_after = round(reset_after if bucket.remaining <= 0 else self.random.uniform(0.05, 0.3), 3)
+            return FakeResponse(
+                429,
+                {"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+                {
+                    "Via": "1.1 google",
+                    "X-Ratelimit-Limit": str(self.bucket_limit),
+                    "X-Ratelimit-Remaining": "0",
+                    "X-Ratelimit-Reset-After": str(retry_after),
+                    "X-Ratelimit-Bucket": route,
+                },
+            )
+        bucket.remaining -= 1
+        headers = {
+            "X-Ratelimit-Limit": str(self.bucket_limit),
+            "X-Ratelimit-Remaining": str(bucket.remaining),
+            "X-Ratelimit-Reset-After": f"{reset_after:.3f}",
+            "X-Ratelimit-Bucket": route,
+        }
+        status, body = self.handle(method, path, kwargs)
+        return FakeResponse(status, body, headers)
+
+    def handle(self, method: str, path: str, kwargs: Dict[str, Any]) -> Tuple[int, Any]:
+        parts = path.strip("/").split("/")
+        body = json.loads(kwargs["data"]) if isinstance(kwargs.get("data"), str) else {}
+        if parts[0] == "guilds" and len(parts) >= 4 and parts[2] == "members":
+            member = self.members.setdefault(int(parts[3]), {"roles": [], "nick": None})
+            if len(parts) == 6 and parts[4] == "roles":
+                role_id = int(parts[5])
+                if method == "PUT" and role_id not in member["roles"]:
+                    member["roles"].append(role_id)
+                elif method == "DELETE" and role_id in member["roles"]:
+                    member["roles"].remove(role_id)
+                return 204, None
+            if method == "PATCH":
+                if "roles" in body:
+                    member["roles"] = [int(role_id) for role_id in body["roles"]]
+                if "nick" in body:
+                    member["nick"] = body["nick"]
+                return 200, member_payload(int(parts[3]), member["roles"], member["nick"])
+        if parts[0] == "channels" and len(parts) >= 3 and parts[2] == "messages":
+            message_id = int(parts[3]) if len(parts) > 3 else snowflake()
+            return 200, {
+                "id": str(message_id),
+                "channel_id": parts[1],
+                "author": user_payload(self.bot_user_id, bot=True),
+                "content": body.get("content") or "",
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "edited_timestamp": None,
+                "tts": False,
+                "mention_everyone": False,
+                "mentions": [],
+                "mention_roles": [],
+                "attachments": [],
+                "embeds": body.get("embeds", []),
+                "pinned": False,
+                "type": 0,
+            }
+        return 200, {}
+
+
+class _PendingRequest:
+    def __init__(self, api: FakeDiscordAPI, method: str, url: str, kwargs: Dict[str, Any]) -> None:
+        self.api = api
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+    async def __aenter__(self) -> FakeResponse:
+        return await self.api.respond(self.method, self.url, self.kwargs)
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+def install(client: discord.Client, api: FakeDiscordAPI, *, bot_user_id: int) -> None:
+    """
+    Point a client's HTTP client at the fake API and log it in as `bot_user_id`, without a gateway.
+    """
+    client.http._HTTPClient__session = api
+    client.http._global_over = asyncio.Event()
+    client.http._global_over.set()
+    client.http.token = "benchmark"
+    api.bot_user_id = bot_user_id
+    client._connection.user = discord.ClientUser(state=client._connection, data=user_payload(bot_user_id, bot=True))
+
+
+def build_guild(
+    client: discord.Client,
+    *,
+    guild_id: int,
+    owner_id: int,
+    roles: Dict[int, str],
+    channels: Dict[int, str],
+) -> discord.Guild:
+    """
+    Build a guild with the given roles and text channels, in which the client's user has the highest role.
+
+    :param roles: The role names by role ID, lowest first.
+    :param channels: The text channel names by channel ID.
+    """
+    state = client._connection
+    bot_role_id = snowflake()
+    role_payloads = [{"id": str(guild_id), "name": "@everyone", "position": 0, "permissions": "0"}]
+    for position, (role_id, name) in enumerate(roles.items(), start=1):
+        role_payloads.append({"id": str(role_id), "name": name, "position": position, "permissions": "0"})
+    role_payloads.append(
+        {"id": str(bot_role_id), "name": "Bot", "position": len(roles) + 1, "permissions": str(discord.Permissions.all().value)}
+    )
+    guild = discord.Guild(
+        data={
+            "id": str(guild_id),
+            "name": "Benchmark",
+            "owner_id": str(owner_id),
+            "roles": role_payloads,
+            "channels": [
+                {"id": str(channel_id), "name": name, "type": 0, "position": position, "permission_overwrites": []}
+                for position, (channel_id, name) in enumerate(channels.items())
+            ],
+            "member_count": 1,
+        },
+        state=state,
+    )
+    state._add_guild(guild)
+    add_member(client, guild, state.self_id, roles=[bot_role_id], bot=True)
+    return guild
+
+
+def add_member(
+    client: discord.Client, guild: discord.Guild, user_id: int, *, roles: Tuple[int, ...] = (), bot: bool = False
+) -> discord.Member:
+    member = discord.Member(data=member_payload(user_id, list(roles), bot=bot), guild=guild, state=client._connection)
+    guild._add_member(member)
+    return member
+
+
+class FakeInteraction:
+    """
+    The parts of `discord.Interaction` the cogs use. Responses are counted and delayed by the fake API
+    like the interaction callback and followup webhook requests they stand for.
+    """
+
+    def __init__(self, client: discord.Client, api: FakeDiscordAPI, member: discord.Member) -> None:
+        self.client = client
+        self.user = member
+        self.guild = member.guild
+        self.guild_id = member.guild.id
+        self.channel = member.guild.text_channels[0]
+        self.modal: Optional[discord.ui.Modal] = None
+        self.messages: List[Dict[str, Any]] = []
+        self._done = False
+
+        async def callback(**kwargs: Any) -> None:
+            self._done = True
+            self.messages.append(kwargs)
+            await api.simulate("POST /interactions/{id}/{token}/callback")
+
+        async def send_modal(modal: discord.ui.Modal) -> None:
+            self.modal = modal
+            await callback()
+
+        async def followup(*args: Any, **kwargs: Any) -> None:
+            self.messages.append(kwargs)
+            await api.simulate("POST /webhooks/{id}/{token}")
+
+        self.response = SimpleNamespace(
+            defer=callback,
+            send_message=lambda *args, **kwargs: callback(**kwargs),
+            send_modal=send_modal,
+            is_done=lambda: self._done,
+        )
+        self.followup = SimpleNamespace(send=followup)
+
+
+def fill_modal(modal: discord.ui.Modal, **values: str) -> None:
+    """
+    Set the text inputs of a modal as if the user had typed the values.
+    """
+    for name, value in values.items():
+        getattr(modal, name)._value = value
@@ -0,0 +1,191 @@
+"""
+Description:
+🐍 Simulates a join wave in which every new member registers, and reports latency, database contention and REST usage.
+
+Each simulated user joins (every `on_member_join` handler, including the welcome), runs `/register`,
+submits step 1, runs `/continue_register` and submits step 2, against a temporary database and
+`fake_discord.FakeDiscordAPI`. Background work queued by the cogs is drained before the report.
+
+Usage: python benchmarks/registration_load.py [--users 100] [--wave-seconds 2] [--latency-ms 40]
+       [--rate-limit-chance 0.02] [--bucket-limit 50] [--raid-threshold 10] [--drain-rate 2] [--fail-p99-ms N]
+
+Version: 6.2.0
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+
+import fake_discord  # noqa: E402
+from database import ConnectionPool, DatabaseManager, GuildSettings, MigrationRunner, SessionStore  # noqa: E402
+
+GUILD_ID = 1311571732405948476
+OWNER_ID = 1000
+BOT_ID = 2000
+FIRST_USER_ID = 500_000_000_000_000_000
+ROLES = {
+    1314245202990596187: "Registering",
+    1315700246524723292: "Unverified",
+    1313488099426308156: "Registered",
+}
+CHANNELS = {
+    1311571732405948482: "welcome",
+    1324582941883502634: "registration-log",
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000 if ordered else 0.0
+
+
+def join_handlers(bot) -> List:
+    """
+    Every `on_member_join` the bot would dispatch a join to.
+    """
+    handlers = [getattr(bot, "on_member_join")] if hasattr(bot, "on_member_join") else []
+    for cog in bot.cogs.values():
+        handlers.extend(listener for name, listener in cog.get_listeners() if name == "on_member_join")
+    return handlers
+
+
+async def simulate_user(bot, cog, api, guild, index: int, delay: float, latencies: Dict[str, List[float]]) -> None:
+    await asyncio.sleep(delay)
+    member = fake_discord.add_member(bot, guild, FIRST_USER_ID + index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(member) for handler in join_handlers(bot)))
+    latencies["join"].append(time.perf_counter() - started)
+
+    interaction = fake_discord.FakeInteraction(bot, api, member)
+    started = time.perf_counter()
+    await cog.register.callback(cog, interaction)
+    modal = interaction.modal
+    fake_discord.fill_modal(modal, real_name=f"Player {index}", in_game_name=f"ign{index}", birthday="2000-01-01")
+    await modal.on_submit(interaction)
+    latencies["step_1"].append(time.perf_counter() - started)
+
+    interaction = fake_discord.FakeInteraction(bot, api, member)
+    started = time.perf_counter()
+    await cog.continue_register.callback(cog, interaction)
+    modal = interaction.modal
+    if modal is None:
+        raise RuntimeError(f"User {index} was not let through to step 2: {interaction.messages}")
+    fake_discord.fill_modal(modal, gender="Other", games_played="Valorant, Minecraft", uuid=f"uuid-{index}", current_rank="Gold")
+    await modal.on_submit(interaction)
+    latencies["step_2"].append(time.perf_counter() - started)
+
+
+async def main(arguments: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        # bot.py opens discord.log in the working directory when it is imported.
+        os.chdir(directory)
+        from bot import DiscordBot
+        from cogs.onboarding import Onboarding
+        from cogs.register import RegistrationCog
+
+        api = fake_discord.FakeDiscordAPI(
+            latency=arguments.latency_ms / 1000,
+            jitter=arguments.latency_ms / 4000,
+            rate_limit_chance=arguments.rate_limit_chance,
+            bucket_limit=arguments.bucket_limit,
+            bucket_window=arguments.bucket_window,
+        )
+        bot = DiscordBot()
+        bot.logger.setLevel(logging.ERROR)
+        overrides = {"raid_threshold": arguments.raid_threshold, "drain_rate": arguments.drain_rate}
+        bot.config = bot.config.replace(onboarding={key: value for key, value in overrides.items() if value is not None})
+        fake_discord.install(bot, api, bot_user_id=BOT_ID)
+        guild = fake_discord.build_guild(bot, guild_id=GUILD_ID, owner_id=OWNER_ID, roles=ROLES, channels=CHANNELS)
+
+        pool = ConnectionPool(os.path.join(directory, "benchmark.db"), readers=bot.config.get("database", {}).get("readers", 4))
+        await pool.open()
+        bot.database = DatabaseManager(pool=pool)
+        try:
+            await bot.database.migrate(MigrationRunner())
+            # The migrations seed the settings of the guild the benchmark builds.
+            bot.guild_settings = GuildSettings(bot.database)
+            await bot.guild_settings.load()
+            bot.registration_sessions = SessionStore(bot.database)
+            onboarding = Onboarding(bot)
+            await bot.add_cog(onboarding)
+            cog = RegistrationCog(bot)
+            await bot.add_cog(cog)
+
+            latencies: Dict[str, List[float]] = {"join": [], "step_1": [], "step_2": []}
+            spacing = arguments.wave_seconds / max(1, arguments.users)
+            started = time.perf_counter()
+            # The cogs still print their progress; keep it out of the report.
+            with contextlib.redirect_stdout(io.StringIO()):
+                await asyncio.gather(
+                    *(simulate_user(bot, cog, api, guild, index, index * spacing, latencies) for index in range(arguments.users))
+                )
+                confirmed = time.perf_counter() - started
+                await cog.pipeline.stop(timeout=600)
+                # Members deferred by raid mode are onboarded at the drain rate.
+                drain_task = onboarding._drain_tasks.get(guild.id)
+                if drain_task is not None:
+                    await drain_task
+                if onboarding._flush_task is not None:
+                    await onboarding._flush_task
+                drained = time.perf_counter() - started
+            joins = onboarding.join_state(guild)
+            registered = (await bot.database.fetchone("SELECT COUNT(*) FROM user_registration"))[0]
+            metrics = bot.database.metrics.snapshot()
+            pipeline = cog.pipeline.snapshot()
+        finally:
+            await bot.database.close()
+            await bot.http.close()
+        os.chdir(ROOT)
+
+    print(f"{arguments.users} users over {arguments.wave_seconds}s, {registered} registered")
+    print(f"All confirmed after {confirmed:.2f}s, background work drained after {drained:.2f}s")
+    print(f"Joins: peak {joins.peak} per raid window, {joins.raids} raid(s), {joins.deferred} onboarding(s) deferred\n")
+    print(f"{'phase':<28}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for phase, samples in latencies.items():
+        print(
+            f"{phase:<28}{len(samples):>7}{percentile(samples, 0.5):>10.1f}"
+            f"{percentile(samples, 0.99):>10.1f}{max(samples, default=0) * 1000:>10.1f}"
+        )
+    print("\nRegistration pipeline (mean/max ms)")
+    for stage, stats in pipeline.items():
+        print(f"  {stage:<14}{stats['count']:>7} calls {stats['mean_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print("\nDatabase (mean/max ms)")
+    for name, stats in metrics.items():
+        print(f"  {name:<14}{stats['count']:>7} calls {stats['mean_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+    users = max(1, arguments.users)
+    print(f"\nREST calls: {api.total_calls} ({api.total_calls / users:.2f} per user), 429s served: {sum(api.rate_limited.values())}")
+    for route, count in api.calls.most_common():
+        limited = api.rate_limited.get(route, 0)
+        print(f"  {count / users:>6.2f}/user {count:>6}  {route}" + (f"  ({limited} x 429)" if limited else ""))
+
+    step_2_p99 = percentile(latencies["step_2"], 0.99)
+    if arguments.fail_p99_ms is not None and step_2_p99 > arguments.fail_p99_ms:
+        print(f"\nStep 2 p99 {step_2_p99:.1f}ms is above {arguments.fail_p99_ms}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--wave-seconds", type=float, default=2.0)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--rate-limit-chance", type=float, default=0.02)
+    parser.add_argument("--bucket-limit", type=int, default=50)
+    parser.add_argument("--bucket-window", type=float, default=1.0)
+    parser.add_argument("--raid-threshold", type=int, default=None, help="Override onboarding.raid_threshold.")
+    parser.add_argument("--drain-rate", type=float, default=None, help="Override onboarding.drain_rate.")
+    parser.add_argument("--fail-p99-ms", type=float, default=None, help="Exit with 1 when step 2's p99 is above this.")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,105 @@
+"""
+Description:
+🐍 Times `get_registration` point lookups on a large table before and after migration 0003.
+
+The temporary database is migrated up to 0002, when `discord_id` was an unindexed TEXT column, and
+seeded with the registrations. The lookups are timed there with the query `get_registration` ran
+then, the remaining migrations are applied, and the same lookups are timed again through
+`DatabaseManager.get_registration` against the unique integer `discord_id`.
+
+Usage: python benchmarks/registration_lookup.py [--rows 100000] [--lookups 500] [--seed 0]
+
+Version: 6.2.0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from database import ConnectionPool, DatabaseManager, MigrationRunner  # noqa: E402
+
+FIRST_ID = 100_000_000_000_000_000
+# The last migration before `discord_id` became a unique integer.
+BEFORE_VERSION = 2
+GAMES = ("Valorant", "League of Legends", "Minecraft", "Fortnite", "Apex Legends")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def seed(database: DatabaseManager, rows: int) -> None:
+    await database.executemany(
+        "INSERT INTO user_registration (discord_id, real_name, in_game_name, birthday, uuid, current_rank, games_played, age, gender) "
+        "VALUES (?, ?, ?, '2000-01-01', '', 'Gold', ?, 20, 'Male')",
+        [
+            (str(FIRST_ID + index), f"Player {index}", f"ign{index}", ", ".join(GAMES[: index % len(GAMES) + 1]))
+            for index in range(rows)
+        ],
+    )
+
+
+async def time_lookups(lookup, discord_ids: List[int]) -> List[float]:
+    samples = []
+    for discord_id in discord_ids:
+        started = time.perf_counter()
+        row = await lookup(discord_id)
+        samples.append(time.perf_counter() - started)
+        if row is None:
+            raise RuntimeError(f"Registration {discord_id} was not found")
+    return samples
+
+
+def report(label: str, samples: List[float]) -> None:
+    mean = sum(samples) / len(samples)
+    print(
+        f"{label:<8}{len(samples):>9}{mean * 1000:>11.3f}{percentile(samples, 0.5) * 1000:>10.3f}"
+        f"{percentile(samples, 0.99) * 1000:>10.3f}"
+    )
+
+
+async def main(rows: int, lookups: int, seed_value: int) -> int:
+    discord_ids = random.Random(seed_value).sample(range(FIRST_ID, FIRST_ID + rows), min(lookups, rows))
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "benchmark.db"))
+        await pool.open()
+        database = DatabaseManager(pool=pool)
+        try:
+            before = MigrationRunner()
+            before.migrations = [migration for migration in before.migrations if migration.version <= BEFORE_VERSION]
+            await database.migrate(before)
+            await seed(database, rows)
+
+            async def old_lookup(discord_id: int):
+                return await database.fetchone("SELECT * FROM user_registration WHERE discord_id = ?", (discord_id,))
+
+            before_samples = await time_lookups(old_lookup, discord_ids)
+            results = await database.migrate(MigrationRunner())
+            after_samples = await time_lookups(database.get_registration, discord_ids)
+        finally:
+            await database.close()
+
+    print(f"Seeded {rows} registrations, {len(discord_ids)} point lookups each")
+    print(f"{'schema':<8}{'lookups':>9}{'mean ms':>11}{'p50 ms':>10}{'p99 ms':>10}")
+    report("0002", before_samples)
+    report("latest", after_samples)
+    for result in results:
+        print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    sys.exit(asyncio.run(main(arguments.rows, arguments.lookups, arguments.seed)))
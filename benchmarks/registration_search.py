@@ -0,0 +1,135 @@
+"""
+Description:
+🐍 Measures the /indb name search over a large table: top-5 latency and how long the event loop is blocked.
+
+Each query runs the command's two steps, `search_registrations` for the candidates and `rank_matches`
+in a worker thread for the top 5. Names are built from small pools of first and last names, so
+trigrams are very common and the index has to do real work; half of the queries carry a typo.
+A ticker task sleeps for 1 ms in a loop and records how late it wakes up, as in
+`igns_event_loop.py`. The run passes when the 99th percentile of both stays under their thresholds.
+
+How often the intended name makes the top 5 is reported but not checked: about one query in ten
+misses, mostly typos that swap the digits of the number, which make another registered name or
+one the name pool cannot tell apart from it.
+
+Usage: python benchmarks/registration_search.py [--rows 100000] [--queries 200] [--threshold-ms 50]
+       [--lag-threshold-ms 5] [--seed 0]
+
+Version: 6.2.0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from cogs.register import rank_matches  # noqa: E402
+from database import ConnectionPool, DatabaseManager, MigrationRunner  # noqa: E402
+
+FIRST_ID = 100_000_000_000_000_000
+FIRST_NAMES = (
+    "Alex", "Maria", "John", "Sofia", "Liam", "Emma", "Noah", "Olivia", "Lucas", "Mia",
+    "Ethan", "Ava", "Mason", "Isla", "Logan", "Chloe", "Jacob", "Grace", "Daniel", "Lily",
+)
+LAST_NAMES = (
+    "Smith", "Garcia", "Johnson", "Martinez", "Brown", "Rodriguez", "Davis", "Lopez", "Wilson", "Anderson",
+    "Taylor", "Thomas", "Moore", "Jackson", "Martin", "Lee", "Thompson", "White", "Harris", "Clark",
+)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def real_name(index: int) -> str:
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)]
+    return f"{first} {last} {index // (len(FIRST_NAMES) * len(LAST_NAMES))}"
+
+
+def with_typo(name: str, rng: random.Random) -> str:
+    position = rng.randrange(1, len(name) - 1)
+    return name[:position] + name[position + 1] + name[position] + name[position + 2 :]
+
+
+async def seed(database: DatabaseManager, rows: int) -> None:
+    await database.executemany(
+        "INSERT INTO user_registration (discord_id, real_name, in_game_name, birthday, gender, uuid, current_rank, age) "
+        "VALUES (?, ?, ?, '2000-01-01', 'Male', '', 'Gold', 20)",
+        [(FIRST_ID + index, real_name(index), f"ign{index}") for index in range(rows)],
+    )
+
+
+async def ticker(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - started - 0.001)
+
+
+async def main(rows: int, queries: int, threshold_ms: float, lag_threshold_ms: float, seed_value: int) -> int:
+    rng = random.Random(seed_value)
+    targets = [real_name(rng.randrange(rows)) for _ in range(queries)]
+    names = [with_typo(name, rng) if index % 2 else name for index, name in enumerate(targets)]
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "benchmark.db"))
+        await pool.open()
+        database = DatabaseManager(pool=pool)
+        try:
+            await database.migrate(MigrationRunner())
+            await seed(database, rows)
+            # Import rapidfuzz before the clock starts, as the first /indb search would.
+            await asyncio.to_thread(rank_matches, "warm up", [])
+
+            searches, rankings, totals, candidates, found = [], [], [], [], 0
+            lags = []
+            stop = asyncio.Event()
+            ticker_task = asyncio.create_task(ticker(lags, stop))
+            for name, target in zip(names, targets):
+                started = time.perf_counter()
+                rows_found = await database.search_registrations(name)
+                searched = time.perf_counter()
+                matches = await asyncio.to_thread(rank_matches, name, rows_found)
+                ended = time.perf_counter()
+                searches.append(searched - started)
+                rankings.append(ended - searched)
+                totals.append(ended - started)
+                candidates.append(len(rows_found))
+                if any(row["real_name"] == target for _, row in matches):
+                    found += 1
+            stop.set()
+            await ticker_task
+        finally:
+            await database.close()
+
+    print(f"Searched {rows} registrations with {queries} queries, {sum(candidates) / len(candidates):.0f} candidates on average")
+    print(f"{'step':<10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, samples in (("search", searches), ("rank", rankings), ("top-5", totals)):
+        print(f"{step:<10}{percentile(samples, 0.5) * 1000:>10.1f}{percentile(samples, 0.99) * 1000:>10.1f}{max(samples) * 1000:>10.1f}")
+    p99 = percentile(totals, 0.99) * 1000
+    lag_p99 = percentile(lags, 0.99) * 1000
+    print(f"Top-5 p99: {p99:.1f}ms (threshold {threshold_ms}ms), intended name in the top 5 for {found}/{queries}")
+    print(f"Ticks: {len(lags)}, p99 lag: {lag_p99:.2f}ms (threshold {lag_threshold_ms}ms), max lag: {max(lags) * 1000:.2f}ms")
+    return 0 if p99 <= threshold_ms and lag_p99 <= lag_threshold_ms else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threshold-ms", type=float, default=50.0)
+    parser.add_argument("--lag-threshold-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    sys.exit(
+        asyncio.run(
+            main(arguments.rows, arguments.queries, arguments.threshold_ms, arguments.lag_threshold_ms, arguments.seed)
+        )
+    )
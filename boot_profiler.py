@@ -0,0 +1,158 @@
+"""
+Description:
+🐍 Times the phases of a boot, from the first import of `bot.py` to the end of the first `on_ready`.
+
+Set `BOOT_PROFILE_IMPORTS=1` to also time every module imported until the cogs are loaded, the
+way `python -X importtime` does, and keep the slowest ones with the boot record.
+
+Version: 6.2.0
+"""
+
+import builtins
+import contextlib
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+IMPORT_PROFILE_VARIABLE = "BOOT_PROFILE_IMPORTS"
+# The slowest packages kept in a boot record.
+IMPORT_PROFILE_SIZE = 15
+
+
+class ImportProfiler:
+    """
+    Replaces `__import__` to measure the time spent importing each new module, less the time spent
+    in the modules it imports in turn, and adds it up by top-level package.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self._children: List[float] = [0.0]
+        self._original = None
+
+    @classmethod
+    def from_environment(cls) -> Optional["ImportProfiler"]:
+        """
+        :return: An installed profiler if `BOOT_PROFILE_IMPORTS` is set to a true value, otherwise None.
+        """
+        if os.getenv(IMPORT_PROFILE_VARIABLE, "").lower() not in ("1", "true", "yes"):
+            return None
+        profiler = cls()
+        profiler.install()
+        return profiler
+
+    def install(self) -> None:
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        """
+        Restore `__import__`, so the imports done later on (e.g. inside functions) cost nothing extra.
+        """
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original or builtins.__import__
+        if level or (name in sys.modules and not fromlist):
+            return original(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            self._children[-1] += elapsed
+            package = name.partition(".")[0]
+            self.seconds[package] = self.seconds.get(package, 0.0) + elapsed - children
+
+    def top(self, count: int = IMPORT_PROFILE_SIZE) -> List[Tuple[str, float]]:
+        """
+        :return: The `count` packages that took the longest to import, with their time in milliseconds.
+        """
+        ranked = sorted(self.seconds.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [(package, round(seconds * 1000, 1)) for package, seconds in ranked]
+
+
+class BootProfile:
+    """
+    The phases of a boot in the order they started. A phase started while another one is running
+    is nested under it, so `setup_hook` holds `init_db` and `load_cogs`.
+
+    :param started: The `time.perf_counter()` value the boot started at.
+    """
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.finished: Optional[float] = None
+        # (name, depth, seconds) in the order the phases started.
+        self.phases: List[List[Any]] = []
+        self.cogs: List[Dict[str, Any]] = []
+        self.imports: Optional[List[Tuple[str, float]]] = None
+        self._depth = 0
+        # When the last top-level phase ended.
+        self._last_ended = started
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        entry = [name, self._depth, 0.0]
+        self.phases.append(entry)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            entry[2] = ended - started
+            self._depth -= 1
+            if not self._depth:
+                self._last_ended = ended
+
+    def mark_gap(self, name: str) -> None:
+        """
+        Record the time since the last top-level phase ended as a phase of its own, for what happens
+        between the callbacks the bot controls, e.g. logging in or waiting for the gateway.
+        """
+        now = time.perf_counter()
+        self.phases.append([name, self._depth, now - self._last_ended])
+        if not self._depth:
+            self._last_ended = now
+
+    def finish(self) -> float:
+        """
+        :return: The whole boot, in seconds.
+        """
+        if self.finished is None:
+            self.finished = time.perf_counter()
+        return self.finished - self.started
+
+    @property
+    def total_ms(self) -> float:
+        return round(((self.finished or time.perf_counter()) - self.started) * 1000, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_ms": self.total_ms,
+            "phases": [
+                {"name": name, "depth": depth, "ms": round(seconds * 1000, 1)} for name, depth, seconds in self.phases
+            ],
+            "cogs": self.cogs,
+            "imports": self.imports,
+        }
+
+
+def format_phases(phases: List[Dict[str, Any]], total_ms: float) -> str:
+    """
+    :return: The phases of a boot record as an indented fixed-width table, with their share of the boot.
+    """
+    lines = [f"{'phase':<28}{'ms':>9}{'share':>7}"]
+    for phase in phases:
+        name = "  " * phase["depth"] + phase["name"]
+        share = phase["ms"] / total_ms if total_ms else 0.0
+        lines.append(f"{name:<28}{phase['ms']:>9.1f}{share:>7.0%}")
+    lines.append(f"{'total':<28}{total_ms:>9.1f}")
+    return "\n".join(lines)
@@ -1,4 +1,15 @@
 
+import time
+
+# Everything from here on is part of the boot profile, imports included.
+BOOT_STARTED = time.perf_counter()
+
+from boot_profiler import BootProfile, ImportProfiler, format_phases
+
+# With BOOT_PROFILE_IMPORTS=1, time the imports below and those of the cogs.
+import_profiler = ImportProfiler.from_environment()
+
+import contextlib
 import json
 import logging
 import os
@@ -6,19 +17,33 @@ import platform
 import random
 import sys
 
-import aiosqlite
 import discord
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
 from dotenv import load_dotenv
 
-from database import DatabaseManager
+from cog_loader import CogLoader, LazyCommandTree
+from command_sync import sync_commands
+from configuration import Config, ConfigError, ConfigWatcher, load_config
+from database import (
+    ConnectionPool,
+    DatabaseManager,
+    GuildSettings,
+    MessageStore,
+    MigrationRunner,
+    ProfileCache,
+    SessionStore,
+)
 
-if not os.path.isfile(f"{os.path.realpath(os.path.dirname(__file__))}/config.json"):
+CONFIG_PATH = f"{os.path.realpath(os.path.dirname(__file__))}/config.json"
+
+if not os.path.isfile(CONFIG_PATH):
     sys.exit("'config.json' not found! Please add it and try again.")
 else:
-    with open(f"{os.path.realpath(os.path.dirname(__file__))}/config.json") as file:
-        config = json.load(file)
+    try:
+        config = load_config(CONFIG_PATH)
+    except ConfigError as e:
+        sys.exit(str(e))
 
 """  
 Setup bot intents (events restrictions)
@@ -110,12 +135,18 @@ logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
 
+def get_prefix(bot: "DiscordBot", message: discord.Message):
+    """Reads the prefix on every message, so a changed prefix applies at once."""
+    return commands.when_mentioned_or(bot.config["prefix"])(bot, message)
+
+
 class DiscordBot(commands.Bot):
     def __init__(self) -> None:
         super().__init__(
-            command_prefix=commands.when_mentioned_or(config["prefix"]),
+            command_prefix=get_prefix,
             intents=intents,
             help_command=None,
+            tree_cls=LazyCommandTree,
         )
         """
         This creates custom bot variables so that we can access these variables in cogs more easily.
@@ -125,72 +156,104 @@ class DiscordBot(commands.Bot):
         - self.bot.config # In cogs
         """
         self.logger = logger
-        self.config = config
+        # The phases of this boot; see `boot_profiler.py`. Whatever ran before this point was the imports.
+        self.boot_profile = BootProfile(BOOT_STARTED)
+        self.boot_profile.mark_gap("import")
+        # A frozen `Config`, replaced as a whole when config.json changes; see `on_config_update`.
+        self.config: Config = config
+        self.config_watcher = ConfigWatcher(CONFIG_PATH)
         self.database = None
+        # Step 1 of `/register` until step 2 is submitted. It lives on the bot so reloading the registration cog keeps it.
+        self.registration_sessions = SessionStore()
+        # The roles and channels each guild has configured, see `database/guild_settings.py`.
+        self.guild_settings = GuildSettings()
+        # Recent message contents for the message logs. It lives on the bot so reloading the logging cog keeps it.
+        self.message_store = MessageStore()
+        self.apply_message_store_config(self.config)
+        self.cog_loader = CogLoader(self)
+
+    def apply_message_store_config(self, config: Config) -> None:
+        store_config = config.get("message_store", {})
+        self.message_store.max_messages = store_config.get("max_messages", 50000)
+        self.message_store.max_bytes = store_config.get("max_bytes", 32 * 1024 * 1024)
+        self.message_store.retention = store_config.get("retention", 86400)
+        self.message_store.trim()
 
     async def init_db(self) -> None:
-        """Initializes the database and schema."""
+        """Opens the connection pool, applies pending migrations and exposes the database manager."""
+        database_config = self.config.get("database", {})
+        pool = ConnectionPool(
+            f"{os.path.realpath(os.path.dirname(__file__))}/database/database.db",
+            readers=database_config.get("readers", 4),
+        )
+        profiles = ProfileCache(
+            max_size=database_config.get("profile_cache_size", 1024),
+            ttl=database_config.get("profile_cache_ttl", 300),
+        )
         try:
-            self.database = await aiosqlite.connect(
-                f"{os.path.realpath(os.path.dirname(__file__))}/database/database.db"
-            )
-            with open(f"{os.path.realpath(os.path.dirname(__file__))}/database/schema.sql") as file:
-                await self.database.executescript(file.read())
-            await self.database.commit()
+            await pool.open()
+            self.database = DatabaseManager(pool=pool, profiles=profiles)
+            runner = MigrationRunner()
+            with self.boot_profile.phase("migrations"):
+                results = await self.database.migrate(runner)
+            for result in results:
+                self.logger.info(str(result))
+            self.logger.info(f"Database schema is at version {runner.latest_version}")
         except Exception as e:
             self.logger.error(f"Error initializing database: {e}")
+            await pool.close()
             self.database = None
+        with self.boot_profile.phase("guild_settings"):
+            await self.init_guild_settings()
+        with self.boot_profile.phase("registration_sessions"):
+            await self.init_registration_sessions()
+
+    async def init_guild_settings(self) -> None:
+        """Loads the settings of every guild."""
+        self.guild_settings = GuildSettings(self.database)
+        try:
+            loaded = await self.guild_settings.load()
+            self.logger.info(f"Loaded the settings of {loaded} guild(s)")
+        except Exception as e:
+            self.logger.error(f"Error loading guild settings: {e}")
+
+    async def init_registration_sessions(self) -> None:
+        """Creates the registration session store and reloads the sessions that were in progress."""
+        sessions_config = self.config.get("registration_sessions", {})
+        persist = sessions_config.get("persist", True)
+        self.registration_sessions = SessionStore(
+            self.database if persist else None,
+            ttl=sessions_config.get("ttl", 1800),
+            max_size=sessions_config.get("max_size", 10000),
+        )
+        try:
+            loaded = await self.registration_sessions.load()
+            if loaded:
+                self.logger.info(f"Restored {loaded} registration session(s) in progress")
+        except Exception as e:
+            self.logger.error(f"Error restoring registration sessions: {e}")
 
     async def load_cogs(self) -> None:
-        """Loads all the cogs."""
-        for file in os.listdir(f"{os.path.realpath(os.path.dirname(__file__))}/cogs"):
-            if file.endswith(".py"):
-                extension = file[:-3]
-                try:
-                    await self.load_extension(f"cogs.{extension}")
-                    self.logger.info(f"Loaded extension '{extension}'")
-                except Exception as e:
-                    exception = f"{type(e).__name__}: {e}"
-                    self.logger.error(f"Failed to load extension {extension}\n{exception}")
-                    
-    async def on_member_join(self, member: discord.Member) -> None:
-        """Triggered when a member joins the server."""
-        role_name = "Registering"  # Replace with the role you want to assign
-        role = discord.utils.get(member.guild.roles, name=role_name)
-
-        if role:
-            try:
-                await member.add_roles(role)
-                self.logger.info(f"Assigned {role_name} role to {member.name} ({member.id})")
-            except discord.DiscordException as e:
-                self.logger.error(f"Failed to assign role {role_name} to {member.name}: {e}")
-        else:
-            self.logger.warning(f"Role {role_name} not found in the server!")
-
-        # Now, send a message to the specific channel (ID: 1311571732405948482)
-        channel_id = 1311571732405948482
-        channel = self.get_channel(channel_id)
-
-        if channel:
-            try:
-                embed = discord.Embed(
-                    title="Welcome!",
-                    description=(
-                        f"Welcome to the family, {member.mention}! \nWe're glad to have you here."
-                        f"\nPlease read the rules here: <#1311571732405948478>"
-                    ),
-                    color=0x2b2d31,  # You can customize the color
-                )
-                embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
-                embed.set_image(url="https://cdn.discordapp.com/attachments/1314433772145475597/1325366726547738704/kids.gif?ex=677b8773&is=677a35f3&hm=26d9d3137e058f91853785dfaffbf4ce7d87ee8cf4f88d43f8c68b46870ab056&")  # Add your GIF/image URL here
-                embed.set_footer(text="Enjoy your stay!")
-                await channel.send(embed=embed)
-                self.logger.info(f"Sent welcome message to {channel.name} for {member.name}")
-            except discord.DiscordException as e:
-                self.logger.error(f"Failed to send welcome message to {channel.name}: {e}")
-        else:
-            self.logger.warning(f"Channel with ID {channel_id} not found!")
+        """Loads the cogs listed in cogs/manifest.json and logs how long each one took."""
+        started = time.perf_counter()
+        timings = await self.cog_loader.load_all()
+        self.boot_profile.cogs = [
+            {
+                "name": timing.name,
+                "import_ms": round(timing.import_seconds * 1000, 1),
+                "setup_ms": round(timing.setup_seconds * 1000, 1),
+                "status": timing.status,
+            }
+            for timing in timings
+        ]
+        self.logger.info(
+            f"Loaded the cogs in {(time.perf_counter() - started) * 1000:.0f}ms\n{self.cog_loader.table()}"
+        )
 
+    async def add_cog(self, cog: commands.Cog, /, **kwargs) -> None:
+        """Adds a cog, timing its setup for the boot table."""
+        with self.cog_loader.setup_phase():
+            await super().add_cog(cog, **kwargs)
 
     @tasks.loop(minutes=1.0)
     async def status_task(self) -> None:
@@ -203,16 +266,87 @@ class DiscordBot(commands.Bot):
         """Ensures the bot is ready before starting the status task."""
         await self.wait_until_ready()
 
+    @tasks.loop(minutes=5.0)
+    async def sweep_sessions_task(self) -> None:
+        """Drops the registration sessions that expired without being finished."""
+        try:
+            expired = await self.registration_sessions.sweep()
+            if expired:
+                self.logger.info(f"Dropped {expired} expired registration session(s)")
+        except Exception as e:
+            self.logger.error(f"Error sweeping registration sessions: {e}")
+
+    @tasks.loop(seconds=2.0)
+    async def config_watch_task(self) -> None:
+        """Reloads config.json when it changes and tells the cogs about it."""
+        try:
+            new = self.config_watcher.poll()
+        except ConfigError as e:
+            self.logger.error(f"Kept the current configuration: {e}")
+            return
+        if new is None or new == self.config:
+            return
+        old, self.config = self.config, new
+        self.logger.info(f"Reloaded config.json, changed: {', '.join(old.changed_keys(new))}")
+        self.dispatch("config_update", old, new)
+
+    async def on_config_update(self, before: Config, after: Config) -> None:
+        """Applies the tuning knobs the bot itself owns; cogs listen for the same event."""
+        interval = after.get("config_watch_interval", 2.0)
+        if interval != self.config_watch_task.seconds:
+            self.config_watch_task.change_interval(seconds=max(interval, 0.5))
+        database_config = after.get("database", {})
+        if self.database is not None:
+            self.database.profiles.max_size = database_config.get("profile_cache_size", 1024)
+            self.database.profiles.ttl = database_config.get("profile_cache_ttl", 300)
+        sessions_config = after.get("registration_sessions", {})
+        self.registration_sessions.ttl = sessions_config.get("ttl", 1800)
+        self.registration_sessions.max_size = max(1, sessions_config.get("max_size", 10000))
+        self.apply_message_store_config(after)
+        for section, key in (("database", "readers"), ("registration_sessions", "persist")):
+            if before.get(section, {}).get(key) != after.get(section, {}).get(key):
+                self.logger.warning(f"{section}.{key} only takes effect after a restart")
+
     async def on_ready(self) -> None:
         """Triggered when the bot is ready and has logged in."""
         self.logger.info(f"Bot is ready! Logged in as {self.user} (ID: {self.user.id})")
+        booting = self.boot_profile.finished is None
+        if booting:
+            self.boot_profile.mark_gap("gateway")
+        with self.boot_profile.phase("tree_sync") if booting else contextlib.nullcontext():
+            await self.sync_tree()
+        if booting:
+            await self.save_boot_profile()
+
+    async def sync_tree(self) -> None:
+        if self.cog_loader.pending:
+            # The tree lacks the commands of the lazy cogs, and syncing it would remove them from Discord.
+            self.logger.info("Skipped the slash command sync while lazy cogs are not loaded")
+            return
         try:
-            # Synchronize slash commands globally
-            await self.tree.sync()
-            self.logger.info("Slash commands synchronized successfully!")
+            # Synchronize slash commands globally, unless they are the same as last time (e.g. on a reconnect)
+            self.logger.info(str(await sync_commands(self)))
         except Exception as e:
             self.logger.error(f"Failed to synchronize slash commands: {e}")    
 
+    async def save_boot_profile(self) -> None:
+        """Logs the phases of this boot, once readable and once as JSON, and keeps them in the database."""
+        self.boot_profile.finish()
+        record = self.boot_profile.to_dict()
+        self.logger.info(f"Booted in {record['total_ms']:.0f}ms\n{format_phases(record['phases'], record['total_ms'])}")
+        self.logger.info(f"Boot profile: {json.dumps(record, separators=(',', ':'))}")
+        if self.database is None:
+            return
+        try:
+            await self.database.save_boot_profile(
+                record["total_ms"],
+                json.dumps(record["phases"]),
+                json.dumps(record["cogs"]),
+                json.dumps(record["imports"]) if record["imports"] is not None else None,
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to save the boot profile: {e}")
+
     async def setup_hook(self) -> None:
         """Executed when the bot starts."""
         self.logger.info(f"Logged in as {self.user.name}")
@@ -220,14 +354,54 @@ class DiscordBot(commands.Bot):
         self.logger.info(f"Python version: {platform.python_version()}")
         self.logger.info(f"Running on: {platform.system()} {platform.release()} ({os.name})")
         self.logger.info("-------------------")
-        await self.init_db()
-        await self.load_cogs()
-        self.status_task.start()
+        # Since the imports: creating the bot and logging in.
+        self.boot_profile.mark_gap("login")
+        with self.boot_profile.phase("setup_hook"):
+            with self.boot_profile.phase("init_db"):
+                await self.init_db()
+            with self.boot_profile.phase("load_cogs"):
+                await self.load_cogs()
+            self.status_task.start()
+            self.sweep_sessions_task.start()
+            self.config_watch_task.change_interval(seconds=max(self.config.get("config_watch_interval", 2.0), 0.5))
+            self.config_watch_task.start()
+        if import_profiler is not None:
+            import_profiler.uninstall()
+            self.boot_profile.imports = import_profiler.top()
+
+    async def close(self) -> None:
+        """Closes the database connections once the bot has disconnected."""
+        await super().close()
+        if self.database is not None:
+            await self.database.close()
+
+    # The roles and channels resolved for the guild settings may have changed: resolve them again on next use.
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        self.guild_settings.invalidate(role.guild.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        self.guild_settings.invalidate(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        self.guild_settings.invalidate(role.guild.id)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        self.guild_settings.invalidate(channel.guild.id)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        self.guild_settings.invalidate(after.guild.id)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.guild_settings.invalidate(channel.guild.id)
 
     async def on_message(self, message: discord.Message) -> None:
         """Triggered every time someone sends a message."""
         if message.author == self.user or message.author.bot:
             return
+        if self.cog_loader.pending:
+            context = await self.get_context(message)
+            if context.invoked_with and context.command is None:
+                await self.cog_loader.load_pending()
         await self.process_commands(message)
 
     async def on_command_completion(self, context: Context) -> None:
@@ -295,7 +469,8 @@ class DiscordBot(commands.Bot):
             raise error
 
 
-load_dotenv()
+if __name__ == "__main__":
+    load_dotenv()
 
-bot = DiscordBot()
-bot.run(os.getenv("TOKEN"))
+    bot = DiscordBot()
+    bot.run(os.getenv("TOKEN"))
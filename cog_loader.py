@@ -0,0 +1,165 @@
+"""
+Description:
+🐍 Loads the cogs listed in `cogs/manifest.json` concurrently, times each one, and loads lazy cogs on first use.
+
+A manifest entry is `{"name": "fun", "lazy": false}`. Only listed cogs are loaded, so stray files in
+`cogs/` are skipped. A lazy cog is not imported at startup: the first command the bot does not
+know, slash or prefix, loads every lazy cog that is still pending. Cogs with listeners should not
+be lazy, since their events are missed until then.
+
+Version: 6.2.0
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+import discord
+from discord import app_commands
+
+MANIFEST_PATH = f"{os.path.realpath(os.path.dirname(__file__))}/cogs/manifest.json"
+
+# The cog being loaded by the current task, so `add_cog` can tell where its import ended.
+_loading: "contextvars.ContextVar[Optional[CogTiming]]" = contextvars.ContextVar("loading", default=None)
+
+
+class CogTiming:
+    """
+    How long a cog took to import and to set up, in seconds, and why it failed if it did.
+    """
+
+    __slots__ = ("name", "lazy", "started", "import_seconds", "setup_seconds", "error")
+
+    def __init__(self, name: str, lazy: bool = False) -> None:
+        self.name = name
+        self.lazy = lazy
+        self.started = 0.0
+        self.import_seconds = 0.0
+        self.setup_seconds = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "failed"
+        return "lazy" if self.lazy and not self.started else "loaded"
+
+
+def read_manifest(path: str = MANIFEST_PATH) -> List[Dict]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)["cogs"]
+
+
+class CogLoader:
+    """
+    :param bot: The bot to load the cogs into.
+    :param path: The manifest to read.
+    """
+
+    def __init__(self, bot, path: str = MANIFEST_PATH) -> None:
+        self.bot = bot
+        self.path = path
+        self.timings: Dict[str, CogTiming] = {}
+        # Lazy cogs that have not been loaded yet.
+        self.pending: List[str] = []
+        self._pending_lock = asyncio.Lock()
+
+    async def load_all(self) -> List[CogTiming]:
+        """
+        Load the eager cogs concurrently. Importing a cog runs on the event loop either way, so the
+        gain is in overlapping what their setup waits on, e.g. the database in `cog_load`.
+        """
+        entries = read_manifest(self.path)
+        listed = {entry["name"] for entry in entries}
+        directory = os.path.dirname(self.path)
+        for file in sorted(os.listdir(directory)):
+            if file.endswith(".py") and file[:-3] not in listed:
+                self.bot.logger.info(f"Skipping cogs/{file}, it is not in the manifest")
+
+        eager = []
+        for entry in entries:
+            timing = self.timings[entry["name"]] = CogTiming(entry["name"], entry.get("lazy", False))
+            if timing.lazy:
+                self.pending.append(timing.name)
+            else:
+                eager.append(timing)
+        await asyncio.gather(*(self._load(timing) for timing in eager))
+        return list(self.timings.values())
+
+    async def _load(self, timing: CogTiming) -> None:
+        _loading.set(timing)
+        timing.started = time.perf_counter()
+        try:
+            await self.bot.load_extension(f"cogs.{timing.name}")
+            self.bot.logger.info(f"Loaded extension '{timing.name}'")
+        except Exception as e:
+            timing.error = f"{type(e).__name__}: {e}"
+            self.bot.logger.error(f"Failed to load extension {timing.name}\n{timing.error}")
+        finally:
+            elapsed = time.perf_counter() - timing.started
+            if not timing.import_seconds:
+                # The cog never reached `add_cog`.
+                timing.import_seconds = elapsed
+            timing.setup_seconds = elapsed - timing.import_seconds
+
+    @contextlib.contextmanager
+    def setup_phase(self) -> Iterator[None]:
+        """
+        Wraps `add_cog`: everything before it is the cog's import, the rest (including `cog_load`) its setup.
+        """
+        timing = _loading.get()
+        if timing is not None and not timing.import_seconds:
+            timing.import_seconds = time.perf_counter() - timing.started
+        yield
+
+    async def load_pending(self) -> List[str]:
+        """
+        Load every lazy cog that is still pending.
+
+        :return: The names of the cogs loaded.
+        """
+        async with self._pending_lock:
+            # Any the owner loaded by hand in the meantime are already there.
+            pending = [name for name in self.pending if f"cogs.{name}" not in self.bot.extensions]
+            await asyncio.gather(*(self._load(self.timings[name]) for name in pending))
+            # Cleared only now, so a command arriving meanwhile waits on the lock instead of missing its cog.
+            self.pending = []
+        if pending:
+            self.bot.logger.info(f"Loaded lazy extension(s) {', '.join(pending)} on first use")
+        return pending
+
+    def table(self) -> str:
+        """
+        :return: The import and setup time of every cog, slowest first, as a fixed-width table.
+        """
+        rows = sorted(self.timings.values(), key=lambda timing: timing.import_seconds + timing.setup_seconds, reverse=True)
+        lines = [f"{'cog':<16}{'import ms':>10}{'setup ms':>10}  status"]
+        for timing in rows:
+            lines.append(
+                f"{timing.name:<16}{timing.import_seconds * 1000:>10.1f}{timing.setup_seconds * 1000:>10.1f}  {timing.status}"
+            )
+        return "\n".join(lines)
+
+
+class LazyCommandTree(app_commands.CommandTree):
+    """
+    A command tree that loads the pending lazy cogs before handling a command it does not know yet.
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        loader = getattr(self.client, "cog_loader", None)
+        if loader is not None and loader.pending and interaction.type in (
+            discord.InteractionType.application_command,
+            discord.InteractionType.autocomplete,
+        ):
+            name = (interaction.data or {}).get("name")
+            command_type = discord.AppCommandType((interaction.data or {}).get("type", 1))
+            if self.get_command(name, guild=interaction.guild, type=command_type) is None and (
+                self.get_command(name, type=command_type) is None
+            ):
+                await loader.load_pending()
+        return True
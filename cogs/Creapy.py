@@ -1,109 +1,567 @@
+import asyncio
+import collections
 import discord
 from discord.ext import commands
+from discord.ext.commands import Context
+import io
 import logging
-from datetime import datetime
+import queue
+import time
+from datetime import datetime, timedelta
+
+from database import StoredMessage
+from log_sink import LogSink
+
+# Room for the records of one embed, inside its code block.
+LOG_EMBED_CHARACTERS = 4000
+LOG_LINE_CHARACTERS = 1000
+# Authors listed in the embed of a deletion transcript; the file has them all.
+TRANSCRIPT_TOP_AUTHORS = 15
+# How long the IDs of purged messages are kept, to ignore the delete events that arrive after the purge.
+PURGED_MESSAGE_MEMORY = 60.0
+OVERWRITE_ACTIONS = (
+    discord.AuditLogAction.overwrite_update,
+    discord.AuditLogAction.overwrite_create,
+    discord.AuditLogAction.overwrite_delete,
+)
+
 
 class DiscordLogHandler(logging.Handler):
-    def __init__(self, channel: discord.TextChannel):
+    """
+    Puts every record on a bounded queue and returns at once, whatever thread it is called from.
+    `LogForwarder` sends them from the event loop. Records that do not fit are counted in `dropped`.
+    """
+
+    def __init__(self, loop, capacity=1000):
         super().__init__()
-        self.channel = channel
+        self.queue = queue.Queue(capacity)
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        self._loop = loop
+
+    def emit(self, record):
+        # The log sink reporting its own failures: forwarding those would only add to them.
+        if getattr(record, "log_sink", False):
+            return
+        try:
+            # Formatted here, in the caller's thread, before the record's arguments can change.
+            self.queue.put_nowait(((record.levelno, record.name, record.getMessage()), self.format(record)))
+        except queue.Full:
+            self.dropped += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+        # Wake the forwarder after every record: setting an Event that is already set costs nothing,
+        # and checking the queue size first would race with the other threads logging.
+        try:
+            self._loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            # The loop is closed, the bot is shutting down.
+            pass
+
+
+class LogForwarder:
+    """
+    Drains a `DiscordLogHandler` into "Bot Log" embeds, packing as many records per embed as fit.
+
+    A record repeated within `coalesce_window` seconds is sent once; the repeats are counted and
+    reported in a single line when the window ends.
+    """
+
+    def __init__(self, handler, send, coalesce_window=60.0):
+        self.handler = handler
+        self.send = send
+        self.coalesce_window = coalesce_window
+        self.forwarded = 0
+        self.coalesced = 0
+        # When each recent record was first sent and how often it repeated since, by record.
+        self._recent = {}
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Whatever is left, including the pending repeat counts, goes out with the sink's last flush.
+        self.drain(final=True)
+
+    async def run(self):
+        while True:
+            timeout = None
+            if self._recent:
+                oldest = min(first_sent for first_sent, _ in self._recent.values())
+                timeout = max(0.0, oldest + self.coalesce_window - time.monotonic())
+            try:
+                await asyncio.wait_for(self.handler.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.handler.wakeup.clear()
+            self.drain()
+
+    def drain(self, final=False):
+        now = time.monotonic()
+        lines = []
+        for key, (first_sent, repeats) in list(self._recent.items()):
+            if final or now - first_sent >= self.coalesce_window:
+                del self._recent[key]
+                if repeats:
+                    lines.append((key[0], f"(repeated {repeats} more time(s) in {now - first_sent:.0f}s) {key[2]}"))
+        while True:
+            try:
+                key, line = self.handler.queue.get_nowait()
+            except queue.Empty:
+                break
+            recent = self._recent.get(key)
+            if recent is not None:
+                recent[1] += 1
+                self.coalesced += 1
+                continue
+            self._recent[key] = [now, 0]
+            lines.append((key[0], line))
+        self.forwarded += len(lines)
+        for embed in self.build_embeds(lines):
+            self.send(embed)
+
+    def build_embeds(self, lines):
+        embeds = []
+        chunk, level, length = [], logging.NOTSET, 0
+        for line_level, line in lines:
+            line = line if len(line) <= LOG_LINE_CHARACTERS else line[:LOG_LINE_CHARACTERS - 1] + "…"
+            if chunk and length + len(line) + 1 > LOG_EMBED_CHARACTERS:
+                embeds.append(self.build_embed(chunk, level))
+                chunk, level, length = [], logging.NOTSET, 0
+            chunk.append(line.replace("```", "`\u200b``"))
+            level = max(level, line_level)
+            length += len(line) + 1
+        if chunk:
+            embeds.append(self.build_embed(chunk, level))
+        return embeds
+
+    def build_embed(self, lines, level):
+        if level >= logging.ERROR:
+            color = 0xE02B2B
+        elif level >= logging.WARNING:
+            color = discord.Color.yellow()
+        else:
+            color = discord.Color.blue()
+        return discord.Embed(title="Bot Log", description="```\n" + "\n".join(lines) + "\n```", color=color)
+
+
+class AuditLogIndex:
+    """
+    The recent audit log entries of every guild by (guild ID, action, target ID), fed by the
+    `on_audit_log_entry_create` gateway event, so the listeners can tell who did something without
+    asking Discord.
+
+    The gateway usually sends an entry just after the event it explains, so a lookup waits up to
+    `wait` seconds for it. Only if it still has not arrived are the guild's latest entries fetched,
+    once for however many listeners are waiting, and indexed too. Entries older than `max_age`
+    seconds are ignored, so an earlier change to the same target is not taken for this one.
+
+    :param logger: Where the index reports the audit logs it failed to fetch.
+    """
+
+    def __init__(self, logger, max_age=5.0, wait=2.0, fetch_limit=25, max_size=2048):
+        self.logger = logger
+        self.max_age = max_age
+        self.wait = wait
+        self.fetch_limit = fetch_limit
+        self.max_size = max_size
+        self.hits = 0
+        self.waited = 0
+        self.fetches = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        # The lookups waiting for an entry, by key.
+        self._waiters = {}
+        # The fetch in progress for a guild, which other lookups of the guild wait on.
+        self._fetches = {}
+
+    def add(self, entry):
+        key = (entry.guild.id, entry.action, getattr(entry.target, "id", None))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        for waiter in self._waiters.pop(key, ()):
+            if not waiter.done():
+                waiter.set_result(entry)
+
+    def get(self, guild_id, actions, target_id):
+        oldest = discord.utils.utcnow() - timedelta(seconds=self.max_age)
+        for action in actions:
+            entry = self._entries.get((guild_id, action, target_id))
+            if entry is not None and entry.created_at >= oldest:
+                return entry
+        return None
 
-    async def emit(self, record):
+    async def resolve(self, guild, actions, target_id):
+        """
+        :return: The entry of one of the actions on the target, or None if there is none or the bot may not view the audit log.
+        """
+        entry = self.get(guild.id, actions, target_id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        if not guild.me.guild_permissions.view_audit_log:
+            return None
+        waiter = asyncio.get_running_loop().create_future()
+        keys = [(guild.id, action, target_id) for action in actions]
+        for key in keys:
+            self._waiters.setdefault(key, []).append(waiter)
         try:
-            log_message = self.format(record)
-            # Send the log message as an embed to the Discord channel
-            embed = discord.Embed(
-                title="Bot Log",
-                description=log_message,
-                color=discord.Color.blue()
-            )
-            await self.channel.send(embed=embed)
-        except Exception as e:
-            print(f"Error while sending log to Discord: {e}")  # Debug: Catch errors in the handler
+            entry = await asyncio.wait_for(waiter, self.wait)
+            self.waited += 1
+            return entry
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for key in keys:
+                waiters = self._waiters.get(key)
+                if waiters is not None and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+        fetch = self._fetches.get(guild.id)
+        if fetch is None:
+            fetch = self._fetches[guild.id] = asyncio.create_task(self.fetch(guild))
+            fetch.add_done_callback(lambda _: self._fetches.pop(guild.id, None))
+        await asyncio.shield(fetch)
+        entry = self.get(guild.id, actions, target_id)
+        if entry is None:
+            self.misses += 1
+        return entry
+
+    async def fetch(self, guild):
+        self.fetches += 1
+        try:
+            async for entry in guild.audit_logs(limit=self.fetch_limit):
+                self.add(entry)
+        except discord.HTTPException as e:
+            self.logger.warning(f"Failed to fetch the audit log of {guild.name}: {e}")
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "waited": self.waited,
+            "fetches": self.fetches,
+            "misses": self.misses,
+        }
+
+
+def performed_by(entry):
+    if entry is None:
+        return "Unknown"
+    # The event only carries the user's ID, and the user may not be cached.
+    return entry.user or f"<@{entry.user_id}>"
+
+
+def build_transcript(channel, messages):
+    """
+    Writes one line per deleted message, oldest first, straight into the file to upload.
+
+    :param messages: (message ID, stored message or None) pairs.
+    :return: The file, rewound, and the number of messages of each author.
+    """
+    transcript = io.BytesIO()
+    authors = collections.Counter()
+    transcript.write(f"Deleted messages of #{channel.name} ({channel.id})\n\n".encode())
+    for message_id, message in messages:
+        sent_at = discord.utils.snowflake_time(message_id).strftime("%d.%m.%Y %H:%M:%S")
+        if message is None:
+            authors["Unknown"] += 1
+            line = f"[{sent_at}] Unknown: (older than the message store)"
+        else:
+            author = f"{message.author} ({message.author_id})"
+            authors[author] += 1
+            line = f"[{sent_at}] {author}: {message.content}"
+            if message.attachments:
+                line += " [" + " ".join(message.attachments) + "]"
+        transcript.write((line.replace("\n", "\n    ") + "\n").encode())
+    transcript.seek(0)
+    return transcript, authors
+
 
 class MessageLogger(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.deleted_message_channel_id = 1324399249668046940  # Channel for deleted messages
-        self.log_channel_id = 1324582941883502634  # Log channel ID
-        self.excluded_channels = [
-            1311571732405948478,
-            1314246090308063293,
-            1311571732405948479,
-            1314244464184791070,
-            1321672767124541562,
-        ]
+        # Every embed this cog logs goes through the sink, which sends them in batches.
+        self.sink = LogSink(bot.logger)
+        # Forwards Python logging to the home guild's log channel, once the bot is ready.
+        self.handler = None
+        self.forwarder = None
+        # Who did what, for the "Performed By" lines.
+        self.audit_log = AuditLogIndex(bot.logger)
+        # The purges running, by channel ID, and the IDs of recently purged messages with when they are forgotten.
+        self._purges = {}
+        self._purged = {}
+        self.apply_config(bot.config)
+
+    def apply_config(self, config):
+        sink_config = config.get("log_sink", {})
+        self.sink.configure(
+            batch_size=sink_config.get("batch_size", 10),
+            flush_interval=sink_config.get("flush_interval", 2.0),
+            max_queue=sink_config.get("max_queue", 500),
+            sample_above=sink_config.get("sample_above", 0.5),
+            sample_every=sink_config.get("sample_every", 4),
+        )
+        self.forward_level = logging.getLevelName(sink_config.get("forward_level", "INFO").upper())
+        if not isinstance(self.forward_level, int):
+            self.forward_level = logging.INFO
+        self.forward_queue = sink_config.get("forward_queue", 1000)
+        self.coalesce_window = sink_config.get("coalesce_window", 60.0)
+        audit_config = config.get("audit_log", {})
+        self.audit_log.max_age = audit_config.get("max_age", 5.0)
+        self.audit_log.wait = audit_config.get("wait", 2.0)
+        self.audit_log.fetch_limit = max(1, min(audit_config.get("fetch_limit", 25), 100))
+        if self.handler is not None:
+            self.handler.setLevel(self.forward_level)
+            self.forwarder.coalesce_window = self.coalesce_window
+
+    async def cog_load(self):
+        self.sink.start()
+
+    async def cog_unload(self):
+        if self.handler is not None:
+            logging.getLogger().removeHandler(self.handler)
+            self.forwarder.stop()
+            self.handler = self.forwarder = None
+        await self.sink.close()
 
+    @commands.Cog.listener()
+    async def on_config_update(self, before, after):
+        self.apply_config(after)
+
+    def is_excluded(self, channel):
+        """Whether the guild asked for the channel's messages not to be logged."""
+        guild = getattr(channel, "guild", None)
+        return guild is None or channel.id in self.bot.guild_settings.ids(guild.id, "message_log_excluded_channels")
+
+    @commands.Cog.listener()
     async def on_ready(self):
         """Wait for the bot to be fully ready before setting up logging."""
-        log_channel = self.bot.get_channel(self.log_channel_id)
+        if self.handler is not None:
+            # A reconnect: the handler is already installed.
+            return
+        home_guild = self.bot.get_guild(self.bot.config.get("home_guild_id", 0))
+        log_channel = self.bot.guild_settings.channel(home_guild, "log_channel") if home_guild else None
         if log_channel:
-            discord_handler = DiscordLogHandler(log_channel)
-            discord_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-            logging.getLogger().addHandler(discord_handler)
-            logging.getLogger().setLevel(logging.INFO)
+            self.handler = DiscordLogHandler(asyncio.get_running_loop(), self.forward_queue)
+            self.handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            self.handler.setLevel(self.forward_level)
+            # The log channel is looked up for every batch, so a changed setting applies at once.
+            self.forwarder = LogForwarder(self.handler, self.log_message, self.coalesce_window)
+            self.forwarder.start()
+            root = logging.getLogger()
+            root.addHandler(self.handler)
+            if root.level > self.forward_level:
+                root.setLevel(self.forward_level)
             # Optionally, log that the logging setup is complete
-            await self.log_message("Logging setup complete.")
+            self.log_message(discord.Embed(description="Logging setup complete.", color=discord.Color.blue()))
         else:
             print("Log channel not found")  # Debug: Channel not found
 
-    async def get_audit_log_entry(self, guild, action_type):
-        """Fetch the most recent audit log for a specific action type."""
-        async for entry in guild.audit_logs(limit=1, action=action_type):
-            return entry
-        return None
-
     @commands.Cog.listener()
-    async def on_message_delete(self, message):
-        if message.channel.id in self.excluded_channels:
-            return
+    async def on_audit_log_entry_create(self, entry):
+        self.audit_log.add(entry)
+
+    async def get_audit_log_entry(self, guild, actions, target_id):
+        """The audit log entry of one of the actions on the target, see `AuditLogIndex`."""
+        return await self.audit_log.resolve(guild, actions, target_id)
+
+    def is_log_channel(self, channel):
+        """Whether the channel is one of the guild's log channels, which only hold the bot's own embeds."""
+        settings = self.bot.guild_settings
+        return channel.id in (
+            settings.id(channel.guild.id, "message_log_channel"),
+            settings.id(channel.guild.id, "log_channel"),
+        )
+
+    def is_watched(self, channel):
+        """Whether the channel's messages are kept in the message store, for the message logs."""
+        if self.is_excluded(channel):
+            return False
+        message_log_channel = self.bot.guild_settings.id(channel.guild.id, "message_log_channel")
+        return message_log_channel is not None and not self.is_log_channel(channel)
 
-        content = message.clean_content if message.clean_content else "No text"
-        if not content and not message.attachments:
-            content = "No content or attachments"
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if self.is_watched(message.channel):
+            self.bot.message_store.add(StoredMessage.from_message(message))
 
+    def deleted_embed(self, message_id, channel, message):
+        """The "Message Deleted" embed; `message` is None when the message is neither cached nor stored."""
         deleted_at = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+        if message is None:
+            return discord.Embed(
+                title="Message Deleted",
+                description=f"**Author:** Unknown\n"
+                            f"**Channel:** {channel.name}\n"
+                            f"**Content:** Unknown, the message is older than the message store\n"
+                            f"**Message ID:** {message_id}\n"
+                            f"**Deleted At:** {deleted_at}",
+                color=discord.Color.red(),
+            )
+
+        content = message.content if message.content else "No text"
         embed = discord.Embed(
             title="Message Deleted",
-            description=f"**Author:** {message.author} (`{message.author.id}`)\n"
-                        f"**Channel:** {message.channel.name}\n"
+            description=f"**Author:** {message.author} (`{message.author_id}`)\n"
+                        f"**Channel:** {channel.name}\n"
                         f"**Content:** {content}\n"
-                        f"**Message ID:** {message.id}\n"
+                        f"**Message ID:** {message_id}\n"
                         f"**Deleted At:** {deleted_at}",
             color=discord.Color.red(),
         )
 
         if message.attachments:
-            attachments = "\n".join([a.url for a in message.attachments])
+            attachments = "\n".join(message.attachments)
             embed.add_field(name="Attachments", value=attachments, inline=False)
+        return embed
+
+    def deleted_message(self, message_id, cached_message):
+        """The deleted message as discord.py cached it, or else as stored; forgotten by the store either way."""
+        stored = self.bot.message_store.pop(message_id)
+        return StoredMessage.from_message(cached_message) if cached_message is not None else stored
 
-        log_channel = self.bot.get_channel(self.deleted_message_channel_id)
+    # The raw events fire for every message, cached by discord.py or not.
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        if payload.guild_id is None:
+            return
+        message = self.deleted_message(payload.message_id, payload.cached_message)
+        channel = self.bot.get_channel(payload.channel_id)
+        # Deleting the log embeds themselves is not logged, or each one would be replaced by a new embed.
+        if channel is None or self.is_excluded(channel) or self.is_log_channel(channel):
+            return
+        purge = self._purges.get(channel.id)
+        if purge is not None:
+            # Messages too old to be bulk deleted are deleted one by one, still part of the purge.
+            purge[payload.message_id] = message
+            return
+        if self.was_purged(payload.message_id):
+            return
+
+        log_channel = self.bot.guild_settings.channel(channel.guild, "message_log_channel")
         if log_channel:
-            await log_channel.send(embed=embed)
+            self.sink.submit(log_channel, self.deleted_embed(payload.message_id, channel, message))
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        if payload.guild_id is None:
+            return
+        cached = {message.id: message for message in payload.cached_messages}
+        messages = [(message_id, self.deleted_message(message_id, cached.get(message_id))) for message_id in sorted(payload.message_ids)]
+        channel = self.bot.get_channel(payload.channel_id)
+        if channel is None or self.is_excluded(channel) or self.is_log_channel(channel):
+            return
+        purge = self._purges.get(channel.id)
+        if purge is not None:
+            # Part of a `/purge`, which logs all of its chunks at once when it ends.
+            purge.update(messages)
+            return
+        messages = [(message_id, message) for message_id, message in messages if not self.was_purged(message_id)]
+        if not messages:
+            return
+
+        audit_entry = await self.get_audit_log_entry(channel.guild, (discord.AuditLogAction.message_bulk_delete,), channel.id)
+        await self.log_transcript(channel, "Messages Bulk Deleted", performed_by(audit_entry), messages)
+
+    @commands.Cog.listener()
+    async def on_purge_begin(self, channel):
+        # The deleted messages collected from the delete events while the purge runs, by message ID.
+        self._purges[channel.id] = {}
+
+    @commands.Cog.listener()
+    async def on_purge_end(self, channel, author, purged_messages):
+        collected = self._purges.pop(channel.id, {})
+        if purged_messages is not None:
+            # What the purge returns is complete, even for the messages whose delete events are still on their way.
+            collected.update((message.id, StoredMessage.from_message(message)) for message in purged_messages)
+        now = time.monotonic()
+        self._purged = {message_id: expires for message_id, expires in self._purged.items() if expires > now}
+        for message_id in collected:
+            self._purged[message_id] = now + PURGED_MESSAGE_MEMORY
+            self.bot.message_store.pop(message_id)
+        if collected and not (self.is_excluded(channel) or self.is_log_channel(channel)):
+            await self.log_transcript(channel, "Messages Purged", f"{author} (`{author.id}`)", sorted(collected.items()))
+
+    def was_purged(self, message_id):
+        """Whether the message was part of a `/purge`, whose transcript has already been logged."""
+        expires = self._purged.get(message_id)
+        return expires is not None and expires > time.monotonic()
+
+    async def log_transcript(self, channel, title, deleted_by, messages):
+        """
+        Uploads a single transcript of the deleted messages, with the number of messages per author, instead of one embed each.
+
+        :param messages: (message ID, stored message or None) pairs, oldest first.
+        """
+        log_channel = self.bot.guild_settings.channel(channel.guild, "message_log_channel")
+        if not log_channel:
+            return
+        transcript, authors = build_transcript(channel, messages)
+        embed = discord.Embed(
+            title=title,
+            description=f"**Channel:** {channel.name}\n"
+                        f"**Messages:** {len(messages)}\n"
+                        f"**Deleted By:** {deleted_by}\n"
+                        f"**Deleted At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
+            color=discord.Color.red(),
+        )
+        lines = [f"{author}: {count}" for author, count in authors.most_common(TRANSCRIPT_TOP_AUTHORS)]
+        if len(authors) > TRANSCRIPT_TOP_AUTHORS:
+            lines.append(f"and {len(authors) - TRANSCRIPT_TOP_AUTHORS} more")
+        embed.add_field(name="Messages per Author", value="\n".join(lines), inline=False)
+        filename = f"deleted-{channel.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+        try:
+            # Files do not go through the sink, but this is one upload for the whole deletion.
+            await log_channel.send(embed=embed, file=discord.File(transcript, filename=filename))
+        except discord.HTTPException as e:
+            self.bot.logger.warning(f"Failed to upload the transcript of {len(messages)} deleted message(s) in {channel.name}: {e}")
 
     @commands.Cog.listener()
-    async def on_message_edit(self, before, after):
-        if before.channel.id in self.excluded_channels:
+    async def on_raw_message_edit(self, payload):
+        after = payload.message
+        if after.guild is None or self.is_excluded(after.channel):
             return
 
-        if before.clean_content == after.clean_content:
+        stored = self.bot.message_store.get(payload.message_id)
+        if payload.cached_message is not None:
+            before = payload.cached_message.clean_content
+        else:
+            before = stored.content if stored is not None else None
+        if stored is not None:
+            self.bot.message_store.edit(payload.message_id, after.clean_content)
+        if before == after.clean_content:
+            return
+        if before is None and after.edited_at is None:
+            # Not an edit, e.g. Discord adding a link preview to a message the bot has not seen.
             return
 
+        if before is None:
+            before = "Unknown, the message is older than the message store"
         edited_at = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
         embed = discord.Embed(
             title="Message Edited",
-            description=f"**Author:** {before.author} (`{before.author.id}`)\n"
-                        f"**Channel:** {before.channel.name}\n"
-                        f"**Before:** {before.clean_content if before.clean_content else 'No text'}\n"
+            description=f"**Author:** {after.author} (`{after.author.id}`)\n"
+                        f"**Channel:** {after.channel.name}\n"
+                        f"**Before:** {before if before else 'No text'}\n"
                         f"**After:** {after.clean_content if after.clean_content else 'No text'}\n"
-                        f"**Message ID:** {before.id}\n"
+                        f"**Message ID:** {after.id}\n"
                         f"**Edited At:** {edited_at}",
             color=discord.Color.orange(),
         )
 
-        log_channel = self.bot.get_channel(self.deleted_message_channel_id)
+        log_channel = self.bot.guild_settings.channel(after.guild, "message_log_channel")
         if log_channel:
-            await log_channel.send(embed=embed)
+            self.sink.submit(log_channel, embed)
 
     @commands.Cog.listener()
     async def on_command(self, ctx):
@@ -121,7 +579,7 @@ class MessageLogger(commands.Cog):
             color=discord.Color.blue()
         )
 
-        await self.log_message(embed)
+        self.log_message(embed, ctx.guild)
 
     @commands.Cog.listener()
     async def on_error(self, error):
@@ -135,7 +593,7 @@ class MessageLogger(commands.Cog):
             color=discord.Color.red()
         )
 
-        await self.log_message(embed)
+        self.log_message(embed)
 
     # New event for role changes
     @commands.Cog.listener()
@@ -144,7 +602,7 @@ class MessageLogger(commands.Cog):
             removed_roles = [role for role in before.roles if role not in after.roles]
             added_roles = [role for role in after.roles if role not in before.roles]
             timestamp = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-            audit_entry = await self.get_audit_log_entry(after.guild, discord.AuditLogAction.member_role_update)
+            audit_entry = await self.get_audit_log_entry(after.guild, (discord.AuditLogAction.member_role_update,), after.id)
 
             embed = discord.Embed(
                 title="Role Updated",
@@ -152,15 +610,16 @@ class MessageLogger(commands.Cog):
                             f"**Removed Roles:** {', '.join([role.name for role in removed_roles]) if removed_roles else 'None'}\n"
                             f"**Added Roles:** {', '.join([role.name for role in added_roles]) if added_roles else 'None'}\n"
                             f"**Updated At:** {timestamp}\n"
-                            f"**Performed By:** {audit_entry.user if audit_entry else 'Unknown'}",
+                            f"**Performed By:** {performed_by(audit_entry)}",
                 color=discord.Color.green()
             )
 
-            await self.log_message(embed)
+            self.log_message(embed, after.guild)
 
     # New event for server settings changes
     @commands.Cog.listener()
     async def on_guild_update(self, before, after):
+        embeds = []
         if before.name != after.name:
             embed = discord.Embed(
                 title="Server Name Changed",
@@ -169,17 +628,7 @@ class MessageLogger(commands.Cog):
                             f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
                 color=discord.Color.blue()
             )
-            await self.log_message(embed)
-
-        if before.region != after.region:
-            embed = discord.Embed(
-                title="Server Region Changed",
-                description=f"**Old Region:** {before.region}\n"
-                            f"**New Region:** {after.region}\n"
-                            f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
-                color=discord.Color.purple()
-            )
-            await self.log_message(embed)
+            embeds.append(embed)
 
         if before.icon != after.icon:
             embed = discord.Embed(
@@ -189,7 +638,7 @@ class MessageLogger(commands.Cog):
                             f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
                 color=discord.Color.orange()
             )
-            await self.log_message(embed)
+            embeds.append(embed)
 
         if before.verification_level != after.verification_level:
             embed = discord.Embed(
@@ -199,7 +648,7 @@ class MessageLogger(commands.Cog):
                             f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
                 color=discord.Color.teal()
             )
-            await self.log_message(embed)
+            embeds.append(embed)
 
         if before.default_notifications != after.default_notifications:
             embed = discord.Embed(
@@ -209,14 +658,21 @@ class MessageLogger(commands.Cog):
                             f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
                 color=discord.Color.orange()
             )
-            await self.log_message(embed)
+            embeds.append(embed)
+
+        if not embeds:
+            return
+        audit_entry = await self.get_audit_log_entry(after, (discord.AuditLogAction.guild_update,), after.id)
+        for embed in embeds:
+            embed.description += f"\n**Performed By:** {performed_by(audit_entry)}"
+            self.log_message(embed, after)
 
     # New event for channel updates (like permissions, name, etc.)
     @commands.Cog.listener()
     async def on_guild_channel_update(self, before, after):
         # Log channel name changes
         if before.name != after.name:
-            audit_entry = await self.get_audit_log_entry(after.guild, discord.AuditLogAction.channel_update)
+            audit_entry = await self.get_audit_log_entry(after.guild, (discord.AuditLogAction.channel_update,), after.id)
 
             embed = discord.Embed(
                 title="Channel Name Changed",
@@ -224,29 +680,30 @@ class MessageLogger(commands.Cog):
                             f"**New Name:** {after.name}\n"
                             f"**Channel ID:** {before.id}\n"
                             f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
-                            f"**Performed By:** {audit_entry.user if audit_entry else 'Unknown'}",
+                            f"**Performed By:** {performed_by(audit_entry)}",
                 color=discord.Color.green()
             )
-            await self.log_message(embed)
+            self.log_message(embed, after.guild)
 
         # Log channel permission changes
         if before.overwrites != after.overwrites:
-            audit_entry = await self.get_audit_log_entry(after.guild, discord.AuditLogAction.channel_update)
+            # Permission changes are logged as overwrite actions on the channel.
+            audit_entry = await self.get_audit_log_entry(after.guild, OVERWRITE_ACTIONS, after.id)
 
             embed = discord.Embed(
                 title="Channel Permissions Changed",
                 description=f"**Channel:** {after.name}\n"
                             f"**Channel ID:** {after.id}\n"
                             f"**Updated At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
-                            f"**Performed By:** {audit_entry.user if audit_entry else 'Unknown'}",
+                            f"**Performed By:** {performed_by(audit_entry)}",
                 color=discord.Color.yellow()
             )
-            await self.log_message(embed)
+            self.log_message(embed, after.guild)
 
     # Event for channel creation
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
-        audit_entry = await self.get_audit_log_entry(channel.guild, discord.AuditLogAction.channel_create)
+        audit_entry = await self.get_audit_log_entry(channel.guild, (discord.AuditLogAction.channel_create,), channel.id)
 
         embed = discord.Embed(
             title="Channel Created",
@@ -254,15 +711,15 @@ class MessageLogger(commands.Cog):
                         f"**Channel ID:** {channel.id}\n"
                         f"**Type:** {channel.type}\n"
                         f"**Created At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
-                        f"**Performed By:** {audit_entry.user if audit_entry else 'Unknown'}",
+                        f"**Performed By:** {performed_by(audit_entry)}",
             color=discord.Color.green()
         )
-        await self.log_message(embed)
+        self.log_message(embed, channel.guild)
 
     # Event for channel deletion
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel):
-        audit_entry = await self.get_audit_log_entry(channel.guild, discord.AuditLogAction.channel_delete)
+        audit_entry = await self.get_audit_log_entry(channel.guild, (discord.AuditLogAction.channel_delete,), channel.id)
 
         embed = discord.Embed(
             title="Channel Deleted",
@@ -270,18 +727,77 @@ class MessageLogger(commands.Cog):
                         f"**Channel ID:** {channel.id}\n"
                         f"**Type:** {channel.type}\n"
                         f"**Deleted At:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}\n"
-                        f"**Performed By:** {audit_entry.user if audit_entry else 'Unknown'}",
+                        f"**Performed By:** {performed_by(audit_entry)}",
             color=discord.Color.red()
         )
-        await self.log_message(embed)
+        self.log_message(embed, channel.guild)
 
-    async def log_message(self, embed):
-        # Send the log message embed to the log channel
-        log_channel = self.bot.get_channel(self.log_channel_id)
+    def log_message(self, embed, guild=None):
+        # Queue the log message embed for the guild's log channel, or the home guild's for bot-wide logs
+        if guild is None:
+            guild = self.bot.get_guild(self.bot.config.get("home_guild_id", 0))
+        log_channel = self.bot.guild_settings.channel(guild, "log_channel") if guild else None
         if log_channel:
-            await log_channel.send(embed=embed)
+            self.sink.submit(log_channel, embed)
         else:
             print("Failed to send log to channel")  # Debug: Handle case when channel is not found
 
+    @commands.hybrid_command(
+        name="logstats",
+        description="Shows how the log messages are being batched and whether any were skipped.",
+    )
+    @commands.is_owner()
+    async def logstats(self, context: Context) -> None:
+        """
+        Shows how the log messages are being batched and whether any were skipped.
+
+        :param context: The hybrid command context.
+        """
+        stats = self.sink.stats()
+        embed = discord.Embed(title="Log Statistics", color=0xBEBEFE)
+        embed.add_field(
+            name="Sent",
+            value=(
+                f"{stats['sent']} of {stats['submitted']} embed(s) in {stats['messages']} message(s), "
+                f"{stats['embeds_per_message']} per message"
+            ),
+            inline=False,
+        )
+        embed.add_field(name="Queued", value=f"{stats['queued']}/{stats['max_queue']} embed(s)", inline=False)
+        embed.add_field(
+            name="Skipped under load",
+            value=f"{stats['sampled']} sampled out, {stats['dropped']} dropped, {stats['failed']} failed to send",
+            inline=False,
+        )
+        store = self.bot.message_store.stats()
+        embed.add_field(
+            name="Message store",
+            value=(
+                f"{store['size']}/{store['max_size']} messages, {store['bytes'] / 1024 / 1024:.1f}/{store['max_bytes'] / 1024 / 1024:.0f} MiB\n"
+                f"{store['hits']} hits, {store['misses']} misses ({store['hit_rate']:.0%} hit rate)\n"
+                f"{store['evictions']} evictions, {store['expirations']} expirations"
+            ),
+            inline=False,
+        )
+        audit_log = self.audit_log.stats()
+        embed.add_field(
+            name="Audit log",
+            value=(
+                f"{audit_log['entries']} recent entries, {audit_log['hits']} found at once, "
+                f"{audit_log['waited']} after waiting, {audit_log['fetches']} fetch(es), {audit_log['misses']} not found"
+            ),
+            inline=False,
+        )
+        if self.handler is not None:
+            embed.add_field(
+                name="Python logging",
+                value=(
+                    f"{self.forwarder.forwarded} record(s) forwarded, {self.forwarder.coalesced} repeat(s) coalesced, "
+                    f"{self.handler.dropped} dropped, {self.handler.queue.qsize()} queued"
+                ),
+                inline=False,
+            )
+        await context.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(MessageLogger(bot))
\ No newline at end of file
@@ -11,10 +11,7 @@ import discord
 class VoiceChannelManager(commands.Cog, name="voice_channel_manager"):
     def __init__(self, bot) -> None:
         self.bot = bot
-        self.watched_channel_id = 1321363056537763880  # Replace with the ID of the channel to monitor
-        self.category_id = 1311571732405948485  # Replace with the ID of the category for new channels
         self.active_channels = {}  # Track active voice channels and their associated roles
-        self.additional_roles = [1313488099426308156, 1315700246524723292]  # Roles allowed to view and connect
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
@@ -26,13 +23,14 @@ class VoiceChannelManager(commands.Cog, name="voice_channel_manager"):
         :param after: The member's new voice state.
         """
         guild = member.guild
+        settings = self.bot.guild_settings
 
-        # Check if the member joined the monitored voice channel
-        if after.channel and after.channel.id == self.watched_channel_id:
-            category = discord.utils.get(guild.categories, id=self.category_id)
+        # Check if the member joined the guild's voice hub channel
+        if after.channel and after.channel.id == settings.id(guild.id, "voice_hub_channel"):
+            category = settings.channel(guild, "voice_category")
 
-            if not category:
-                print(f"Category with ID {self.category_id} not found.")
+            if not isinstance(category, discord.CategoryChannel):
+                print(f"No voice category is set for {guild.name}.")
                 return
 
             # Create a new voice channel named after the member
@@ -61,11 +59,9 @@ class VoiceChannelManager(commands.Cog, name="voice_channel_manager"):
                 )
             }
 
-            # Add permissions for the additional roles
-            for role_id in self.additional_roles:
-                role = guild.get_role(role_id)
-                if role:
-                    overwrite[role] = discord.PermissionOverwrite(view_channel=True, connect=True)
+            # Add permissions for the roles allowed to view and connect
+            for role in settings.roles(guild, "voice_roles"):
+                overwrite[role] = discord.PermissionOverwrite(view_channel=True, connect=True)
 
             await new_vc.edit(overwrites=overwrite)
 
@@ -55,9 +55,9 @@ class DatabaseEdit(commands.Cog, name="Database Edit"):
         discord_id = user.id
 
         try:
-            query = f"UPDATE user_registration SET {field_name} = ? WHERE discord_id = ?"
-            async with context.bot.database.execute(query, (field_value, discord_id)):
-                await context.bot.database.commit()
+            await context.bot.database.update_registration_field(
+                discord_id, field_name, field_value
+            )
 
             await context.send(
                 f"{user.mention}'s `{field_name}` has been updated to: {field_value}.",
@@ -128,10 +128,7 @@ class DatabaseEdit(commands.Cog, name="Database Edit"):
         """
         discord_id = user.id
         try:
-            async with context.bot.database.execute(
-                "DELETE FROM user_registration WHERE discord_id = ?", (discord_id,)
-            ):
-                await context.bot.database.commit()
+            await context.bot.database.delete_registration(discord_id)
 
             await context.send(
                 f"All registration data for {user.mention} has been deleted.",
@@ -1,4 +1,5 @@
 
+import json
 import platform
 import random
 
@@ -8,6 +9,8 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
 
+from boot_profiler import IMPORT_PROFILE_VARIABLE, format_phases
+
 
 class FeedbackForm(discord.ui.Modal, title="Feeedback"):
     feedback = discord.ui.TextInput(
@@ -113,11 +116,13 @@ class General(commands.Cog, name="general"):
         name="botinfo",
         description="Get some useful (or not) information about the bot.",
     )
-    async def botinfo(self, context: Context) -> None:
+    @app_commands.describe(profile="Also show the import time of the cogs and the slowest packages.")
+    async def botinfo(self, context: Context, profile: bool = False) -> None:
         """
         Get some useful (or not) information about the bot.
 
         :param context: The hybrid command context.
+        :param profile: Also show the import time of the cogs and the slowest packages.
         """
         embed = discord.Embed(
             description="Get Bot info",
@@ -133,9 +138,68 @@ class General(commands.Cog, name="general"):
             value=f"/ (Slash Commands) or {self.bot.config['prefix']} for normal commands",
             inline=False,
         )
+        await self.add_boot_fields(embed, profile)
         embed.set_footer(text=f"Requested by {context.author}")
         await context.send(embed=embed)
 
+    async def add_boot_fields(self, embed: discord.Embed, profile: bool) -> None:
+        """
+        Adds the phases of the last boot, compared with the boot before it when the database has one.
+
+        :param embed: The embed to add the fields to.
+        :param profile: Also add the cog and import profiles.
+        """
+        record = self.bot.boot_profile.to_dict() if self.bot.boot_profile.finished else None
+        previous = None
+        if self.bot.database is not None:
+            try:
+                rows = await self.bot.database.get_boot_profiles(2)
+            except Exception as e:
+                self.bot.logger.error(f"Failed to get the boot profiles: {e}")
+                rows = []
+            if record is None and rows:
+                # Still booting: show the one before.
+                row, *rows = rows
+                record = {
+                    "total_ms": row["total_ms"],
+                    "phases": json.loads(row["phases"]),
+                    "cogs": json.loads(row["cogs"]),
+                    "imports": json.loads(row["imports"]) if row["imports"] else None,
+                }
+            elif rows:
+                # The first row is this boot.
+                rows = rows[1:]
+            previous = rows[0]["total_ms"] if rows else None
+        if record is None:
+            return
+        summary = f"{record['total_ms'] / 1000:.2f}s"
+        if previous:
+            summary += f" ({record['total_ms'] - previous:+.0f}ms against the boot before)"
+        embed.add_field(
+            name="Last Boot:",
+            value=f"{summary}\n```\n{format_phases(record['phases'], record['total_ms'])}\n```",
+            inline=False,
+        )
+        if not profile:
+            return
+        cogs = sorted(record["cogs"], key=lambda cog: cog["import_ms"] + cog["setup_ms"], reverse=True)
+        embed.add_field(
+            name="Cogs (import / setup ms):",
+            value="```\n"
+            + "\n".join(f"{cog['name']:<16}{cog['import_ms']:>8.1f}{cog['setup_ms']:>8.1f}  {cog['status']}" for cog in cogs[:15])
+            + "\n```",
+            inline=False,
+        )
+        if record["imports"]:
+            imports = "\n".join(f"{package:<20}{ms:>8.1f}" for package, ms in record["imports"][:15])
+            embed.add_field(name="Slowest Imports (ms):", value=f"```\n{imports}\n```", inline=False)
+        else:
+            embed.add_field(
+                name="Slowest Imports (ms):",
+                value=f"Not profiled, start the bot with `{IMPORT_PROFILE_VARIABLE}=1` to profile them.",
+                inline=False,
+            )
+
     @commands.hybrid_command(
         name="serverinfo",
         description="Get some useful (or not) information about the server.",
@@ -1,10 +1,244 @@
-import sqlite3
+import asyncio
+import time
+from contextlib import aclosing
+from typing import Dict, Iterator, Optional, Tuple
+
+import aiosqlite
+import discord
 from discord.ext import commands
 from discord import app_commands, Interaction, Member, Embed
 
+# Embed field values are capped at 1024 characters by Discord; leave room for the "and N more" line.
+FAILURES_LIMIT = 1000
+# Attempts per member when Discord answers with a 429 or a 5xx.
+EDIT_RETRIES = 3
+
+
+class NicknameSync:
+    """
+    A background pass over every registration with an IGN that sets the matching member's nickname.
+
+    Members whose nickname already matches, who left the guild, or who rank above the bot are
+    settled without a request. The remaining edits are shared by `concurrency` workers; discord.py
+    queues them on the guild's member route bucket, and a 429 or 5xx that still gets through is
+    retried after Discord's `Retry-After` (or an exponential backoff). Progress is checkpointed
+    after every chunk and reported in one message that is edited at most every `progress_interval`
+    seconds, so the job outlives the interaction token and resumes where it left off after a restart.
+    """
+
+    def __init__(
+        self,
+        bot,
+        guild: discord.Guild,
+        job: aiosqlite.Row,
+        *,
+        concurrency: int = 4,
+        progress_interval: float = 10.0,
+    ) -> None:
+        self.bot = bot
+        self.guild = guild
+        self.job_id = job["id"]
+        self.channel_id = job["channel_id"]
+        self.message_id = job["message_id"]
+        self.total = job["total"]
+        self.last_registration_id = job["last_registration_id"]
+        self.updated = job["updated"]
+        self.unchanged = job["unchanged"]
+        self.missing = job["missing"]
+        self.failed = job["failed"]
+        self.failures = job["failures"].split("\n") if job["failures"] else []
+        self.failures_length = len(job["failures"])
+        self.status = "running"
+        self.progress_interval = progress_interval
+        self.concurrency = max(1, concurrency)
+        self._reported_at = 0.0
+
+    @property
+    def processed(self) -> int:
+        return self.updated + self.unchanged + self.missing + self.failed
+
+    def record_failure(self, line: str) -> None:
+        self.failed += 1
+        # Only keep the failures that still fit in the summary embed.
+        if self.failures_length + len(line) + 1 <= FAILURES_LIMIT:
+            self.failures.append(line)
+            self.failures_length += len(line) + 1
+
+    async def run(self) -> None:
+        await self.report(force=True)
+        try:
+            async with aclosing(
+                self.bot.database.iter_in_game_names(after_id=self.last_registration_id)
+            ) as chunks:
+                async for rows in chunks:
+                    edits = []
+                    for row in rows:
+                        member = self.plan(row["discord_id"], row["in_game_name"])
+                        if member is not None:
+                            edits.append((member, row["in_game_name"]))
+                    if edits:
+                        pending = iter(edits)
+                        await asyncio.gather(*(self.worker(pending) for _ in range(min(self.concurrency, len(edits)))))
+                    self.last_registration_id = rows[-1]["id"]
+                    await self.checkpoint()
+                    await self.report()
+            self.status = "finished"
+        except asyncio.CancelledError:
+            # The cog is being unloaded: the job stays "running" and is resumed from its checkpoint.
+            raise
+        except Exception as e:
+            self.status = "failed"
+            self.bot.logger.error(f"Nickname sync #{self.job_id} in {self.guild} failed: {e}")
+        await self.checkpoint()
+        await self.report(force=True)
+
+    def plan(self, discord_id: int, in_game_name: str) -> Optional[Member]:
+        """
+        Settles the registrations that need no request and returns the member to edit otherwise.
+        """
+        member = self.guild.get_member(discord_id)
+        if member is None:
+            self.missing += 1
+            return None
+        if member.nick == in_game_name:
+            self.unchanged += 1
+            return None
+        if member.id == self.guild.owner_id or member.top_role >= self.guild.me.top_role:
+            self.record_failure(f"{member.mention} (above the bot's role)")
+            return None
+        return member
+
+    async def worker(self, edits: Iterator[Tuple[Member, str]]) -> None:
+        for member, in_game_name in edits:
+            await self.edit(member, in_game_name)
+
+    async def edit(self, member: Member, in_game_name: str) -> None:
+        for attempt in range(EDIT_RETRIES):
+            try:
+                await member.edit(nick=in_game_name, reason=f"Nickname sync #{self.job_id}")
+                self.updated += 1
+                return
+            except discord.NotFound:
+                self.missing += 1
+                return
+            except discord.HTTPException as e:
+                retryable = e.status == 429 or e.status >= 500
+                if not retryable or attempt == EDIT_RETRIES - 1:
+                    self.record_failure(f"{member.mention} ({e.text or e.status})")
+                    return
+                retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                await asyncio.sleep(float(retry_after) if retry_after else 2**attempt)
+
+    async def checkpoint(self) -> None:
+        await self.bot.database.checkpoint_nickname_sync(
+            self.job_id,
+            last_registration_id=self.last_registration_id,
+            updated=self.updated,
+            unchanged=self.unchanged,
+            missing=self.missing,
+            failed=self.failed,
+            failures="\n".join(self.failures),
+            status=self.status,
+        )
+
+    def build_embed(self) -> Embed:
+        if self.status == "running":
+            title, color = f"Nickname Sync #{self.job_id} - Running", 0x3498db
+        elif self.status == "finished":
+            title, color = f"Nickname Sync #{self.job_id} - Finished", 0x00FF00
+        else:
+            title, color = f"Nickname Sync #{self.job_id} - Failed", 0xFF0000
+        embed = Embed(
+            title=title,
+            description=f"Processed {self.processed}/{self.total} registration(s).\n"
+            f"✅ Updated: {self.updated}\n"
+            f"➖ Already up to date: {self.unchanged}\n"
+            f"👻 Not in the server: {self.missing}\n"
+            f"❌ Failed: {self.failed}",
+            color=color,
+        )
+        if self.failures:
+            hidden = self.failed - len(self.failures)
+            embed.add_field(
+                name="Failed Updates",
+                value="\n".join(self.failures) + (f"\n… and {hidden} more" if hidden else ""),
+                inline=False,
+            )
+        return embed
+
+    async def report(self, *, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._reported_at < self.progress_interval:
+            return
+        self._reported_at = now
+        channel = self.guild.get_channel(self.channel_id)
+        if channel is None:
+            return
+        try:
+            if self.message_id is None:
+                message = await channel.send(embed=self.build_embed())
+                self.message_id = message.id
+                await self.bot.database.set_nickname_sync_message(self.job_id, message.id)
+            else:
+                await channel.get_partial_message(self.message_id).edit(embed=self.build_embed())
+        except discord.HTTPException as e:
+            self.bot.logger.warning(f"Could not report nickname sync #{self.job_id} progress: {e}")
+
+
 class IGNs(commands.Cog, name="igns"):
     def __init__(self, bot) -> None:
         self.bot = bot
+        # The running nickname sync task of each guild, by guild ID.
+        self.syncs: Dict[int, asyncio.Task] = {}
+        self.apply_config(bot.config)
+        self._resume_task = None
+
+    def apply_config(self, config) -> None:
+        # Read when a sync starts, so a running sync keeps the settings it started with.
+        config = config.get("nickname_sync", {})
+        self.concurrency = config.get("concurrency", 4)
+        self.progress_interval = config.get("progress_interval", 10)
+
+    @commands.Cog.listener()
+    async def on_config_update(self, before, after) -> None:
+        self.apply_config(after)
+
+    async def cog_load(self) -> None:
+        self._resume_task = asyncio.create_task(self.resume_syncs())
+
+    async def cog_unload(self) -> None:
+        if self._resume_task is not None:
+            self._resume_task.cancel()
+        for task in list(self.syncs.values()):
+            task.cancel()
+
+    async def resume_syncs(self) -> None:
+        """
+        Restarts the nickname syncs that were still running when the bot last stopped.
+        """
+        await self.bot.wait_until_ready()
+        if self.bot.database is None:
+            return
+        for job in await self.bot.database.get_running_nickname_syncs():
+            guild = self.bot.get_guild(job["guild_id"])
+            if guild is None or guild.id in self.syncs:
+                continue
+            self.bot.logger.info(
+                f"Resuming nickname sync #{job['id']} in {guild} after registration {job['last_registration_id']}"
+            )
+            self.start_sync(guild, job)
+
+    def start_sync(self, guild: discord.Guild, job: aiosqlite.Row) -> None:
+        sync = NicknameSync(
+            self.bot,
+            guild,
+            job,
+            concurrency=self.concurrency,
+            progress_interval=self.progress_interval,
+        )
+        task = asyncio.create_task(sync.run())
+        self.syncs[guild.id] = task
+        task.add_done_callback(lambda _: self.syncs.pop(guild.id, None))
 
     @app_commands.command(
         name="update_nicknames",
@@ -17,16 +251,12 @@ class IGNs(commands.Cog, name="igns"):
         :param interaction: The application command interaction.
         :param member: The mentioned Discord member to update (optional).
         """
-        try:
-            # Acknowledge the interaction immediately to prevent timeouts
-            await interaction.response.defer()
+        # Acknowledge the interaction immediately to prevent timeouts
+        await interaction.response.defer()
 
-            # Connect to the SQLite database
-            conn = sqlite3.connect("database/database.db")
-            cursor = conn.cursor()
-        except sqlite3.Error as e:
+        if self.bot.database is None:
             embed = Embed(
-                description=f"❌ Failed to connect to the database: {e}",
+                description="❌ The database is not available.",
                 color=0xFF0000,
             )
             await interaction.followup.send(embed=embed)
@@ -34,12 +264,10 @@ class IGNs(commands.Cog, name="igns"):
 
         try:
             if member:
-                # Query for the mentioned user's IGN
-                cursor.execute("SELECT in_game_name FROM user_registration WHERE discord_id = ?", (str(member.id),))
-                row = cursor.fetchone()
+                profile = await self.bot.database.get_profile(member.id)
 
-                if row:
-                    in_game_name = row[0]
+                if profile and profile.in_game_name:
+                    in_game_name = profile.in_game_name
                     try:
                         await member.edit(nick=in_game_name)
                         embed = Embed(
@@ -60,11 +288,8 @@ class IGNs(commands.Cog, name="igns"):
                     )
                     await interaction.followup.send(embed=embed)
             else:
-                # Query for all users with an IGN
-                cursor.execute("SELECT discord_id, in_game_name FROM user_registration WHERE in_game_name IS NOT NULL")
-                rows = cursor.fetchall()
-
-                if not rows:
+                total = await self.bot.database.count_in_game_names()
+                if not total:
                     embed = Embed(
                         description="❌ No users with IGN found in the database.",
                         color=0xFF0000,
@@ -72,43 +297,34 @@ class IGNs(commands.Cog, name="igns"):
                     await interaction.followup.send(embed=embed)
                     return
 
-                successes, failures = 0, 0
-                failed_updates = []
-
-                for discord_id, in_game_name in rows:
-                    member = interaction.guild.get_member(int(discord_id))
-                    if member:
-                        try:
-                            await member.edit(nick=in_game_name)
-                            successes += 1
-                        except Exception as e:
-                            failures += 1
-                            failed_updates.append(f"{member.mention} ({e})")
-                    else:
-                        failures += 1
-                        failed_updates.append(f"User ID {discord_id} (not found in the guild)")
-
-                # Create an embed with a summary of the updates
+                # The sync runs as a background job with its own progress message, since a full
+                # guild can take longer than the interaction token lives.
+                job = await self.bot.database.start_nickname_sync(
+                    interaction.guild.id, interaction.channel.id, interaction.user.id, total
+                )
+                if job is None:
+                    running = await self.bot.database.get_running_nickname_syncs(interaction.guild.id)
+                    job_id = running[0]["id"] if running else "?"
+                    embed = Embed(
+                        description=f"❌ Nickname sync #{job_id} is already running in this server.",
+                        color=0xFF0000,
+                    )
+                    await interaction.followup.send(embed=embed)
+                    return
+
+                self.start_sync(interaction.guild, job)
                 embed = Embed(
-                    title="Nickname Update Summary",
-                    description=f"✅ Successfully updated {successes} nickname(s).\n❌ Failed to update {failures} nickname(s).",
+                    description=f"✅ Started nickname sync #{job['id']} for {total} registration(s). "
+                    "Progress is posted in this channel.",
                     color=0x3498db,
                 )
-                if failed_updates:
-                    embed.add_field(
-                        name="Failed Updates",
-                        value="\n".join(failed_updates),
-                        inline=False,
-                    )
                 await interaction.followup.send(embed=embed)
-        except sqlite3.Error as e:
+        except aiosqlite.Error as e:
             embed = Embed(
                 description=f"❌ Database query error: {e}",
                 color=0xFF0000,
             )
             await interaction.followup.send(embed=embed)
-        finally:
-            conn.close()
 
 async def setup(bot) -> None:
     await bot.add_cog(IGNs(bot))
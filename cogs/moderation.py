@@ -191,11 +191,11 @@ class Moderation(commands.Cog, name="moderation"):
         member = context.guild.get_member(user.id) or await context.guild.fetch_member(
             user.id
         )
-        total = await self.bot.database.add_warn(
+        warn_id, total = await self.bot.database.add_warn(
             user.id, context.guild.id, context.author.id, reason
         )
         embed = discord.Embed(
-            description=f"**{member}** was warned by **{context.author}**!\nTotal warns for this user: {total}",
+            description=f"**{member}** was warned by **{context.author}**! (Warn ID #{warn_id})\nTotal warns for this user: {total}",
             color=0xBEBEFE,
         )
         embed.add_field(name="Reason:", value=reason)
@@ -280,7 +280,13 @@ class Moderation(commands.Cog, name="moderation"):
         await context.send(
             "Deleting messages..."
         )  # Bit of a hacky way to make sure the bot responds to the interaction and doens't get a "Unknown Interaction" response
-        purged_messages = await context.channel.purge(limit=amount + 1)
+        # The message logs turn the whole purge into a single transcript, see `MessageLogger.on_purge_end`.
+        self.bot.dispatch("purge_begin", context.channel)
+        purged_messages = None
+        try:
+            purged_messages = await context.channel.purge(limit=amount + 1)
+        finally:
+            self.bot.dispatch("purge_end", context.channel, context.author, purged_messages)
         embed = discord.Embed(
             description=f"**{context.author}** cleared **{len(purged_messages)-1}** messages!",
             color=0xBEBEFE,
@@ -0,0 +1,297 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import discord
+from discord.ext import commands
+from discord.ext.commands import Context
+
+WELCOME_IMAGE_URL = "https://cdn.discordapp.com/attachments/1314433772145475597/1325366726547738704/kids.gif?ex=677b8773&is=677a35f3&hm=26d9d3137e058f91853785dfaffbf4ce7d87ee8cf4f88d43f8c68b46870ab056&"
+# Room left in an embed description for the mentions of a coalesced welcome.
+WELCOME_MENTIONS_LIMIT = 3900
+# Seconds of join history kept per guild; the longest window any counter can be asked about.
+JOIN_HISTORY = 60
+
+
+class JoinRateCounter:
+    """
+    Joins per second over the last `size` seconds, in a ring of one-second buckets, so the memory
+    used per guild stays the same however many members join.
+    """
+
+    __slots__ = ("size", "total", "_counts", "_seconds")
+
+    def __init__(self, size: int = JOIN_HISTORY) -> None:
+        self.size = size
+        self.total = 0
+        self._counts = [0] * size
+        self._seconds = [-1] * size
+
+    def record(self, now: float) -> None:
+        second = int(now)
+        index = second % self.size
+        if self._seconds[index] != second:
+            self._seconds[index] = second
+            self._counts[index] = 0
+        self._counts[index] += 1
+        self.total += 1
+
+    def count(self, now: float, seconds: float) -> int:
+        """
+        :return: The number of joins in the last `seconds` seconds, at a one-second resolution.
+        """
+        oldest = int(now) - min(int(seconds), self.size) + 1
+        return sum(count for count, second in zip(self._counts, self._seconds) if second >= oldest)
+
+
+class GuildJoinState:
+    """
+    The join counter of a guild and whether it is in raid (degraded) mode.
+    """
+
+    __slots__ = ("counter", "degraded", "degraded_since", "last_spike", "peak", "raids", "deferred")
+
+    def __init__(self) -> None:
+        self.counter = JoinRateCounter()
+        self.degraded = False
+        self.degraded_since = 0.0
+        self.last_spike = 0.0
+        # The most joins seen within one raid window.
+        self.peak = 0
+        self.raids = 0
+        self.deferred = 0
+
+
+class Onboarding(commands.Cog, name="onboarding"):
+    """
+    The single `on_member_join` handler: gives new members their onboarding roles in one request
+    and welcomes them, one embed per member normally and one embed per window while joins spike.
+
+    When more than `raid_threshold` members join a guild within `raid_window` seconds, the guild
+    switches to degraded mode: joins are only counted and queued, and the queue is drained at
+    `drain_rate` members per second, skipping anyone who left (or was banned) in the meantime.
+    The guild returns to normal once the rate has stayed at or under half the threshold for
+    `raid_cooldown` seconds.
+    """
+
+    def __init__(self, bot) -> None:
+        self.bot = bot
+        self.apply_config(bot.config)
+        self._joins: Dict[int, GuildJoinState] = {}
+        # Welcomes held back while joins spike, by guild ID.
+        self._pending_welcomes: Dict[int, List[discord.Member]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Members whose onboarding was deferred while a raid was going on, and the tasks draining them,
+        # by guild ID, so a raid in one guild does not slow down the joins of the others.
+        self._deferred: Dict[int, "asyncio.Queue[discord.Member]"] = {}
+        self._drain_tasks: Dict[int, asyncio.Task] = {}
+
+    def apply_config(self, config) -> None:
+        config = config.get("onboarding", {})
+        # More joins than this within `welcome_window` seconds are welcomed together.
+        self.welcome_burst = config.get("welcome_burst", 3)
+        self.welcome_window = config.get("welcome_window", 5.0)
+        self.raid_window = max(1, min(config.get("raid_window", 10), JOIN_HISTORY))
+        self.raid_threshold = config.get("raid_threshold", 10)
+        self.raid_cooldown = config.get("raid_cooldown", 30.0)
+        self.drain_rate = max(config.get("drain_rate", 2.0), 0.1)
+
+    @commands.Cog.listener()
+    async def on_config_update(self, before, after) -> None:
+        self.apply_config(after)
+
+    async def cog_unload(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        for task in self._drain_tasks.values():
+            task.cancel()
+
+    def join_state(self, guild: discord.Guild) -> GuildJoinState:
+        state = self._joins.get(guild.id)
+        if state is None:
+            state = self._joins[guild.id] = GuildJoinState()
+        return state
+
+    def deferred(self, guild: discord.Guild) -> int:
+        """
+        :return: The number of members of the guild whose onboarding is still queued.
+        """
+        queue = self._deferred.get(guild.id)
+        return queue.qsize() if queue is not None else 0
+
+    def update_mode(self, guild: discord.Guild, state: GuildJoinState, now: float) -> None:
+        joins = state.counter.count(now, self.raid_window)
+        state.peak = max(state.peak, joins)
+        if joins > self.raid_threshold:
+            state.last_spike = now
+            if not state.degraded:
+                state.degraded = True
+                state.degraded_since = now
+                state.raids += 1
+                self.bot.logger.warning(
+                    f"Join raid detected in {guild.name}: {joins} joins in {self.raid_window}s, deferring onboarding"
+                )
+        elif state.degraded and joins <= self.raid_threshold // 2 and now - state.last_spike >= self.raid_cooldown:
+            state.degraded = False
+            self.bot.logger.info(
+                f"Join rate in {guild.name} is back to normal after {now - state.degraded_since:.0f}s, "
+                f"{self.deferred(guild)} onboarding(s) still queued"
+            )
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        """Assigns the onboarding roles and welcomes the member, or queues both during a raid."""
+        state = self.join_state(member.guild)
+        now = time.monotonic()
+        state.counter.record(now)
+        self.update_mode(member.guild, state, now)
+        # Keep queueing until the guild's backlog is gone, so members are still onboarded in join order.
+        if state.degraded or self.deferred(member.guild):
+            state.deferred += 1
+            queue = self._deferred.get(member.guild.id)
+            if queue is None:
+                queue = self._deferred[member.guild.id] = asyncio.Queue()
+            queue.put_nowait(member)
+            if member.guild.id not in self._drain_tasks:
+                self._drain_tasks[member.guild.id] = asyncio.create_task(self.drain_deferred(member.guild.id))
+            return
+        await asyncio.gather(self.assign_roles(member), self.welcome(member, state, now))
+
+    async def drain_deferred(self, guild_id: int) -> None:
+        queue = self._deferred[guild_id]
+        try:
+            while not queue.empty():
+                member = queue.get_nowait()
+                self.update_mode(member.guild, self.join_state(member.guild), time.monotonic())
+                current = member.guild.get_member(member.id)
+                if current is None:
+                    # Left or banned while queued.
+                    continue
+                # Members who were given roles while queued (e.g. they already registered) keep them.
+                if len(current.roles) <= 1:
+                    await self.assign_roles(current)
+                self.queue_welcome(current)
+                await asyncio.sleep(1 / self.drain_rate)
+        finally:
+            del self._drain_tasks[guild_id]
+            if queue.empty():
+                del self._deferred[guild_id]
+
+    async def assign_roles(self, member: discord.Member) -> None:
+        roles = self.bot.guild_settings.roles(member.guild, "onboarding_roles")
+        if not roles:
+            return
+        if not member.guild.me.guild_permissions.manage_roles:
+            self.bot.logger.warning(f"Bot does not have the 'Manage Roles' permission to assign roles in {member.guild.name}.")
+            return
+        try:
+            # A single role is one PUT either way; several roles go out as one member edit.
+            await member.add_roles(*roles, reason="Onboarding", atomic=len(roles) == 1)
+            self.bot.logger.info(f"Assigned {', '.join(role.name for role in roles)} to {member.name} ({member.id})")
+        except discord.DiscordException as e:
+            self.bot.logger.error(f"Failed to assign the onboarding roles to {member.name}: {e}")
+
+    async def welcome(self, member: discord.Member, state: GuildJoinState, now: float) -> None:
+        if member.guild.id not in self._pending_welcomes and state.counter.count(now, self.welcome_window) <= self.welcome_burst:
+            await self.send_welcome([member])
+            return
+        # Joins are spiking: hold the welcomes and send them together at the end of the window.
+        self.queue_welcome(member)
+
+    def queue_welcome(self, member: discord.Member) -> None:
+        self._pending_welcomes.setdefault(member.guild.id, []).append(member)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self.flush_welcomes())
+
+    async def flush_welcomes(self) -> None:
+        try:
+            await asyncio.sleep(self.welcome_window)
+        finally:
+            self._flush_task = None
+        pending, self._pending_welcomes = self._pending_welcomes, {}
+        for members in pending.values():
+            await self.send_welcome(members)
+
+    def build_welcome(self, guild: discord.Guild, members: List[discord.Member]) -> discord.Embed:
+        rules = self.bot.guild_settings.channel(guild, "rules_channel")
+        embed = discord.Embed(
+            title="Welcome!",
+            description=(
+                f"Welcome to the family, {', '.join(member.mention for member in members)}! \nWe're glad to have you here."
+                + (f"\nPlease read the rules here: {rules.mention}" if rules else "")
+            ),
+            color=0x2b2d31,
+        )
+        if len(members) == 1:
+            embed.set_thumbnail(url=members[0].avatar.url if members[0].avatar else None)
+        embed.set_image(url=WELCOME_IMAGE_URL)
+        embed.set_footer(text="Enjoy your stay!")
+        return embed
+
+    async def send_welcome(self, members: List[discord.Member]) -> None:
+        guild = members[0].guild
+        channel = self.bot.guild_settings.channel(guild, "welcome_channel")
+        if channel is None:
+            self.bot.logger.warning(f"No welcome channel is set for {guild.name}!")
+            return
+
+        # Split the mentions so each embed stays within the description limit, 10 embeds per message.
+        batches: List[List[discord.Member]] = [[]]
+        length = 0
+        for member in members:
+            if batches[-1] and length + len(member.mention) + 2 > WELCOME_MENTIONS_LIMIT:
+                batches.append([])
+                length = 0
+            batches[-1].append(member)
+            length += len(member.mention) + 2
+        embeds = [self.build_welcome(guild, batch) for batch in batches]
+        try:
+            for start in range(0, len(embeds), 10):
+                await channel.send(embeds=embeds[start:start + 10])
+            self.bot.logger.info(f"Sent welcome message to {channel.name} for {', '.join(member.name for member in members)}")
+        except discord.DiscordException as e:
+            self.bot.logger.error(f"Failed to send welcome message to {channel.name}: {e}")
+
+    @commands.hybrid_command(
+        name="joinstats",
+        description="Shows the live join rate and whether raid mode is on.",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_messages=True)
+    async def joinstats(self, context: Context) -> None:
+        """
+        Shows the live join rate and whether raid mode is on.
+
+        :param context: The hybrid command context.
+        """
+        state = self.join_state(context.guild)
+        now = time.monotonic()
+        self.update_mode(context.guild, state, now)
+        if state.degraded:
+            mode = f"🚨 Raid mode for {now - state.degraded_since:.0f}s, onboarding at {self.drain_rate:g}/s"
+        else:
+            mode = "✅ Normal"
+        embed = discord.Embed(title="Join Statistics", description=mode, color=0xE02B2B if state.degraded else 0xBEBEFE)
+        embed.add_field(
+            name="Join rate",
+            value=(
+                f"{state.counter.count(now, self.raid_window)} in the last {self.raid_window}s\n"
+                f"{state.counter.count(now, JOIN_HISTORY)} in the last {JOIN_HISTORY}s\n"
+                f"Raid threshold: more than {self.raid_threshold} in {self.raid_window}s"
+            ),
+            inline=False,
+        )
+        embed.add_field(
+            name="Since startup",
+            value=(
+                f"{state.counter.total} joins, peak {state.peak} in {self.raid_window}s\n"
+                f"{state.raids} raid(s), {state.deferred} onboarding(s) deferred"
+            ),
+            inline=False,
+        )
+        embed.add_field(name="Queued", value=f"{self.deferred(context.guild)} member(s)", inline=False)
+        await context.send(embed=embed)
+
+
+async def setup(bot) -> None:
+    await bot.add_cog(Onboarding(bot))
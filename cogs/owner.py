@@ -5,40 +5,53 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context
 
+from command_sync import CommandSyncResult, sync_commands
+
 class Owner(commands.Cog, name="owner"):
     def __init__(self, bot) -> None:
         self.bot = bot
 
+    def sync_embed(self, result: CommandSyncResult, action: str, where: str) -> discord.Embed:
+        if not result.synced:
+            return discord.Embed(
+                description=f"Slash commands {where} are already up to date, pass `force` to sync anyway.",
+                color=0xBEBEFE,
+            )
+        embed = discord.Embed(
+            description=f"Slash commands have been {action} {where}.",
+            color=0xBEBEFE,
+        )
+        for label, names in (("Added", result.added), ("Removed", result.removed), ("Changed", result.changed)):
+            if names:
+                embed.add_field(name=label, value=", ".join(f"`{name}`" for name in names)[:1024], inline=False)
+        return embed
+
     @commands.hybrid_command(
         name="sync",
         description="Synchonizes the slash commands.",
     )
-    @app_commands.describe(scope="The scope of the sync. Can be `global` or `guild`")
+    @app_commands.describe(
+        scope="The scope of the sync. Can be `global` or `guild`",
+        force="Sync even if the commands did not change since the last sync",
+    )
     @commands.is_owner()
-    async def sync(self, context: Context, scope: str) -> None:
+    async def sync(self, context: Context, scope: str, force: bool = False) -> None:
         """
-        Synchonizes the slash commands.
+        Synchonizes the slash commands, unless they did not change since they were last synchronized.
 
         :param context: The command context.
         :param scope: The scope of the sync. Can be `global` or `guild`.
+        :param force: Sync even if the commands did not change since the last sync.
         """
 
         if scope == "global":
-            await context.bot.tree.sync()
-            embed = discord.Embed(
-                description="Slash commands have been globally synchronized.",
-                color=0xBEBEFE,
-            )
-            await context.send(embed=embed)
+            result = await sync_commands(context.bot, force=force)
+            await context.send(embed=self.sync_embed(result, "synchronized", "globally"))
             return
         elif scope == "guild":
             context.bot.tree.copy_global_to(guild=context.guild)
-            await context.bot.tree.sync(guild=context.guild)
-            embed = discord.Embed(
-                description="Slash commands have been synchronized in this guild.",
-                color=0xBEBEFE,
-            )
-            await context.send(embed=embed)
+            result = await sync_commands(context.bot, context.guild, force=force)
+            await context.send(embed=self.sync_embed(result, "synchronized", "in this guild"))
             return
         embed = discord.Embed(
             description="The scope must be `global` or `guild`.", color=0xE02B2B
@@ -50,34 +63,28 @@ class Owner(commands.Cog, name="owner"):
         description="Unsynchonizes the slash commands.",
     )
     @app_commands.describe(
-        scope="The scope of the sync. Can be `global`, `current_guild` or `guild`"
+        scope="The scope of the sync. Can be `global`, `current_guild` or `guild`",
+        force="Unsync even if there are no commands synced",
     )
     @commands.is_owner()
-    async def unsync(self, context: Context, scope: str) -> None:
+    async def unsync(self, context: Context, scope: str, force: bool = False) -> None:
         """
         Unsynchonizes the slash commands.
 
         :param context: The command context.
         :param scope: The scope of the sync. Can be `global`, `current_guild` or `guild`.
+        :param force: Unsync even if there are no commands synced.
         """
 
         if scope == "global":
             context.bot.tree.clear_commands(guild=None)
-            await context.bot.tree.sync()
-            embed = discord.Embed(
-                description="Slash commands have been globally unsynchronized.",
-                color=0xBEBEFE,
-            )
-            await context.send(embed=embed)
+            result = await sync_commands(context.bot, force=force)
+            await context.send(embed=self.sync_embed(result, "unsynchronized", "globally"))
             return
         elif scope == "guild":
             context.bot.tree.clear_commands(guild=context.guild)
-            await context.bot.tree.sync(guild=context.guild)
-            embed = discord.Embed(
-                description="Slash commands have been unsynchronized in this guild.",
-                color=0xBEBEFE,
-            )
-            await context.send(embed=embed)
+            result = await sync_commands(context.bot, context.guild, force=force)
+            await context.send(embed=self.sync_embed(result, "unsynchronized", "in this guild"))
             return
         embed = discord.Embed(
             description="The scope must be `global` or `guild`.", color=0xE02B2B
@@ -156,6 +163,72 @@ class Owner(commands.Cog, name="owner"):
         )
         await context.send(embed=embed)
 
+    @commands.hybrid_command(
+        name="dbstats",
+        description="Shows the database pool, profile cache and registration session statistics.",
+    )
+    @commands.is_owner()
+    async def dbstats(self, context: Context) -> None:
+        """
+        Shows the database pool, profile cache and registration session statistics.
+
+        :param context: The hybrid command context.
+        """
+        if self.bot.database is None:
+            embed = discord.Embed(
+                description="The database is not initialized.", color=0xE02B2B
+            )
+            await context.send(embed=embed)
+            return
+        embed = discord.Embed(title="Database Statistics", color=0xBEBEFE)
+        for name, stats in self.bot.database.metrics.snapshot().items():
+            embed.add_field(
+                name=name.replace("_", " ").capitalize(),
+                value=f"{stats['count']} calls\nmean {stats['mean_ms']}ms\nmax {stats['max_ms']}ms",
+                inline=True,
+            )
+        cache = self.bot.database.profiles.stats()
+        embed.add_field(
+            name="Profile cache",
+            value=(
+                f"{cache['size']}/{cache['max_size']} profiles\n"
+                f"{cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%} hit rate)\n"
+                f"{cache['evictions']} evictions, {cache['expirations']} expirations"
+            ),
+            inline=False,
+        )
+        sessions = self.bot.registration_sessions.stats()
+        embed.add_field(
+            name="Registration sessions",
+            value=(
+                f"{sessions['size']}/{sessions['max_size']} sessions\n"
+                f"{sessions['evictions']} evictions, {sessions['expirations']} expirations"
+            ),
+            inline=False,
+        )
+        settings = self.bot.guild_settings.stats()
+        embed.add_field(
+            name="Guild settings",
+            value=(
+                f"{settings['guilds']} guilds, {settings['resolved']} settings resolved\n"
+                f"{settings['hits']} hits, {settings['misses']} misses ({settings['hit_rate']:.0%} hit rate)"
+            ),
+            inline=False,
+        )
+        registration = self.bot.get_cog("registration")
+        if registration is not None:
+            stages = registration.pipeline.snapshot()
+            embed.add_field(
+                name="Registration pipeline",
+                value="\n".join(
+                    f"{stage}: {stats['count']} runs, mean {stats['mean_ms']}ms, max {stats['max_ms']}ms"
+                    for stage, stats in stages.items()
+                )
+                + f"\n{registration.pipeline.failures} failures",
+                inline=False,
+            )
+        await context.send(embed=embed)
+
     @commands.hybrid_command(
         name="shutdown",
         description="Make the bot shutdown.",
@@ -4,8 +4,17 @@ from discord.ext import commands
 from discord.ui import Modal, TextInput, View, Button
 from datetime import datetime, date
 from discord import Embed
-from fuzzywuzzy import process
-import tempfile
+import asyncio
+import heapq
+import time
+from typing import Any, Dict, List, Literal
+
+from database import LatencyStats, export_registrations, parse_games
+
+# Attempts per member edit when Discord answers with a 429 or a 5xx.
+EDIT_RETRIES = 3
+# Discord accepts at most 10 embeds per message.
+LOG_BATCH_SIZE = 10
 
 def calculate_age(birthday: str) -> int:
     """Calculate the age based on the given birthday."""
@@ -13,15 +22,41 @@ def calculate_age(birthday: str) -> int:
     today = date.today()
     return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
 
+def rank_matches(query: str, rows, limit: int = 5):
+    """Score the candidate rows against the query by their real and in-game names, best first."""
+    # Imported on the first search rather than at startup.
+    from rapidfuzz import fuzz, utils
+
+    scored = (
+        (
+            max(
+                fuzz.WRatio(query, row["real_name"], processor=utils.default_process),
+                fuzz.WRatio(query, row["in_game_name"], processor=utils.default_process),
+            ),
+            row,
+        )
+        for row in rows
+    )
+    return heapq.nlargest(limit, scored, key=lambda match: match[0])
+
 class UserListView(View):
-    def __init__(self, bot, rows, page=0, query=None):
+    """Pages through the registrations one query at a time, keeping only the current page."""
+
+    page_size = 5
+
+    def __init__(self, bot, total, rank=None, gender=None, game=None):
         super().__init__(timeout=60)  # The view will time out after 60 seconds.
         self.bot = bot
-        self.rows = rows
-        self.page = page
-        self.query = query
+        self.total = total
+        self.filters = {"rank": rank, "gender": gender, "game": game}
+        self.page = 0
+        self.rows = []
         self.message = None
 
+    @property
+    def page_count(self):
+        return max(1, -(-self.total // self.page_size))
+
     async def on_timeout(self):
         """Disable the buttons when the view times out."""
         for button in self.children:
@@ -29,21 +64,27 @@ class UserListView(View):
         if self.message:
             await self.message.edit(view=self)
 
-    async def update_embed(self, interaction: Interaction):
-        """Paginate the user list."""
-        start = self.page * 5
-        end = start + 5
-        page_rows = self.rows[start:end]
+    async def load(self, after_id=None, before_id=None):
+        """Fetch the page after or before the given registration ID, or the first page. Returns whether it had rows."""
+        rows = await self.bot.database.get_registration_page(
+            after_id=after_id, before_id=before_id, limit=self.page_size, **self.filters
+        )
+        if rows:
+            self.rows = rows
+        return bool(rows)
 
+    def build_embed(self):
+        """Render the current page."""
+        start = self.page * self.page_size
         user_list = [
-            f"{i + 1}. **{row[2]}** (IGN: {row[3]})\n"
-            f"   - Mention: <@{row[1]}>\n"
-            f"   - Gender: {row[9]}\n"
-            f"   - Games: {row[7]}\n"
-            f"   - UUID: {row[5]}\n"
-            f"   - Rank: {row[6]}\n"
-            f"   - Age: {row[8]}"
-            for i, row in enumerate(page_rows)
+            f"{start + i + 1}. **{row['real_name']}** (IGN: {row['in_game_name']})\n"
+            f"   - Mention: <@{row['discord_id']}>\n"
+            f"   - Gender: {row['gender']}\n"
+            f"   - Games: {row['games_played']}\n"
+            f"   - UUID: {row['uuid']}\n"
+            f"   - Rank: {row['current_rank']}\n"
+            f"   - Age: {row['age']}"
+            for i, row in enumerate(self.rows)
         ]
         user_list_str = "\n\n".join(user_list)
 
@@ -52,30 +93,28 @@ class UserListView(View):
             description=user_list_str if user_list else "No users found.",
             color=discord.Color.blue(),
         )
-        embed.set_footer(text=f"Page {self.page + 1} of {len(self.rows) // 5 + (1 if len(self.rows) % 5 != 0 else 0)}")
-
-        # Update the message with the new embed and view
-        if self.message:
-            await self.message.edit(embed=embed, view=self)
+        embed.set_footer(text=f"Page {self.page + 1} of {self.page_count}")
+        return embed
 
     @discord.ui.button(label="Previous", style=discord.ButtonStyle.primary)
-    async def previous_button(self, button: Button, interaction: Interaction):
+    async def previous_button(self, interaction: Interaction, button: Button):
         """Go to the previous page."""
-        if self.page > 0:
+        if self.page > 0 and self.rows and await self.load(before_id=self.rows[0]["id"]):
             self.page -= 1
-            await self.update_embed(interaction)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
 
     @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
-    async def next_button(self, button: Button, interaction: Interaction):
+    async def next_button(self, interaction: Interaction, button: Button):
         """Go to the next page."""
-        if (self.page + 1) * 5 < len(self.rows):
+        if self.page + 1 < self.page_count and self.rows and await self.load(after_id=self.rows[-1]["id"]):
             self.page += 1
-            await self.update_embed(interaction)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
 
     @discord.ui.button(label="Close", style=discord.ButtonStyle.danger)
-    async def close_button(self, button: Button, interaction: Interaction):
+    async def close_button(self, interaction: Interaction, button: Button):
         """Close the view."""
         self.stop()
+        await interaction.response.defer()
         if self.message:
             await self.message.delete()  # Delete the embedded message when closing
             
@@ -103,12 +142,13 @@ class FirstRegistrationModal(discord.ui.Modal, title="Step 1: Basic Information"
     )
 
     async def on_submit(self, interaction: discord.Interaction):
-        # Store the first step's data temporarily
-        interaction.client.registration_data[interaction.user.id] = {
-            "real_name": self.real_name.value,
-            "in_game_name": self.in_game_name.value,
-            "birthday": self.birthday.value,
-        }
+        # Store the first step's data until step 2 is submitted or the session expires
+        await interaction.client.registration_sessions.put(
+            interaction.user.id,
+            real_name=self.real_name.value,
+            in_game_name=self.in_game_name.value,
+            birthday=self.birthday.value,
+        )
 
         await interaction.response.send_message(
             "Step 1 completed. Please use `/continue_register` to proceed to Step 2.",
@@ -145,88 +185,59 @@ class SecondRegistrationModal(discord.ui.Modal, title="Step 2: Additional Inform
         max_length=50,
     )
 
+    def __init__(self, pipeline: "RegistrationPipeline") -> None:
+        super().__init__()
+        self.pipeline = pipeline
+
     async def on_submit(self, interaction: discord.Interaction):
+        started = time.perf_counter()
         # Acknowledge the interaction to avoid timeouts
         await interaction.response.defer(ephemeral=True)
 
         try:
             # Retrieve stored data from step 1
-            data = interaction.client.registration_data.pop(interaction.user.id, {})
+            session = interaction.client.registration_sessions.get(interaction.user.id)
 
-            if not data:
+            if session is None:
                 await interaction.followup.send("You must complete Step 1 first!", ephemeral=True)
                 return
 
             # Add data from step 2
-            data.update({
+            data = {
+                "real_name": session.real_name,
+                "in_game_name": session.in_game_name,
+                "birthday": session.birthday,
                 "gender": self.gender.value,
                 "games_played": self.games_played.value,
                 "uuid": self.uuid.value,
                 "current_rank": self.current_rank.value,
-            })
+            }
 
             # Calculate the user's age
             data["age"] = calculate_age(data["birthday"])
 
             # Insert data into the database
             discord_id = interaction.user.id
-            async with interaction.client.database.execute(
-                """
-                INSERT INTO user_registration (discord_id, real_name, in_game_name, birthday, gender, games_played, uuid, current_rank, age)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    discord_id,
-                    data["real_name"],
-                    data["in_game_name"],
-                    datetime.strptime(data["birthday"], "%Y-%m-%d"),
-                    data["gender"],
-                    data["games_played"],
-                    data["uuid"],
-                    data["current_rank"],
-                    data["age"],
-                ),
-            ) as cursor:
-                await interaction.client.database.commit()
+            await interaction.client.database.upsert_registration(
+                discord_id=discord_id,
+                real_name=data["real_name"],
+                in_game_name=data["in_game_name"],
+                birthday=datetime.strptime(data["birthday"], "%Y-%m-%d"),
+                gender=data["gender"],
+                games=parse_games(data["games_played"]),
+                uuid=data["uuid"],
+                current_rank=data["current_rank"],
+                age=data["age"],
+            )
+            # Only end the session once the registration is stored, so a failed step 2 can be retried
+            await interaction.client.registration_sessions.pop(discord_id)
 
-            # Update user's Discord nickname
-            try:
-                await interaction.user.edit(nick=data["in_game_name"])
-            except discord.Forbidden:
-                await interaction.followup.send("I don't have permission to change your nickname.", ephemeral=True)
-
-            # Assign and remove roles
-            role_to_add = interaction.guild.get_role(1313488099426308156)
-            role_to_remove = interaction.guild.get_role(1314245202990596187)
-            role_to_remove2 = interaction.guild.get_role(1315700246524723292)
-
-            if role_to_add:
-                await interaction.user.add_roles(role_to_add)
-            if role_to_remove:
-                await interaction.user.remove_roles(role_to_remove, role_to_remove2)
-
-            # Send registration details to the log channel
-            channel = interaction.guild.get_channel(1324582941883502634)
-            if channel:
-                embed = Embed(
-                    title="New Registration Completed",
-                    description=f"Registration details for {interaction.user.name}",
-                    color=0x00FF00
-                )
-                embed.add_field(name="Discord ID", value=discord_id, inline=False)
-                embed.add_field(name="Real Name", value=data["real_name"], inline=False)
-                embed.add_field(name="In-Game Name", value=data["in_game_name"], inline=False)
-                embed.add_field(name="Birthday", value=data["birthday"], inline=False)
-                embed.add_field(name="Gender", value=data["gender"], inline=False)
-                embed.add_field(name="Games Played", value=data["games_played"], inline=False)
-                embed.add_field(name="UUID", value=data["uuid"], inline=False)
-                embed.add_field(name="Current Rank", value=data["current_rank"], inline=False)
-                embed.add_field(name="Age", value=data["age"], inline=False)
-
-                await channel.send(embed=embed)
+            # The nickname, roles and log message are applied in the background once the registration is stored
+            self.pipeline.submit(interaction.user, data, started)
 
             # Notify the user of success
-            await interaction.followup.send("Your details have been successfully updated, and your nickname has been updated to your in-game name.", ephemeral=True)
+            await interaction.followup.send("Your details have been successfully saved. Your nickname and roles will be updated in a moment.", ephemeral=True)
+            self.pipeline.stats["confirm"].record(time.perf_counter() - started)
 
         except Exception as e:
             # Log the error and notify the user
@@ -234,28 +245,194 @@ class SecondRegistrationModal(discord.ui.Modal, title="Step 2: Additional Inform
             await interaction.followup.send(f"An error occurred: {e}", ephemeral=True)
 
 
+class RegistrationPipeline:
+    """
+    Applies the Discord side of a stored registration off the user's path.
+
+    Each registration becomes one `member.edit` that sets the nickname and swaps the roles together,
+    retried on a 429 or 5xx. The log embeds are sent by a separate task that batches whatever has
+    queued up, up to 10 embeds per message. The latency of every stage is recorded in `stats`.
+    """
+
+    def __init__(self, bot, *, workers: int = 2) -> None:
+        self.bot = bot
+        self.workers = max(1, workers)
+        self.stats: Dict[str, LatencyStats] = {
+            "confirm": LatencyStats(),
+            "queued": LatencyStats(),
+            "member_edit": LatencyStats(),
+            "log": LatencyStats(),
+            "total": LatencyStats(),
+        }
+        self.failures = 0
+        self._jobs: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._logs: "asyncio.Queue[tuple]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        # The worker tasks by index; a worker whose index is no longer below `workers` exits.
+        self._workers: Dict[int, asyncio.Task] = {}
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._send_logs())]
+        self.resize(self.workers)
+
+    def resize(self, workers: int) -> None:
+        """
+        Change the number of workers. Surplus workers stop once they finish the registration they hold.
+        """
+        self.workers = max(1, workers)
+        for index in range(self.workers):
+            if index not in self._workers or self._workers[index].done():
+                self._workers[index] = task = asyncio.create_task(self._work(index))
+                self._tasks.append(task)
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Give the queued registrations up to `timeout` seconds to be applied, then stop the workers.
+        """
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            self.bot.logger.warning(f"Stopped the registration pipeline with {self._jobs.qsize()} registration(s) still queued")
+        for task in self._tasks:
+            task.cancel()
+
+    async def _drain(self) -> None:
+        # The workers feed the log queue, so it can only be drained once they are done.
+        await self._jobs.join()
+        await self._logs.join()
+
+    def submit(self, member: discord.Member, data: Dict[str, Any], started: float) -> None:
+        """
+        :param member: The member that registered.
+        :param data: The registration, as stored.
+        :param started: The `time.perf_counter()` at which the registration was submitted.
+        """
+        self._jobs.put_nowait((member.guild.id, member.id, data, started, time.perf_counter()))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    async def _work(self, index: int) -> None:
+        while index < self.workers:
+            guild_id, member_id, data, started, queued_at = await self._jobs.get()
+            try:
+                self.stats["queued"].record(time.perf_counter() - queued_at)
+                await self.apply(guild_id, member_id, data, started)
+            except Exception as e:
+                self.failures += 1
+                self.bot.logger.error(f"Error applying the registration of {member_id}: {e}")
+            finally:
+                self._jobs.task_done()
+
+    async def apply(self, guild_id: int, member_id: int, data: Dict[str, Any], started: float) -> None:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            self.failures += 1
+            self.bot.logger.warning(f"Could not apply the registration of {member_id}: the bot is no longer in guild {guild_id}")
+            return
+        try:
+            member = guild.get_member(member_id) or await guild.fetch_member(member_id)
+        except discord.HTTPException as e:
+            # The registration is stored either way, so it is still logged, without the roles.
+            self.failures += 1
+            reason = "they left the server" if isinstance(e, discord.NotFound) else str(e)
+            self.bot.logger.warning(f"Could not update the nickname and roles of {member_id}: {reason}")
+            embed = self.log_embed(member_id, f"<@{member_id}>", data)
+            embed.add_field(name="Roles", value=f"Not applied: {reason}", inline=False)
+            self._logs.put_nowait((guild_id, embed, started))
+            return
+
+        # One request for the nickname and both role changes. The nickname is left alone when the
+        # member ranks above the bot, since Discord would reject the whole edit for it.
+        settings = self.bot.guild_settings
+        unregistered_roles = settings.roles(guild, "unregistered_roles")
+        roles = [role for role in member.roles if not role.is_default() and role not in unregistered_roles]
+        registered_role = settings.role(guild, "registered_role")
+        if registered_role and registered_role not in roles:
+            roles.append(registered_role)
+        changes: Dict[str, Any] = {"roles": roles}
+        if member.id != guild.owner_id and member.top_role < guild.me.top_role:
+            changes["nick"] = data["in_game_name"]
+
+        edit_started = time.perf_counter()
+        for attempt in range(EDIT_RETRIES):
+            try:
+                await member.edit(**changes, reason="Registration completed")
+                break
+            except discord.HTTPException as e:
+                retryable = e.status == 429 or e.status >= 500
+                if not retryable or attempt == EDIT_RETRIES - 1:
+                    self.failures += 1
+                    self.bot.logger.warning(f"Failed to update the nickname and roles of {member}: {e}")
+                    break
+                retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+                await asyncio.sleep(float(retry_after) if retry_after else 2**attempt)
+        self.stats["member_edit"].record(time.perf_counter() - edit_started)
+        self._logs.put_nowait((guild_id, self.log_embed(member.id, member.name, data), started))
+
+    @staticmethod
+    def log_embed(member_id: int, name: str, data: Dict[str, Any]) -> Embed:
+        embed = Embed(
+            title="New Registration Completed",
+            description=f"Registration details for {name}",
+            color=0x00FF00
+        )
+        embed.add_field(name="Discord ID", value=member_id, inline=False)
+        embed.add_field(name="Real Name", value=data["real_name"], inline=False)
+        embed.add_field(name="In-Game Name", value=data["in_game_name"], inline=False)
+        embed.add_field(name="Birthday", value=data["birthday"], inline=False)
+        embed.add_field(name="Gender", value=data["gender"], inline=False)
+        embed.add_field(name="Games Played", value=data["games_played"], inline=False)
+        embed.add_field(name="UUID", value=data["uuid"], inline=False)
+        embed.add_field(name="Current Rank", value=data["current_rank"], inline=False)
+        embed.add_field(name="Age", value=data["age"], inline=False)
+        return embed
+
+    async def _send_logs(self) -> None:
+        while True:
+            batch = [await self._logs.get()]
+            # Take whatever else is already waiting, up to a full message.
+            while len(batch) < LOG_BATCH_SIZE and not self._logs.empty():
+                batch.append(self._logs.get_nowait())
+            try:
+                await self._send_batch(batch)
+            except Exception as e:
+                self.failures += 1
+                self.bot.logger.error(f"Error sending {len(batch)} registration log(s): {e}")
+            finally:
+                for _ in batch:
+                    self._logs.task_done()
+
+    async def _send_batch(self, batch: List[tuple]) -> None:
+        by_guild: Dict[int, List[tuple]] = {}
+        for entry in batch:
+            by_guild.setdefault(entry[0], []).append(entry)
+        for guild_id, entries in by_guild.items():
+            guild = self.bot.get_guild(guild_id)
+            channel = self.bot.guild_settings.channel(guild, "registration_log_channel") if guild else None
+            if channel:
+                log_started = time.perf_counter()
+                await channel.send(embeds=[embed for _, embed, _ in entries])
+                self.stats["log"].record(time.perf_counter() - log_started)
+            finished = time.perf_counter()
+            for _, _, started in entries:
+                self.stats["total"].record(finished - started)
+
+
 class RegistrationCog(commands.Cog, name="registration"):
     def __init__(self, bot):
         self.bot = bot
-        self.bot.registration_data = {}
+        self.pipeline = RegistrationPipeline(bot, workers=bot.config.get("registration_pipeline", {}).get("workers", 2))
+
+    async def cog_load(self) -> None:
+        self.pipeline.start()
 
-    # The function that gets called when a member joins the server
     @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        """Assign a role when a member joins."""
-        role_to_add = member.guild.get_role(1314245202990596187)  # Role ID to add
+    async def on_config_update(self, before, after) -> None:
+        self.pipeline.resize(after.get("registration_pipeline", {}).get("workers", 2))
 
-        if role_to_add:
-            if member.guild.me.guild_permissions.manage_roles:
-                try:
-                    await member.add_roles(role_to_add)
-                    print(f"Assigned role {role_to_add.name} to {member.name}")
-                except discord.DiscordException as e:
-                    print(f"Failed to assign role to {member.name}: {e}")
-            else:
-                print(f"Bot does not have the 'Manage Roles' permission to assign roles in {member.guild.name}.")
-        else:
-            print(f"Role with ID 1314245202990596187 not found in {member.guild.name}.")
+    async def cog_unload(self) -> None:
+        await self.pipeline.stop()
 
     @app_commands.command(name="register", description="Register your details (Step 1).")
     async def register(self, interaction: discord.Interaction):
@@ -266,69 +443,84 @@ class RegistrationCog(commands.Cog, name="registration"):
     @app_commands.command(name="continue_register", description="Continue your registration (Step 2).")
     async def continue_register(self, interaction: discord.Interaction):
         """Starts the second step of the registration process."""
-        if interaction.user.id not in self.bot.registration_data:
+        if interaction.user.id not in self.bot.registration_sessions:
             await interaction.response.send_message(
                 "You must complete Step 1 first using `/register`.", ephemeral=True
             )
             return
 
-        modal = SecondRegistrationModal()
+        modal = SecondRegistrationModal(self.pipeline)
         await interaction.response.send_modal(modal)
     
 
     @commands.has_permissions(manage_messages=True)
     @app_commands.command(name="list_users", description="List all registered users or export all data.")
-    @app_commands.describe(option="Use 'all' to export the entire database as a text file.")
-    async def list_users(self, interaction: discord.Interaction, option: str = None):
+    @app_commands.describe(
+        option="Use 'all' to export the entire database as a file.",
+        export_format="The file format of the export.",
+        rank="Only list users with this rank.",
+        gender="Only list users with this gender.",
+        game="Only list users that play this game.",
+    )
+    async def list_users(
+        self,
+        interaction: discord.Interaction,
+        option: str = None,
+        export_format: Literal["txt", "csv", "jsonl"] = "txt",
+        rank: str = None,
+        gender: str = None,
+        game: str = None,
+    ):
         """List all registered users or export all data."""
         try:
             if option and option.lower() == "all":
                 await interaction.response.send_message("Exporting all user data...", ephemeral=False)
 
-                async with self.bot.database.execute("SELECT * FROM user_registration") as cursor:
-                    rows = await cursor.fetchall()
-
-                if not rows:
-                    await interaction.followup.send("No users are registered yet.", ephemeral=True)
-                    return
-
-                # Create user data text
-                user_data = []
-                for row in rows:
-                    discord_id = row[1]
-                    user = interaction.guild.get_member(int(discord_id))
-                    in_server = "Yes" if user else "No"
-                    user_data.append(f"Name: {row[2]}, IGN: {row[3]}, In Server: {in_server}")
-
-                # Use tempfile to create a temporary file
-                with tempfile.NamedTemporaryFile(delete=False, mode="w", encoding="utf-8", suffix=".txt") as temp_file:
-                    temp_file.write("\n".join(user_data))
-                    temp_file_path = temp_file.name
-
-                # Send the text file
-                await interaction.followup.send(
-                    content="Here is the exported list of all registered users:",
-                    file=discord.File(temp_file_path, filename="user_list.txt"),
+                # Stream the rows straight into an in-memory file, zipped if it is too large to upload
+                member_ids = {member.id for member in interaction.guild.members}
+                export = await export_registrations(
+                    self.bot.database,
+                    member_ids,
+                    export_format,
+                    size_limit=interaction.guild.filesize_limit,
                 )
 
+                try:
+                    if not export.rows:
+                        await interaction.followup.send("No users are registered yet.", ephemeral=True)
+                        return
+
+                    if export.size > interaction.guild.filesize_limit:
+                        await interaction.followup.send(
+                            "The export is too large to upload, even compressed.", ephemeral=True
+                        )
+                        return
+
+                    # Send the file
+                    await interaction.followup.send(
+                        content=f"Here is the exported list of all {export.rows} registered users:",
+                        file=discord.File(export.file, filename=export.filename),
+                    )
+                finally:
+                    export.close()
+
             else:
                 # Default behavior: List users in an embed with pagination
                 await interaction.response.send_message("Loading user list...", ephemeral=False)
 
-                async with self.bot.database.execute("SELECT * FROM user_registration") as cursor:
-                    rows = await cursor.fetchall()
+                total = await self.bot.database.count_registrations(rank=rank, gender=gender, game=game)
 
-                if not rows:
-                    await interaction.followup.send("No users are registered yet.", ephemeral=True)
+                if not total:
+                    message = "No users match these filters." if rank or gender or game else "No users are registered yet."
+                    await interaction.followup.send(message, ephemeral=True)
                     return
 
-                view = UserListView(bot=self.bot, rows=rows)
+                view = UserListView(bot=self.bot, total=total, rank=rank, gender=gender, game=game)
+                await view.load()
                 view.message = await interaction.followup.send(
-                    "Here is the list of registered users:", view=view
+                    "Here is the list of registered users:", embed=view.build_embed(), view=view
                 )
 
-                await view.update_embed(interaction)
-
         except Exception as e:
             await interaction.followup.send(f"An error occurred: {e}", ephemeral=True)
     
@@ -340,12 +532,8 @@ class RegistrationCog(commands.Cog, name="registration"):
         
         try:
             if real_name:
-                # Search for similar names
-                async with self.bot.database.execute(
-                    "SELECT * FROM user_registration WHERE real_name LIKE ?",
-                    (f"%{real_name}%",)
-                ) as cursor:
-                    rows = await cursor.fetchall()
+                # Find candidates in the search index
+                rows = await self.bot.database.search_registrations(real_name)
 
                 if not rows:
                     await interaction.response.send_message(
@@ -358,9 +546,8 @@ class RegistrationCog(commands.Cog, name="registration"):
                     )
                     return
 
-                # Fuzzy matching for similarity scoring
-                all_real_names = [row[2] for row in rows]  # Extract real names
-                matches = process.extract(real_name, all_real_names, limit=5)  # Top 5 matches
+                # Fuzzy matching for similarity scoring, off the event loop
+                matches = await asyncio.to_thread(rank_matches, real_name, rows)
 
                 # Create embed for matched results
                 embed = discord.Embed(
@@ -370,14 +557,12 @@ class RegistrationCog(commands.Cog, name="registration"):
                 )
 
                 # List similar names with age and Discord ID, mention users
-                for match_name, score in matches:
-                    match_row = next(row for row in rows if row[2] == match_name)
-                    discord_id = match_row[1]
+                for score, match_row in matches:
                     embed.add_field(
-                        name=f"Match ({score}% similarity):",
+                        name=f"Match ({round(score)}% similarity):",
                         value=(
-                            f"**Name**: {match_row[2]} | **Age**: {match_row[8]} | "
-                            f"**Mention**: <@{discord_id}>"
+                            f"**Name**: {match_row['real_name']} (IGN: {match_row['in_game_name']}) | "
+                            f"**Age**: {match_row['age']} | **Mention**: <@{match_row['discord_id']}>"
                         ),
                         inline=False,
                     )
@@ -386,13 +571,9 @@ class RegistrationCog(commands.Cog, name="registration"):
                 return
 
             # Default to searching by Discord ID if no real name is provided
-            async with self.bot.database.execute(
-                "SELECT * FROM user_registration WHERE discord_id = ?",
-                (user.id,)
-            ) as cursor:
-                row = await cursor.fetchone()
+            profile = await self.bot.database.get_profile(user.id)
 
-            if row is None:
+            if profile is None:
                 await interaction.response.send_message(
                     embed=discord.Embed(
                         title="No Data Found",
@@ -409,15 +590,15 @@ class RegistrationCog(commands.Cog, name="registration"):
                 description=f"Information for **{user.name}#{user.discriminator}**",
                 color=discord.Color.blue(),
             )
-            embed.add_field(name="User ID", value=row[1])  # Discord ID
-            embed.add_field(name="Real Name", value=row[2])
-            embed.add_field(name="In-Game Name", value=row[3])
-            embed.add_field(name="Birthday", value=row[4])
-            embed.add_field(name="Gender", value=row[9])
-            embed.add_field(name="Games Played", value=row[7])
-            embed.add_field(name="UUID", value=row[5])
-            embed.add_field(name="Rank", value=row[6])
-            embed.add_field(name="Age", value=row[8])
+            embed.add_field(name="User ID", value=profile.discord_id)
+            embed.add_field(name="Real Name", value=profile.real_name)
+            embed.add_field(name="In-Game Name", value=profile.in_game_name)
+            embed.add_field(name="Birthday", value=profile.birthday)
+            embed.add_field(name="Gender", value=profile.gender)
+            embed.add_field(name="Games Played", value=profile.games_played)
+            embed.add_field(name="UUID", value=profile.uuid)
+            embed.add_field(name="Rank", value=profile.current_rank)
+            embed.add_field(name="Age", value=profile.age)
 
             await interaction.response.send_message(embed=embed)
 
@@ -434,13 +615,11 @@ class RegistrationCog(commands.Cog, name="registration"):
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         """Assign the visitor role when a user reacts to a specific message."""
-        # ID of the message to monitor
-        target_message_id = 1321824651357327411  # The ID of the target message
-
-        # ID of the 'visitor' role
-        visitor_role_id = 1315700246524723292  # Role ID for visitor
+        if payload.guild_id is None:
+            return
 
-        # Check if the reaction is on the specific message and if it's not a bot reacting
+        # Check if the reaction is on the guild's visitor message and if it's not a bot reacting
+        target_message_id = self.bot.guild_settings.id(payload.guild_id, "visitor_message")
         if payload.message_id == target_message_id and not payload.user_id == self.bot.user.id:
             # Fetch the guild (server) where the reaction occurred
             guild = self.bot.get_guild(payload.guild_id)
@@ -448,7 +627,7 @@ class RegistrationCog(commands.Cog, name="registration"):
                 return  # Skip if the bot can't find the guild
 
             # Get the 'visitor' role
-            visitor_role = guild.get_role(visitor_role_id)
+            visitor_role = self.bot.guild_settings.role(guild, "visitor_role")
 
             if not visitor_role:
                 print("The 'visitor' role could not be found.")
@@ -468,18 +647,15 @@ class RegistrationCog(commands.Cog, name="registration"):
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
-        # Channel to monitor
-        target_channel_id = 1314245176411033620
-        exempt_message_id = 1316606878880632962
-
         # Ensure the bot doesn't delete its own messages or system messages
-        if message.author == self.bot.user or message.type != discord.MessageType.default:
+        if message.guild is None or message.author == self.bot.user or message.type != discord.MessageType.default:
             return
 
-        # Check if the message is in the target channel
-        if message.channel.id == target_channel_id:
+        # Check if the message is in the guild's command channel
+        settings = self.bot.guild_settings
+        if message.channel.id == settings.id(message.guild.id, "command_channel"):
             # Skip if the message is the exempt one
-            if message.id == exempt_message_id:
+            if message.id == settings.id(message.guild.id, "command_channel_exempt_message"):
                 return
             
             # Allow messages starting with '/' (commands), delete the rest
@@ -20,17 +20,24 @@ class Laro(commands.Cog, name="send_invite"):
 
         await game_lobby_form.wait()
         interaction = game_lobby_form.interaction
+        # Send the game lobby details to the guild's lobby channel
+        channel = self.bot.guild_settings.channel(interaction.guild, "lobby_channel") if interaction.guild else None
+        if channel is None:
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    description="No lobby channel is set for this server.",
+                    color=0xE02B2B,
+                ),
+                ephemeral=True,
+            )
+            return
         await interaction.response.send_message(
             embed=discord.Embed(
-                description="Successfully Sent the Invite Link to <#1321770764839686176>",
+                description=f"Successfully Sent the Invite Link to {channel.mention}",
                 color=0xBEBEFE,
             )
         )
 
-        # Send the game lobby details to a specific channel (replace with your desired channel ID)
-        channel_id = 1321770764839686176
-        channel = self.bot.get_channel(channel_id)
-
         if channel:
             # Fetch user data from the database (including UUID)
             user_data = await self.get_user_data(interaction.user.id)
@@ -50,7 +57,7 @@ class Laro(commands.Cog, name="send_invite"):
             )
 
             # Mention the role
-            role = interaction.guild.get_role(1313488099426308156)
+            role = self.bot.guild_settings.role(interaction.guild, "lobby_role")
             if role:
                 embed.description += f"\n{role.mention}"
 
@@ -59,22 +66,18 @@ class Laro(commands.Cog, name="send_invite"):
     async def get_user_data(self, discord_id: int) -> dict:
         """Fetch user data from the database using Discord ID."""
         try:
-            # Query the database for user data associated with the given discord_id
-            async with self.bot.database.execute(
-                "SELECT uuid, real_name, in_game_name, birthday, gender, current_rank FROM user_registration WHERE discord_id = ?",
-                (str(discord_id),)  # Ensure discord_id is passed as a string
-            ) as cursor:
-                row = await cursor.fetchone()
+            # Look the profile up, served from the profile cache when it is hot
+            profile = await self.bot.database.get_profile(discord_id)
 
-            if row:
+            if profile:
                 # Return user data as a dictionary
                 return {
-                    "uuid": row[0],  # UUID
-                    "real_name": row[1],  # Real name
-                    "in_game_name": row[2],  # In-game name
-                    "birthday": row[3],  # Birthday
-                    "gender": row[4],  # Gender
-                    "current_rank": row[5]  # Current rank
+                    "uuid": profile.uuid,
+                    "real_name": profile.real_name,
+                    "in_game_name": profile.in_game_name,
+                    "birthday": profile.birthday,
+                    "gender": profile.gender,
+                    "current_rank": profile.current_rank,
                 }
             else:
                 return None  # No data found for this Discord ID
@@ -0,0 +1,142 @@
+import re
+from typing import List
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord.ext.commands import Context
+
+from database import SETTINGS
+
+SNOWFLAKE = re.compile(r"\d{15,20}")
+
+
+class Settings(commands.Cog, name="settings"):
+    def __init__(self, bot) -> None:
+        self.bot = bot
+
+    def describe(self, guild: discord.Guild, name: str) -> str:
+        setting = SETTINGS[name]
+        ids = self.bot.guild_settings.ids(guild.id, name)
+        if not ids:
+            return "Not set"
+        if setting.kind == "role":
+            return ", ".join(f"<@&{target_id}>" for target_id in ids)
+        if setting.kind == "channel":
+            return ", ".join(f"<#{target_id}>" for target_id in ids)
+        return ", ".join(f"`{target_id}`" for target_id in ids)
+
+    async def setting_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in SETTINGS
+            if current.lower() in name
+        ][:25]
+
+    @commands.hybrid_group(
+        name="settings",
+        description="Shows or changes the roles and channels the bot uses in this server.",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def settings(self, context: Context) -> None:
+        """
+        Shows the roles and channels the bot uses in this server.
+
+        :param context: The hybrid command context.
+        """
+        if context.invoked_subcommand is None:
+            await self.settings_show(context)
+
+    @settings.command(
+        name="show",
+        description="Shows the roles and channels the bot uses in this server.",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def settings_show(self, context: Context) -> None:
+        """
+        Shows the roles and channels the bot uses in this server.
+
+        :param context: The hybrid command context.
+        """
+        embed = discord.Embed(title=f"Settings of {context.guild.name}", color=0xBEBEFE)
+        for name, setting in SETTINGS.items():
+            embed.add_field(name=name, value=f"{self.describe(context.guild, name)}\n*{setting.description}*", inline=False)
+        await context.send(embed=embed)
+
+    @settings.command(
+        name="set",
+        description="Sets the role(s), channel(s) or message a setting points at.",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.describe(
+        name="The setting to change.",
+        value="The role or channel mentions or IDs, or the message ID.",
+    )
+    @app_commands.autocomplete(name=setting_autocomplete)
+    async def settings_set(self, context: Context, name: str, *, value: str) -> None:
+        """
+        Sets the role(s), channel(s) or message a setting points at.
+
+        :param context: The hybrid command context.
+        :param name: The setting to change.
+        :param value: The role or channel mentions or IDs, or the message ID.
+        """
+        setting = SETTINGS.get(name)
+        if setting is None:
+            embed = discord.Embed(
+                description=f"There is no setting named `{name}`.", color=0xE02B2B
+            )
+            await context.send(embed=embed)
+            return
+        target_ids = [int(target_id) for target_id in SNOWFLAKE.findall(value)]
+        lookup = {"role": context.guild.get_role, "channel": context.guild.get_channel}.get(setting.kind)
+        unknown = [target_id for target_id in target_ids if lookup and lookup(target_id) is None]
+        if not target_ids or unknown:
+            embed = discord.Embed(
+                description=f"`{value}` is not a {setting.kind} of this server.", color=0xE02B2B
+            )
+            await context.send(embed=embed)
+            return
+        try:
+            await self.bot.guild_settings.set(context.guild.id, name, target_ids)
+        except ValueError as e:
+            embed = discord.Embed(description=str(e), color=0xE02B2B)
+            await context.send(embed=embed)
+            return
+        embed = discord.Embed(
+            description=f"`{name}` is now {self.describe(context.guild, name)}.",
+            color=0xBEBEFE,
+        )
+        await context.send(embed=embed)
+
+    @settings.command(
+        name="clear",
+        description="Clears a setting.",
+    )
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.describe(name="The setting to clear.")
+    @app_commands.autocomplete(name=setting_autocomplete)
+    async def settings_clear(self, context: Context, name: str) -> None:
+        """
+        Clears a setting.
+
+        :param context: The hybrid command context.
+        :param name: The setting to clear.
+        """
+        if name not in SETTINGS:
+            embed = discord.Embed(
+                description=f"There is no setting named `{name}`.", color=0xE02B2B
+            )
+            await context.send(embed=embed)
+            return
+        await self.bot.guild_settings.set(context.guild.id, name, [])
+        embed = discord.Embed(description=f"`{name}` has been cleared.", color=0xBEBEFE)
+        await context.send(embed=embed)
+
+
+async def setup(bot) -> None:
+    await bot.add_cog(Settings(bot))
@@ -0,0 +1,106 @@
+"""
+Description:
+🐍 Syncs the application command tree only when it changed since the last sync to the same scope.
+
+Version: 6.2.0
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+
+def _digest(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def command_hashes(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> Dict[str, str]:
+    """
+    :return: The hash of the payload Discord would receive for each command of the scope, by command name.
+        Context menus are suffixed with their type, since they may share a name with a slash command.
+    """
+    hashes = {}
+    for command in tree.get_commands(guild=guild):
+        payload = command.to_dict(tree)
+        name = command.name
+        if isinstance(command, app_commands.ContextMenu):
+            name = f"{name} ({command.type.name} menu)"
+        hashes[name] = _digest(payload)
+    return hashes
+
+
+def tree_hash(hashes: Dict[str, str]) -> str:
+    return _digest(hashes)
+
+
+class CommandSyncResult:
+    """
+    What a sync did, or would have done, to a scope.
+    """
+
+    __slots__ = ("scope", "synced", "added", "removed", "changed", "tree_hash")
+
+    def __init__(
+        self,
+        scope: str,
+        synced: bool,
+        added: List[str],
+        removed: List[str],
+        changed: List[str],
+        tree_hash: str,
+    ) -> None:
+        self.scope = scope
+        self.synced = synced
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.tree_hash = tree_hash
+
+    def __str__(self) -> str:
+        if not self.synced:
+            return f"Commands ({self.scope}) are up to date"
+        changes = [
+            f"{label}: {', '.join(names)}"
+            for label, names in (("added", self.added), ("removed", self.removed), ("changed", self.changed))
+            if names
+        ]
+        return f"Synced commands ({self.scope})" + (f", {'; '.join(changes)}" if changes else ", nothing changed")
+
+
+async def sync_commands(
+    bot, guild: Optional[discord.abc.Snowflake] = None, *, force: bool = False
+) -> CommandSyncResult:
+    """
+    Sync the commands of a scope when their hash differs from the one last synced, or when forced.
+    Without a database, every call syncs.
+
+    :param bot: The bot whose command tree is synced.
+    :param guild: The guild to sync, or None for the global commands.
+    :param force: Sync even if nothing changed.
+    """
+    scope = f"guild:{guild.id}" if guild is not None else "global"
+    loader = getattr(bot, "cog_loader", None)
+    if loader is not None and loader.pending:
+        # The tree has to be complete, or the sync would remove the commands of the lazy cogs.
+        await loader.load_pending()
+    hashes = command_hashes(bot.tree, guild)
+    current = tree_hash(hashes)
+    previous: Dict[str, str] = {}
+    previous_hash = None
+    if bot.database is not None:
+        row = await bot.database.get_command_sync(scope)
+        if row is not None:
+            previous_hash = row["tree_hash"]
+            previous = json.loads(row["command_hashes"])
+    added = sorted(set(hashes) - set(previous))
+    removed = sorted(set(previous) - set(hashes))
+    changed = sorted(name for name in set(hashes) & set(previous) if hashes[name] != previous[name])
+    if previous_hash == current and not force:
+        return CommandSyncResult(scope, False, added, removed, changed, current)
+    await bot.tree.sync(guild=guild)
+    if bot.database is not None:
+        await bot.database.save_command_sync(scope, current, json.dumps(hashes, sort_keys=True))
+    return CommandSyncResult(scope, True, added, removed, changed, current)
@@ -0,0 +1,221 @@
+"""
+Description:
+🐍 Loads `config.json` into a read-only, validated `Config` and notices when the file changes.
+
+Version: 6.2.0
+"""
+
+import json
+import os
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# The type of every known key; a nested dict is a section. Keys that are not listed are kept
+# as they are, so a cog can add its own section before it is described here.
+SCHEMA: Dict[str, Any] = {
+    "prefix": str,
+    "invite_link": str,
+    "home_guild_id": int,
+    "config_watch_interval": (int, float),
+    "database": {
+        "readers": int,
+        "profile_cache_size": int,
+        "profile_cache_ttl": (int, float),
+    },
+    "nickname_sync": {
+        "concurrency": int,
+        "progress_interval": (int, float),
+    },
+    "registration_sessions": {
+        "ttl": (int, float),
+        "max_size": int,
+        "persist": bool,
+    },
+    "registration_pipeline": {
+        "workers": int,
+    },
+    "onboarding": {
+        "welcome_burst": int,
+        "welcome_window": (int, float),
+        "raid_window": int,
+        "raid_threshold": int,
+        "raid_cooldown": (int, float),
+        "drain_rate": (int, float),
+    },
+    "log_sink": {
+        "batch_size": int,
+        "flush_interval": (int, float),
+        "max_queue": int,
+        "sample_above": (int, float),
+        "sample_every": int,
+        "forward_level": str,
+        "forward_queue": int,
+        "coalesce_window": (int, float),
+    },
+    "message_store": {
+        "max_messages": int,
+        "max_bytes": int,
+        "retention": (int, float),
+    },
+    "audit_log": {
+        "max_age": (int, float),
+        "wait": (int, float),
+        "fetch_limit": int,
+    },
+}
+REQUIRED = ("prefix", "invite_link")
+
+
+class ConfigError(ValueError):
+    """
+    The configuration is not valid JSON or does not match `SCHEMA`.
+    """
+
+
+class Config(Mapping):
+    """
+    A read-only JSON object: sections are `Config`s too and lists become tuples. A new `Config` is
+    built for every change and swapped in whole, so readers never see a half-applied one.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Mapping) -> None:
+        object.__setattr__(self, "_data", {key: _freeze(value) for key, value in data.items()})
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Config is read-only")
+
+    def __repr__(self) -> str:
+        return f"Config({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: _thaw(value) for key, value in self._data.items()}
+
+    def replace(self, **sections: Any) -> "Config":
+        """
+        :return: A copy in which the given sections are merged into (or keys replaced by) the values given.
+        """
+        data = self.to_dict()
+        for key, value in sections.items():
+            if isinstance(value, Mapping) and isinstance(data.get(key), dict):
+                data[key] = {**data[key], **value}
+            else:
+                data[key] = value
+        return Config(data)
+
+    def changed_keys(self, other: "Config") -> List[str]:
+        """
+        :return: The top-level keys whose value differs between the two configs.
+        """
+        return sorted(key for key in set(self) | set(other) if self.get(key) != other.get(key))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return Config(value)
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Config):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def validate(data: Any, schema: Dict[str, Any] = SCHEMA, path: str = "") -> List[str]:
+    """
+    Check a parsed configuration against a schema.
+
+    :return: Every problem found, empty when the configuration is valid.
+    """
+    if not isinstance(data, dict):
+        return [f"{path.rstrip('.') or 'config'} must be an object"]
+    problems = []
+    if not path:
+        problems.extend(f"{key} is required" for key in REQUIRED if key not in data)
+    for key, expected in schema.items():
+        if key not in data:
+            continue
+        name = f"{path}{key}"
+        value = data[key]
+        if isinstance(expected, dict):
+            problems.extend(validate(value, expected, f"{name}."))
+            continue
+        types = expected if isinstance(expected, tuple) else (expected,)
+        # JSON booleans are ints to Python, but never a valid number here.
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            problems.append(f"{name} must be {' or '.join(kind.__name__ for kind in types)}, not {type(value).__name__}")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and value < 0:
+            problems.append(f"{name} must not be negative")
+    return problems
+
+
+def load_config(path: str) -> Config:
+    """
+    Read, validate and freeze a configuration file.
+
+    :raises ConfigError: The file is not valid JSON or does not match `SCHEMA`.
+    """
+    with open(path, encoding="utf-8") as file:
+        try:
+            data = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ConfigError(f"{os.path.basename(path)} is not valid JSON: {e}") from e
+    problems = validate(data)
+    if problems:
+        raise ConfigError(f"{os.path.basename(path)} is not valid: " + "; ".join(problems))
+    return Config(data)
+
+
+class ConfigWatcher:
+    """
+    Polls a configuration file and reloads it whenever its modification time or size changes.
+    Polling a single `stat()` every few seconds costs nothing and works on every platform.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.reloads = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._signature = self._stat()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self) -> Optional[Config]:
+        """
+        :return: The new configuration if the file changed since the last poll, otherwise None.
+        :raises ConfigError: The file changed but is not valid; it is not retried until it changes again.
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        try:
+            config = load_config(self.path)
+        except (OSError, ConfigError) as e:
+            self.errors += 1
+            self.last_error = str(e)
+            raise ConfigError(str(e)) from e
+        self.reloads += 1
+        self.last_error = None
+        return config
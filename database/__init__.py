@@ -6,44 +6,660 @@ Description:
 Version: 6.2.0
 """
 
+import math
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
 import aiosqlite
 
+from database.cache import Profile, ProfileCache
+from database.export import EXPORT_FORMATS, ExportResult, export_registrations
+from database.guild_settings import SETTINGS, GuildSettings, Setting
+from database.messages import MessageStore, StoredMessage
+from database.migrator import Migration, MigrationResult, MigrationRunner
+from database.pool import ConnectionPool, LatencyStats, PoolMetrics
+from database.sessions import RegistrationSession, SessionStore
+
+__all__ = [
+    "EXPORT_FORMATS",
+    "SETTINGS",
+    "ConnectionPool",
+    "DatabaseManager",
+    "ExportResult",
+    "GuildSettings",
+    "LatencyStats",
+    "MessageStore",
+    "Migration",
+    "MigrationResult",
+    "MigrationRunner",
+    "PoolMetrics",
+    "Profile",
+    "ProfileCache",
+    "RegistrationSession",
+    "SessionStore",
+    "Setting",
+    "StoredMessage",
+    "export_registrations",
+    "parse_games",
+]
+
+# Columns of `user_registration` that the edit commands are allowed to change.
+REGISTRATION_EDITABLE_FIELDS = (
+    "gender",
+    "games_played",
+    "uuid",
+    "current_rank",
+    "in_game_name",
+)
+
+# The registration columns in their original order, with the games folded back into a
+# comma-separated `games_played` column so rows read the same as before `user_games` existed.
+REGISTRATION_COLUMNS = """
+    r.id, r.discord_id, r.real_name, r.in_game_name, r.birthday, r.uuid, r.current_rank,
+    (
+        SELECT group_concat(game, ', ') FROM (
+            SELECT game FROM user_games WHERE discord_id = r.discord_id ORDER BY position
+        )
+    ) AS games_played,
+    r.age, r.gender, r.registration_time
+"""
+
+# A search first looks for the registrations containing the query's `SEARCH_TRIGRAMS` rarest
+# trigrams. When fewer than `SEARCH_WIDEN_BELOW` do, it is widened to registrations sharing any
+# of its rarest trigrams, ranked by the summed rarity of the trigrams they share. The widening
+# stops adding trigrams once they hold `SEARCH_WIDEN_POSTINGS` registrations between them, but
+# always uses at least `SEARCH_WIDEN_MIN_TRIGRAMS` of them.
+SEARCH_WIDEN_BELOW = 5
+SEARCH_TRIGRAMS = 6
+SEARCH_WIDEN_POSTINGS = 15000
+SEARCH_WIDEN_MIN_TRIGRAMS = 3
+
+
+def quote_term(term: str) -> str:
+    """
+    :return: The term as an FTS5 string, so its characters are matched literally.
+    """
+    return '"' + term.replace('"', '""') + '"'
+
+
+def widening_trigrams(counts: Sequence[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """
+    :param counts: The query's trigrams with their registration counts, rarest first.
+    :return: The trigrams to widen a search with, within `SEARCH_WIDEN_POSTINGS`.
+    """
+    selected = []
+    postings = 0
+    for term, count in counts[:SEARCH_TRIGRAMS]:
+        if len(selected) >= SEARCH_WIDEN_MIN_TRIGRAMS and postings + count > SEARCH_WIDEN_POSTINGS:
+            break
+        selected.append((term, count))
+        postings += count
+    return selected
+
+
+def parse_games(games_played: str) -> List[str]:
+    """
+    Split the comma-separated games a user typed into a list, dropping blanks and repeats.
+
+    :param games_played: The games, separated by commas.
+    """
+    games = []
+    seen = set()
+    for game in games_played.split(","):
+        game = game.strip()
+        if game and game.casefold() not in seen:
+            seen.add(game.casefold())
+            games.append(game)
+    return games
+
 
 class DatabaseManager:
-    def __init__(self, *, connection: aiosqlite.Connection) -> None:
-        self.connection = connection
+    def __init__(
+        self, *, pool: ConnectionPool, profiles: Optional[ProfileCache] = None
+    ) -> None:
+        self.pool = pool
+        self.profiles = profiles if profiles is not None else ProfileCache()
+        # Registration counts per `/list_users` filter, dropped on every registration write.
+        # Every write bumps the generation, so a count read across a write is not cached.
+        self._registration_counts: Dict[Tuple[Optional[str], ...], int] = {}
+        self._registration_generation = 0
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        return self.pool.metrics
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def fetchone(
+        self, query: str, parameters: Iterable[Any] = ()
+    ) -> Optional[aiosqlite.Row]:
+        """
+        Run a read query on a pooled reader and return its first row.
+
+        :param query: The SQL query.
+        :param parameters: The parameters bound to the query.
+        """
+        async with self.pool.reader() as connection:
+            started = time.perf_counter()
+            async with connection.execute(query, tuple(parameters)) as cursor:
+                row = await cursor.fetchone()
+            self.metrics.read_query.record(time.perf_counter() - started)
+            return row
+
+    async def fetchall(
+        self, query: str, parameters: Iterable[Any] = ()
+    ) -> List[aiosqlite.Row]:
+        """
+        Run a read query on a pooled reader and return all of its rows.
+
+        :param query: The SQL query.
+        :param parameters: The parameters bound to the query.
+        """
+        async with self.pool.reader() as connection:
+            started = time.perf_counter()
+            async with connection.execute(query, tuple(parameters)) as cursor:
+                rows = await cursor.fetchall()
+            self.metrics.read_query.record(time.perf_counter() - started)
+            return list(rows)
+
+    async def iterate_chunks(
+        self, query: str, parameters: Iterable[Any] = (), *, chunk_size: int = 500
+    ) -> AsyncIterator[List[aiosqlite.Row]]:
+        """
+        Stream the rows of a read query in chunks instead of loading them all at once.
+        The reader stays borrowed until the iteration finishes, so consume it inside
+        `contextlib.aclosing()` when it may be abandoned early.
+
+        :param query: The SQL query.
+        :param parameters: The parameters bound to the query.
+        :param chunk_size: The number of rows fetched from the cursor at a time.
+        """
+        async with self.pool.reader() as connection:
+            started = time.perf_counter()
+            async with connection.execute(query, tuple(parameters)) as cursor:
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield list(rows)
+            self.metrics.read_query.record(time.perf_counter() - started)
+
+    async def iterate(
+        self, query: str, parameters: Iterable[Any] = (), *, chunk_size: int = 500
+    ) -> AsyncIterator[aiosqlite.Row]:
+        """
+        Like `iterate_chunks`, one row at a time.
+
+        :param query: The SQL query.
+        :param parameters: The parameters bound to the query.
+        :param chunk_size: The number of rows fetched from the cursor at a time.
+        """
+        async with aclosing(
+            self.iterate_chunks(query, parameters, chunk_size=chunk_size)
+        ) as chunks:
+            async for rows in chunks:
+                for row in rows:
+                    yield row
+
+    async def execute(self, query: str, parameters: Iterable[Any] = ()) -> int:
+        """
+        Run a write query on the writer and commit it.
+
+        :param query: The SQL query.
+        :param parameters: The parameters bound to the query.
+        :return: The number of rows changed by the query.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            async with connection.execute(query, tuple(parameters)) as cursor:
+                rowcount = cursor.rowcount
+            self.metrics.write_query.record(time.perf_counter() - started)
+            return rowcount
+
+    async def insert(self, query: str, parameters: Iterable[Any] = ()) -> int:
+        """
+        Run an INSERT on the writer and commit it.
+
+        :param query: The SQL query.
+        :param parameters: The parameters bound to the query.
+        :return: The row ID of the inserted row.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            async with connection.execute(query, tuple(parameters)) as cursor:
+                row_id = cursor.lastrowid
+            self.metrics.write_query.record(time.perf_counter() - started)
+            return row_id
+
+    async def executemany(
+        self, query: str, parameters: Iterable[Sequence[Any]]
+    ) -> None:
+        """
+        Run a write query once per parameter set in a single transaction.
+
+        :param query: The SQL query.
+        :param parameters: The parameter sets bound to the query.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            await connection.executemany(query, parameters)
+            self.metrics.write_query.record(time.perf_counter() - started)
+
+    async def migrate(
+        self, runner: MigrationRunner, *, dry_run: bool = False
+    ) -> List[MigrationResult]:
+        """
+        Bring the schema up to date while holding the writer.
+
+        :param runner: The migration runner to apply.
+        :param dry_run: Only check the pending migrations against a copy of the database.
+        """
+        async with self.pool.writer() as connection:
+            return await runner.run(connection, dry_run=dry_run)
+
+    async def upsert_registration(
+        self,
+        discord_id: int,
+        real_name: str,
+        in_game_name: str,
+        birthday: Any,
+        gender: str,
+        games: Sequence[str],
+        uuid: str,
+        current_rank: str,
+        age: int,
+    ) -> int:
+        """
+        This function will store a completed registration, replacing the user's previous one if they register again.
+
+        :param discord_id: The ID of the user that registered.
+        :param games: The games the user plays, in the order they gave them.
+        :return: The ID of the registration row.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            async with connection.execute(
+                """
+                INSERT INTO user_registration (discord_id, real_name, in_game_name, birthday, gender, uuid, current_rank, age)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (discord_id) DO UPDATE SET
+                    real_name = excluded.real_name,
+                    in_game_name = excluded.in_game_name,
+                    birthday = excluded.birthday,
+                    gender = excluded.gender,
+                    uuid = excluded.uuid,
+                    current_rank = excluded.current_rank,
+                    age = excluded.age,
+                    registration_time = CURRENT_TIMESTAMP
+                RETURNING id
+                """,
+                (
+                    discord_id,
+                    real_name,
+                    in_game_name,
+                    birthday,
+                    gender,
+                    uuid,
+                    current_rank,
+                    age,
+                ),
+            ) as cursor:
+                (registration_id,) = await cursor.fetchone()
+            await self._replace_games(connection, discord_id, games)
+            self.metrics.write_query.record(time.perf_counter() - started)
+        self._registration_changed(discord_id)
+        return registration_id
+
+    async def _replace_games(
+        self, connection: aiosqlite.Connection, discord_id: int, games: Sequence[str]
+    ) -> None:
+        await connection.execute("DELETE FROM user_games WHERE discord_id = ?", (discord_id,))
+        await connection.executemany(
+            "INSERT OR IGNORE INTO user_games (discord_id, game, position) VALUES (?, ?, ?)",
+            [(discord_id, game, position) for position, game in enumerate(games, start=1)],
+        )
+
+    async def get_registration(self, discord_id: int) -> Optional[aiosqlite.Row]:
+        """
+        This function will get the registration of a user.
+
+        :param discord_id: The ID of the user that should be checked.
+        :return: The registration row, or None if the user is not registered.
+        """
+        return await self.fetchone(
+            f"SELECT {REGISTRATION_COLUMNS} FROM user_registration AS r WHERE r.discord_id = ?",
+            (discord_id,),
+        )
+
+    async def get_profile(self, discord_id: int) -> Optional[Profile]:
+        """
+        This function will get the profile of a user, from the profile cache when possible.
+
+        :param discord_id: The ID of the user that should be checked.
+        :return: The profile, or None if the user is not registered.
+        """
+        profile = self.profiles.get(discord_id)
+        if profile is not None:
+            return profile
+        generation = self.profiles.generation
+        row = await self.get_registration(discord_id)
+        if row is None:
+            return None
+        profile = Profile.from_row(row)
+        self.profiles.put(profile, generation=generation)
+        return profile
+
+    def _registration_changed(self, discord_id: int) -> None:
+        self.profiles.invalidate(discord_id)
+        self._registration_counts.clear()
+        self._registration_generation += 1
+
+    @staticmethod
+    def _registration_filters(
+        rank: Optional[str], gender: Optional[str], game: Optional[str]
+    ) -> Tuple[List[str], List[Any]]:
+        conditions, parameters = [], []
+        if rank:
+            conditions.append("r.current_rank = ? COLLATE NOCASE")
+            parameters.append(rank)
+        if gender:
+            conditions.append("r.gender = ? COLLATE NOCASE")
+            parameters.append(gender)
+        if game:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM user_games AS g WHERE g.discord_id = r.discord_id AND g.game = ?)"
+            )
+            parameters.append(game)
+        return conditions, parameters
+
+    async def count_registrations(
+        self,
+        *,
+        rank: Optional[str] = None,
+        gender: Optional[str] = None,
+        game: Optional[str] = None,
+    ) -> int:
+        """
+        This function will count the registrations matching the filters. Counts are cached until the next registration write.
+
+        :param rank: Only count users with this rank.
+        :param gender: Only count users with this gender.
+        :param game: Only count users that play this game.
+        """
+        key = tuple(value.casefold() if value else None for value in (rank, gender, game))
+        if key in self._registration_counts:
+            return self._registration_counts[key]
+        generation = self._registration_generation
+        conditions, parameters = self._registration_filters(rank, gender, game)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        row = await self.fetchone(
+            f"SELECT COUNT(*) FROM user_registration AS r {where}", parameters
+        )
+        if generation == self._registration_generation:
+            self._registration_counts[key] = row[0]
+        return row[0]
+
+    async def get_registration_page(
+        self,
+        *,
+        after_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: int = 5,
+        rank: Optional[str] = None,
+        gender: Optional[str] = None,
+        game: Optional[str] = None,
+    ) -> List[aiosqlite.Row]:
+        """
+        This function will get one page of registrations in ID order, using the last or first ID of the current page as the cursor.
+
+        :param after_id: Get the page following the registration with this ID.
+        :param before_id: Get the page preceding the registration with this ID.
+        :param limit: The number of registrations per page.
+        :param rank: Only include users with this rank.
+        :param gender: Only include users with this gender.
+        :param game: Only include users that play this game.
+        """
+        conditions, parameters = self._registration_filters(rank, gender, game)
+        order = "ASC"
+        if before_id is not None:
+            conditions.append("r.id < ?")
+            parameters.append(before_id)
+            order = "DESC"
+        elif after_id is not None:
+            conditions.append("r.id > ?")
+            parameters.append(after_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = await self.fetchall(
+            f"SELECT {REGISTRATION_COLUMNS} FROM user_registration AS r {where} ORDER BY r.id {order} LIMIT ?",
+            (*parameters, limit),
+        )
+        if order == "DESC":
+            rows.reverse()
+        return rows
+
+    def iter_registrations(
+        self, *, chunk_size: int = 500
+    ) -> AsyncIterator[List[aiosqlite.Row]]:
+        """
+        This function will stream every registration in ID order, in chunks.
+
+        :param chunk_size: The number of registrations per chunk.
+        """
+        return self.iterate_chunks(
+            f"SELECT {REGISTRATION_COLUMNS} FROM user_registration AS r ORDER BY r.id",
+            chunk_size=chunk_size,
+        )
+
+    async def iter_in_game_names(
+        self, *, after_id: int = 0, chunk_size: int = 500
+    ) -> AsyncIterator[List[aiosqlite.Row]]:
+        """
+        This function will stream the `discord_id` and `in_game_name` of every registration that has an IGN, in chunks.
+
+        Each chunk is read by its own keyset query, so the consumer may spend as long as it likes
+        (e.g. on rate-limited REST calls) between chunks without holding a reader or pinning a WAL snapshot.
+
+        :param after_id: Only stream the registrations with a higher row ID, to resume an earlier pass.
+        :param chunk_size: The number of registrations per chunk.
+        """
+        last_id = after_id
+        while True:
+            rows = await self.fetchall(
+                "SELECT id, discord_id, in_game_name FROM user_registration "
+                "WHERE id > ? AND in_game_name IS NOT NULL AND in_game_name != '' "
+                "ORDER BY id LIMIT ?",
+                (last_id, chunk_size),
+            )
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    async def count_in_game_names(self) -> int:
+        """
+        This function will count the registrations that have an IGN.
+        """
+        row = await self.fetchone(
+            "SELECT COUNT(*) FROM user_registration WHERE in_game_name IS NOT NULL AND in_game_name != ''"
+        )
+        return row[0]
+
+    async def search_registrations(
+        self, name: str, *, candidates: int = 100
+    ) -> List[aiosqlite.Row]:
+        """
+        This function will get the registrations whose real or in-game name looks like the given text, best matches first.
+
+        Candidates come from the trigram index. Registrations containing the query's rarest trigrams
+        come first, ranked by bm25; when there are only a few of those, registrations sharing any of
+        them are added, ranked by how rare the trigrams they share are. Queries shorter than a
+        trigram fall back to a substring match.
+
+        :param name: The text to look for.
+        :param candidates: The maximum number of registrations to return.
+        """
+        name = name.strip().lower()
+        trigrams = sorted({name[i : i + 3] for i in range(len(name) - 2)})
+        async with self.pool.reader() as connection:
+            started = time.perf_counter()
+            if not trigrams:
+                async with connection.execute(
+                    f"SELECT {REGISTRATION_COLUMNS} FROM user_registration AS r WHERE r.real_name LIKE ? OR r.in_game_name LIKE ? LIMIT ?",
+                    (f"%{name}%", f"%{name}%", candidates),
+                ) as cursor:
+                    rows = list(await cursor.fetchall())
+                self.metrics.read_query.record(time.perf_counter() - started)
+                return rows
+            # Trigrams that appear in no registration can only make the search miss, so drop them.
+            async with connection.execute(
+                f"SELECT term, doc FROM user_registration_search_terms WHERE term IN ({', '.join('?' * len(trigrams))}) ORDER BY doc",
+                trigrams,
+            ) as cursor:
+                counts = [(row[0], row[1]) for row in await cursor.fetchall()]
+            rows = []
+            if counts:
+                terms = [quote_term(term) for term, _ in counts[:SEARCH_TRIGRAMS]]
+                rows = await self._match_registrations(connection, " AND ".join(terms), candidates)
+                if len(rows) < SEARCH_WIDEN_BELOW:
+                    seen = {row["id"] for row in rows}
+                    for row in await self._widen_registrations(
+                        connection, widening_trigrams(counts), candidates
+                    ):
+                        if row["id"] not in seen and len(rows) < candidates:
+                            rows.append(row)
+            self.metrics.read_query.record(time.perf_counter() - started)
+            return rows
+
+    async def _match_registrations(
+        self, connection: aiosqlite.Connection, expression: str, limit: int
+    ) -> List[aiosqlite.Row]:
+        async with connection.execute(
+            f"""
+            SELECT {REGISTRATION_COLUMNS}
+            FROM (
+                SELECT rowid, rank FROM user_registration_search
+                WHERE user_registration_search MATCH ? ORDER BY rank LIMIT ?
+            ) AS hits
+            JOIN user_registration AS r ON r.id = hits.rowid
+            ORDER BY hits.rank
+            """,
+            (expression, limit),
+        ) as cursor:
+            return list(await cursor.fetchall())
+
+    async def _widen_registrations(
+        self, connection: aiosqlite.Connection, counts: Sequence[Tuple[str, int]], limit: int
+    ) -> List[aiosqlite.Row]:
+        # bm25 over an OR of common trigrams scores every registration holding any of them, which
+        # costs several times the lookups themselves. Matching each trigram on its own and adding
+        # up their idf weights ranks the same candidates from the index's rowid lists alone.
+        async with connection.execute("SELECT MAX(id) FROM user_registration") as cursor:
+            total = (await cursor.fetchone())[0] or 1
+        hits = " UNION ALL ".join(
+            "SELECT rowid, ? AS weight FROM user_registration_search WHERE user_registration_search MATCH ?"
+            for _ in counts
+        )
+        parameters = []
+        for term, documents in counts:
+            parameters += [math.log(1 + total / documents), quote_term(term)]
+        async with connection.execute(
+            f"""
+            SELECT {REGISTRATION_COLUMNS}
+            FROM (
+                SELECT rowid, SUM(weight) AS score FROM ({hits})
+                GROUP BY rowid ORDER BY score DESC LIMIT ?
+            ) AS hits
+            JOIN user_registration AS r ON r.id = hits.rowid
+            ORDER BY hits.score DESC
+            """,
+            (*parameters, limit),
+        ) as cursor:
+            return list(await cursor.fetchall())
+
+    async def update_registration_field(
+        self, discord_id: int, field_name: str, field_value: Any
+    ) -> int:
+        """
+        This function will update a single field of a user's registration.
+
+        :param discord_id: The ID of the user whose registration should be updated.
+        :param field_name: One of `REGISTRATION_EDITABLE_FIELDS`. `games_played` takes the comma-separated games.
+        :param field_value: The new value of the field.
+        :return: The number of updated registrations.
+        """
+        if field_name not in REGISTRATION_EDITABLE_FIELDS:
+            raise ValueError(f"`{field_name}` is not an editable field.")
+        if field_name != "games_played":
+            updated = await self.execute(
+                f"UPDATE user_registration SET {field_name} = ? WHERE discord_id = ?",
+                (field_value, discord_id),
+            )
+            self._registration_changed(discord_id)
+            return updated
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            async with connection.execute(
+                "SELECT 1 FROM user_registration WHERE discord_id = ?", (discord_id,)
+            ) as cursor:
+                registered = await cursor.fetchone() is not None
+            if registered:
+                await self._replace_games(connection, discord_id, parse_games(field_value))
+            self.metrics.write_query.record(time.perf_counter() - started)
+        self._registration_changed(discord_id)
+        return 1 if registered else 0
+
+    async def delete_registration(self, discord_id: int) -> int:
+        """
+        This function will delete a user's registration, along with their games.
+
+        :param discord_id: The ID of the user whose registration should be deleted.
+        :return: The number of deleted rows.
+        """
+        deleted = await self.execute(
+            "DELETE FROM user_registration WHERE discord_id = ?", (discord_id,)
+        )
+        self._registration_changed(discord_id)
+        return deleted
 
     async def add_warn(
         self, user_id: int, server_id: int, moderator_id: int, reason: str
-    ) -> int:
+    ) -> Tuple[int, int]:
         """
         This function will add a warn to the database.
 
+        The next warn ID and the new total are computed by the INSERT itself, so concurrent
+        moderators can never hand out the same ID.
+
         :param user_id: The ID of the user that should be warned.
+        :param server_id: The ID of the server where the user has been warned.
+        :param moderator_id: The ID of the moderator that warned the user.
         :param reason: The reason why the user should be warned.
+        :return: The ID of the new warn and the total number of warns of the user.
         """
-        rows = await self.connection.execute(
-            "SELECT id FROM warns WHERE user_id=? AND server_id=? ORDER BY id DESC LIMIT 1",
-            (
-                user_id,
-                server_id,
-            ),
-        )
-        async with rows as cursor:
-            result = await cursor.fetchone()
-            warn_id = result[0] + 1 if result is not None else 1
-            await self.connection.execute(
-                "INSERT INTO warns(id, user_id, server_id, moderator_id, reason) VALUES (?, ?, ?, ?, ?)",
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            async with connection.execute(
+                """
+                INSERT INTO warns(id, user_id, server_id, moderator_id, reason)
+                SELECT COALESCE(MAX(id), 0) + 1, ?, ?, ?, ? FROM warns WHERE server_id=? AND user_id=?
+                RETURNING id, (SELECT COUNT(*) FROM warns WHERE server_id=? AND user_id=?)
+                """,
                 (
-                    warn_id,
                     user_id,
                     server_id,
                     moderator_id,
                     reason,
+                    server_id,
+                    user_id,
+                    server_id,
+                    user_id,
                 ),
-            )
-            await self.connection.commit()
-            return warn_id
+            ) as cursor:
+                warn_id, total = await cursor.fetchone()
+            self.metrics.write_query.record(time.perf_counter() - started)
+            return warn_id, total
 
     async def remove_warn(self, warn_id: int, user_id: int, server_id: int) -> int:
         """
@@ -52,45 +668,315 @@ class DatabaseManager:
         :param warn_id: The ID of the warn.
         :param user_id: The ID of the user that was warned.
         :param server_id: The ID of the server where the user has been warned
+        :return: The number of warns the user has left.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            await connection.execute(
+                "DELETE FROM warns WHERE server_id=? AND user_id=? AND id=?",
+                (
+                    server_id,
+                    user_id,
+                    warn_id,
+                ),
+            )
+            async with connection.execute(
+                "SELECT COUNT(*) FROM warns WHERE server_id=? AND user_id=?",
+                (
+                    server_id,
+                    user_id,
+                ),
+            ) as cursor:
+                result = await cursor.fetchone()
+            self.metrics.write_query.record(time.perf_counter() - started)
+            return result[0] if result is not None else 0
+
+    async def get_warnings(self, user_id: int, server_id: int) -> List[aiosqlite.Row]:
         """
-        await self.connection.execute(
-            "DELETE FROM warns WHERE id=? AND user_id=? AND server_id=?",
+        This function will get all the warnings of a user.
+
+        :param user_id: The ID of the user that should be checked.
+        :param server_id: The ID of the server that should be checked.
+        :return: A list of all the warnings of the user, oldest first.
+        """
+        return await self.fetchall(
+            "SELECT user_id, server_id, moderator_id, reason, strftime('%s', created_at), id FROM warns WHERE server_id=? AND user_id=? ORDER BY id",
             (
-                warn_id,
-                user_id,
                 server_id,
+                user_id,
             ),
         )
-        await self.connection.commit()
-        rows = await self.connection.execute(
-            "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?",
+
+    async def start_nickname_sync(
+        self, guild_id: int, channel_id: int, requested_by: int, total: int
+    ) -> Optional[aiosqlite.Row]:
+        """
+        This function will record a new nickname sync job.
+
+        :param guild_id: The ID of the guild whose nicknames are synced.
+        :param channel_id: The ID of the channel the progress message is posted in.
+        :param requested_by: The ID of the user that started the sync.
+        :param total: The number of registrations with an IGN when the sync started.
+        :return: The new job, or None if the guild already has a running one.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            async with connection.execute(
+                """
+                INSERT INTO nickname_sync_jobs (guild_id, channel_id, requested_by, total)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT DO NOTHING
+                RETURNING *
+                """,
+                (
+                    guild_id,
+                    channel_id,
+                    requested_by,
+                    total,
+                ),
+            ) as cursor:
+                job = await cursor.fetchone()
+            self.metrics.write_query.record(time.perf_counter() - started)
+            return job
+
+    async def get_running_nickname_syncs(
+        self, guild_id: Optional[int] = None
+    ) -> List[aiosqlite.Row]:
+        """
+        This function will get the nickname sync jobs that have not finished yet.
+
+        :param guild_id: Only get the job of this guild (optional).
+        """
+        if guild_id is None:
+            return await self.fetchall(
+                "SELECT * FROM nickname_sync_jobs WHERE status = 'running' ORDER BY id"
+            )
+        return await self.fetchall(
+            "SELECT * FROM nickname_sync_jobs WHERE status = 'running' AND guild_id = ?",
+            (guild_id,),
+        )
+
+    async def set_nickname_sync_message(self, job_id: int, message_id: int) -> None:
+        """
+        This function will remember the message a nickname sync reports its progress in.
+
+        :param job_id: The ID of the job.
+        :param message_id: The ID of the progress message.
+        """
+        await self.execute(
+            "UPDATE nickname_sync_jobs SET message_id = ? WHERE id = ?",
             (
-                user_id,
-                server_id,
+                message_id,
+                job_id,
             ),
         )
-        async with rows as cursor:
-            result = await cursor.fetchone()
-            return result[0] if result is not None else 0
 
-    async def get_warnings(self, user_id: int, server_id: int) -> list:
+    async def checkpoint_nickname_sync(
+        self,
+        job_id: int,
+        *,
+        last_registration_id: int,
+        updated: int,
+        unchanged: int,
+        missing: int,
+        failed: int,
+        failures: str,
+        status: str = "running",
+    ) -> None:
         """
-        This function will get all the warnings of a user.
+        This function will save the progress of a nickname sync, and finish it when `status` is not "running".
 
-        :param user_id: The ID of the user that should be checked.
-        :param server_id: The ID of the server that should be checked.
-        :return: A list of all the warnings of the user.
+        :param job_id: The ID of the job.
+        :param last_registration_id: The row ID of the last registration that was fully processed.
+        :param failures: The failure lines kept for the summary, one per line.
+        :param status: "running", "finished" or "failed".
         """
-        rows = await self.connection.execute(
-            "SELECT user_id, server_id, moderator_id, reason, strftime('%s', created_at), id FROM warns WHERE user_id=? AND server_id=?",
+        await self.execute(
+            """
+            UPDATE nickname_sync_jobs SET
+                last_registration_id = ?, updated = ?, unchanged = ?, missing = ?, failed = ?, failures = ?,
+                status = ?, finished_at = CASE WHEN ? = 'running' THEN NULL ELSE CURRENT_TIMESTAMP END
+            WHERE id = ?
+            """,
             (
-                user_id,
-                server_id,
+                last_registration_id,
+                updated,
+                unchanged,
+                missing,
+                failed,
+                failures,
+                status,
+                status,
+                job_id,
             ),
         )
-        async with rows as cursor:
-            result = await cursor.fetchall()
-            result_list = []
-            for row in result:
-                result_list.append(row)
-            return result_list
+
+    async def get_registration_sessions(self, now: float) -> List[aiosqlite.Row]:
+        """
+        This function will get the registration sessions that have not expired yet, oldest first.
+
+        :param now: The current Unix time.
+        """
+        return await self.fetchall(
+            "SELECT discord_id, real_name, in_game_name, birthday, expires_at FROM registration_sessions "
+            "WHERE expires_at > ? ORDER BY expires_at",
+            (now,),
+        )
+
+    async def save_registration_session(
+        self,
+        discord_id: int,
+        real_name: str,
+        in_game_name: str,
+        birthday: str,
+        expires_at: float,
+        evicted: Sequence[int] = (),
+    ) -> None:
+        """
+        This function will store step 1 of a registration, replacing the user's previous one.
+
+        :param discord_id: The ID of the user that is registering.
+        :param expires_at: The Unix time after which the session is dropped.
+        :param evicted: The IDs of sessions dropped to make room for this one.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            await connection.execute(
+                """
+                INSERT INTO registration_sessions (discord_id, real_name, in_game_name, birthday, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (discord_id) DO UPDATE SET
+                    real_name = excluded.real_name,
+                    in_game_name = excluded.in_game_name,
+                    birthday = excluded.birthday,
+                    expires_at = excluded.expires_at
+                """,
+                (
+                    discord_id,
+                    real_name,
+                    in_game_name,
+                    birthday,
+                    expires_at,
+                ),
+            )
+            if evicted:
+                await connection.executemany(
+                    "DELETE FROM registration_sessions WHERE discord_id = ?",
+                    [(evicted_id,) for evicted_id in evicted],
+                )
+            self.metrics.write_query.record(time.perf_counter() - started)
+
+    async def delete_registration_session(self, discord_id: int) -> int:
+        """
+        This function will delete a user's registration session.
+
+        :param discord_id: The ID of the user.
+        :return: The number of sessions deleted.
+        """
+        return await self.execute(
+            "DELETE FROM registration_sessions WHERE discord_id = ?", (discord_id,)
+        )
+
+    async def delete_expired_registration_sessions(self, now: float) -> int:
+        """
+        This function will delete the registration sessions that have expired.
+
+        :param now: The current Unix time.
+        :return: The number of sessions deleted.
+        """
+        return await self.execute(
+            "DELETE FROM registration_sessions WHERE expires_at <= ?", (now,)
+        )
+
+    async def get_guild_settings(self) -> List[aiosqlite.Row]:
+        """
+        This function will get the settings of every guild, in the order their IDs were given in.
+        """
+        return await self.fetchall(
+            "SELECT guild_id, name, target_id FROM guild_settings ORDER BY guild_id, name, position"
+        )
+
+    async def set_guild_setting(self, guild_id: int, name: str, target_ids: Sequence[int]) -> None:
+        """
+        This function will replace the IDs of a guild's setting, clearing it when none are given.
+
+        :param guild_id: The ID of the guild.
+        :param name: The name of the setting.
+        :param target_ids: The role, channel or message IDs, in order.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            await connection.execute(
+                "DELETE FROM guild_settings WHERE guild_id = ? AND name = ?", (guild_id, name)
+            )
+            if target_ids:
+                await connection.executemany(
+                    "INSERT OR IGNORE INTO guild_settings (guild_id, name, target_id, position) VALUES (?, ?, ?, ?)",
+                    [(guild_id, name, target_id, position) for position, target_id in enumerate(target_ids)],
+                )
+            self.metrics.write_query.record(time.perf_counter() - started)
+
+    async def get_command_sync(self, scope: str) -> Optional[aiosqlite.Row]:
+        """
+        This function will get the command tree last synced to a scope.
+
+        :param scope: `global`, or `guild:<guild ID>`.
+        """
+        return await self.fetchone(
+            "SELECT scope, tree_hash, command_hashes, synced_at FROM command_syncs WHERE scope = ?",
+            (scope,),
+        )
+
+    async def save_command_sync(self, scope: str, tree_hash: str, command_hashes: str) -> None:
+        """
+        This function will record the command tree just synced to a scope.
+
+        :param scope: `global`, or `guild:<guild ID>`.
+        :param tree_hash: The hash of the whole tree.
+        :param command_hashes: The hash of each command's payload by command name, as JSON.
+        """
+        await self.execute(
+            """
+            INSERT INTO command_syncs (scope, tree_hash, command_hashes, synced_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (scope) DO UPDATE SET
+                tree_hash = excluded.tree_hash,
+                command_hashes = excluded.command_hashes,
+                synced_at = excluded.synced_at
+            """,
+            (scope, tree_hash, command_hashes),
+        )
+
+    async def save_boot_profile(
+        self, total_ms: float, phases: str, cogs: str, imports: Optional[str] = None, keep: int = 100
+    ) -> None:
+        """
+        This function will record how long a boot took, and forget all but the last `keep` boots.
+
+        :param total_ms: The whole boot, in milliseconds.
+        :param phases: The phases of the boot, as JSON.
+        :param cogs: The import and setup time of every cog, as JSON.
+        :param imports: The slowest imports, as JSON, if they were profiled.
+        :param keep: The number of boots to keep.
+        """
+        async with self.pool.writer() as connection:
+            started = time.perf_counter()
+            await connection.execute(
+                "INSERT INTO boot_profiles (total_ms, phases, cogs, imports) VALUES (?, ?, ?, ?)",
+                (total_ms, phases, cogs, imports),
+            )
+            await connection.execute(
+                "DELETE FROM boot_profiles WHERE id <= (SELECT MAX(id) FROM boot_profiles) - ?", (keep,)
+            )
+            self.metrics.write_query.record(time.perf_counter() - started)
+
+    async def get_boot_profiles(self, limit: int = 2) -> List[aiosqlite.Row]:
+        """
+        This function will get the last boots, the most recent first.
+
+        :param limit: The number of boots to get.
+        """
+        return await self.fetchall(
+            "SELECT id, total_ms, phases, cogs, imports, booted_at FROM boot_profiles ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
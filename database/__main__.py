@@ -0,0 +1,42 @@
+"""
+Description:
+🐍 Command line entry point for the migrations: `python -m database [--dry-run] [--database PATH]`.
+
+Version: 6.2.0
+"""
+
+import argparse
+import asyncio
+import os
+
+import aiosqlite
+
+from database.migrator import MigrationRunner
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply the database migrations.")
+    parser.add_argument(
+        "--database",
+        default=f"{os.path.realpath(os.path.dirname(__file__))}/database.db",
+        help="The SQLite database to migrate.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Apply the pending migrations to an in-memory copy and leave the database untouched.",
+    )
+    arguments = parser.parse_args()
+
+    runner = MigrationRunner()
+    async with aiosqlite.connect(arguments.database) as connection:
+        version = await runner.current_version(connection)
+        print(f"Database is at version {version}, latest is {runner.latest_version}.")
+        for migration in await runner.pending(connection):
+            print(f"Pending: {migration.version:04d}_{migration.name}")
+        for result in await runner.run(connection, dry_run=arguments.dry_run):
+            print(result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
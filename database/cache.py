@@ -0,0 +1,129 @@
+"""
+Description:
+🐍 An LRU cache with a time-to-live for registration profiles, keyed by Discord ID.
+
+Version: 6.2.0
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import aiosqlite
+
+
+class Profile:
+    """
+    A registered user's profile, as read from `user_registration`.
+    """
+
+    __slots__ = (
+        "discord_id",
+        "real_name",
+        "in_game_name",
+        "birthday",
+        "uuid",
+        "current_rank",
+        "games_played",
+        "age",
+        "gender",
+        "registration_time",
+    )
+
+    def __init__(
+        self,
+        discord_id: int,
+        real_name: str,
+        in_game_name: str,
+        birthday: str,
+        uuid: str,
+        current_rank: str,
+        games_played: str,
+        age: int,
+        gender: str,
+        registration_time: str,
+    ) -> None:
+        self.discord_id = discord_id
+        self.real_name = real_name
+        self.in_game_name = in_game_name
+        self.birthday = birthday
+        self.uuid = uuid
+        self.current_rank = current_rank
+        self.games_played = games_played
+        self.age = age
+        self.gender = gender
+        self.registration_time = registration_time
+
+    @classmethod
+    def from_row(cls, row: aiosqlite.Row) -> "Profile":
+        return cls(**{name: row[name] for name in cls.__slots__})
+
+
+class ProfileCache:
+    """
+    Least-recently-used profiles, each kept for at most `ttl` seconds.
+
+    Every invalidation bumps `generation`, so a read that started before a write can tell
+    that its row may be stale and skip caching it.
+    """
+
+    def __init__(self, *, max_size: int = 1024, ttl: float = 300.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[int, Tuple[float, Profile]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, discord_id: int) -> Optional[Profile]:
+        entry = self._entries.get(discord_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, profile = entry
+        if expires_at < time.monotonic():
+            del self._entries[discord_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(discord_id)
+        self.hits += 1
+        return profile
+
+    def put(self, profile: Profile, *, generation: int) -> None:
+        """
+        :param profile: The profile to cache.
+        :param generation: The value of `generation` when the profile was read from the database.
+        """
+        if generation != self.generation or self.max_size <= 0:
+            return
+        self._entries[profile.discord_id] = (time.monotonic() + self.ttl, profile)
+        self._entries.move_to_end(profile.discord_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, discord_id: int) -> None:
+        self.generation += 1
+        self._entries.pop(discord_id, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,131 @@
+"""
+Description:
+🐍 Streams the registrations into a txt, CSV or JSONL file without holding the whole table in memory.
+
+Version: 6.2.0
+"""
+
+import asyncio
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from contextlib import aclosing
+from typing import TYPE_CHECKING, BinaryIO, Container, List
+
+import aiosqlite
+
+if TYPE_CHECKING:
+    from database import DatabaseManager
+
+EXPORT_FORMATS = ("txt", "csv", "jsonl")
+EXPORT_COLUMNS = (
+    "discord_id",
+    "real_name",
+    "in_game_name",
+    "birthday",
+    "gender",
+    "games_played",
+    "uuid",
+    "current_rank",
+    "age",
+    "registration_time",
+    "in_server",
+)
+# Exports stay in memory up to this size and spill to an anonymous temporary file beyond it.
+SPOOL_SIZE = 4 * 1024 * 1024
+
+
+class ExportResult:
+    """
+    A finished export. `file` is positioned at the start; close it once it has been uploaded.
+    """
+
+    __slots__ = ("file", "filename", "rows", "size", "compressed")
+
+    def __init__(self, file: BinaryIO, filename: str, rows: int, size: int, compressed: bool) -> None:
+        self.file = file
+        self.filename = filename
+        self.rows = rows
+        self.size = size
+        self.compressed = compressed
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _format_chunk(rows: List[aiosqlite.Row], member_ids: Container[int], export_format: str) -> bytes:
+    buffer = io.StringIO()
+    if export_format == "txt":
+        for row in rows:
+            in_server = "Yes" if row["discord_id"] in member_ids else "No"
+            buffer.write(f"Name: {row['real_name']}, IGN: {row['in_game_name']}, In Server: {in_server}\n")
+    elif export_format == "csv":
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in EXPORT_COLUMNS[:-1]] + [row["discord_id"] in member_ids])
+    else:
+        for row in rows:
+            record = {column: row[column] for column in EXPORT_COLUMNS[:-1]}
+            record["in_server"] = row["discord_id"] in member_ids
+            buffer.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return buffer.getvalue().encode("utf-8")
+
+
+def _zip(source: BinaryIO, filename: str) -> BinaryIO:
+    target = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    source.seek(0)
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(filename, "w") as entry:
+            shutil.copyfileobj(source, entry)
+    source.close()
+    target.seek(0)
+    return target
+
+
+async def export_registrations(
+    database: "DatabaseManager",
+    member_ids: Container[int],
+    export_format: str = "txt",
+    *,
+    size_limit: int,
+    chunk_size: int = 500,
+) -> ExportResult:
+    """
+    Stream every registration into a spooled file, zipping it when it would not fit in an upload.
+
+    :param database: The database manager to read from.
+    :param member_ids: The IDs of the guild's current members, for the "In Server" column.
+    :param export_format: One of `EXPORT_FORMATS`.
+    :param size_limit: The largest file, in bytes, that can be uploaded.
+    :param chunk_size: The number of rows formatted and written at a time.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format `{export_format}`.")
+    filename = f"user_list.{export_format}"
+    file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    rows = 0
+    try:
+        if export_format == "csv":
+            header = io.StringIO()
+            csv.writer(header).writerow(EXPORT_COLUMNS)
+            file.write(header.getvalue().encode("utf-8"))
+        async with aclosing(database.iter_registrations(chunk_size=chunk_size)) as chunks:
+            async for chunk in chunks:
+                file.write(_format_chunk(chunk, member_ids, export_format))
+                rows += len(chunk)
+        size = file.tell()
+        if size <= size_limit:
+            file.seek(0)
+            return ExportResult(file, filename, rows, size, compressed=False)
+        # Compressing a large export takes long enough to stall the gateway, so do it in a thread.
+        file = await asyncio.to_thread(_zip, file, filename)
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        file.seek(0)
+        return ExportResult(file, f"{filename}.zip", rows, size, compressed=True)
+    except BaseException:
+        file.close()
+        raise
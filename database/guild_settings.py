@@ -0,0 +1,169 @@
+"""
+Description:
+🐍 The roles, channels and messages each guild has configured, with their resolved Discord objects cached.
+
+Version: 6.2.0
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import discord
+
+if TYPE_CHECKING:
+    from database import DatabaseManager
+
+
+class Setting:
+    """
+    A setting a guild can configure. `kind` is what its IDs point at: a role, a channel (categories
+    included) or a message, and `many` tells whether it takes several IDs.
+    """
+
+    __slots__ = ("name", "kind", "many", "description")
+
+    def __init__(self, name: str, kind: str, description: str, *, many: bool = False) -> None:
+        self.name = name
+        self.kind = kind
+        self.many = many
+        self.description = description
+
+
+SETTINGS: Dict[str, Setting] = {
+    setting.name: setting
+    for setting in (
+        Setting("welcome_channel", "channel", "Where new members are welcomed."),
+        Setting("rules_channel", "channel", "The rules channel linked in the welcome."),
+        Setting("onboarding_roles", "role", "The roles new members get until they register.", many=True),
+        Setting("registered_role", "role", "The role given once a registration is completed."),
+        Setting("unregistered_roles", "role", "The roles taken away once a registration is completed.", many=True),
+        Setting("registration_log_channel", "channel", "Where completed registrations are logged."),
+        Setting("visitor_role", "role", "The role given for reacting to the visitor message."),
+        Setting("visitor_message", "message", "The message to react to for the visitor role."),
+        Setting("command_channel", "channel", "The channel where any message that is not a command is deleted."),
+        Setting("command_channel_exempt_message", "message", "The message kept in the command channel."),
+        Setting("lobby_channel", "channel", "Where `/laro` posts game lobbies."),
+        Setting("lobby_role", "role", "The role pinged for new game lobbies."),
+        Setting("voice_hub_channel", "channel", "The voice channel that creates a personal voice channel on join."),
+        Setting("voice_category", "channel", "The category personal voice channels are created in."),
+        Setting("voice_roles", "role", "The roles allowed to see and join personal voice channels.", many=True),
+        Setting("log_channel", "channel", "Where commands, role changes and server changes are logged."),
+        Setting("message_log_channel", "channel", "Where edited and deleted messages are logged."),
+        Setting("message_log_excluded_channels", "channel", "The channels whose messages are not logged.", many=True),
+        Setting("tiktok_channel", "channel", "Where new TikTok posts are announced."),
+    )
+}
+
+Resolved = Union[discord.Role, discord.abc.GuildChannel]
+
+
+class GuildSettings:
+    """
+    The settings of every guild, loaded once and kept in memory, so reading one is a dictionary lookup.
+
+    The roles and channels a setting points at are resolved on first use and cached until the
+    guild's roles or channels change, when the bot calls `invalidate()`.
+    """
+
+    def __init__(self, database: Optional["DatabaseManager"] = None) -> None:
+        self.database = database
+        self.hits = 0
+        self.misses = 0
+        self._ids: Dict[int, Dict[str, Tuple[int, ...]]] = {}
+        self._resolved: Dict[Tuple[int, str], Tuple[Resolved, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def load(self) -> int:
+        """
+        Load the settings of every guild from the database.
+
+        :return: The number of guilds with at least one setting.
+        """
+        if self.database is None:
+            return 0
+        settings: Dict[int, Dict[str, List[int]]] = {}
+        for row in await self.database.get_guild_settings():
+            settings.setdefault(row["guild_id"], {}).setdefault(row["name"], []).append(row["target_id"])
+        self._ids = {
+            guild_id: {name: tuple(ids) for name, ids in names.items()} for guild_id, names in settings.items()
+        }
+        self._resolved.clear()
+        return len(self._ids)
+
+    def ids(self, guild_id: int, name: str) -> Tuple[int, ...]:
+        return self._ids.get(guild_id, {}).get(name, ())
+
+    def id(self, guild_id: int, name: str) -> Optional[int]:
+        ids = self.ids(guild_id, name)
+        return ids[0] if ids else None
+
+    def guilds(self, name: str) -> List[int]:
+        """
+        :return: The IDs of the guilds that have configured the setting.
+        """
+        return [guild_id for guild_id, names in self._ids.items() if names.get(name)]
+
+    def _resolve(self, guild: discord.Guild, name: str) -> Tuple[Resolved, ...]:
+        key = (guild.id, name)
+        resolved = self._resolved.get(key)
+        if resolved is not None:
+            self.hits += 1
+            return resolved
+        self.misses += 1
+        lookup = guild.get_role if SETTINGS[name].kind == "role" else guild.get_channel
+        resolved = tuple(target for target in map(lookup, self.ids(guild.id, name)) if target is not None)
+        self._resolved[key] = resolved
+        return resolved
+
+    def role(self, guild: discord.Guild, name: str) -> Optional[discord.Role]:
+        resolved = self._resolve(guild, name)
+        return resolved[0] if resolved else None
+
+    def roles(self, guild: discord.Guild, name: str) -> Tuple[discord.Role, ...]:
+        return self._resolve(guild, name)
+
+    def channel(self, guild: discord.Guild, name: str) -> Optional[Any]:
+        resolved = self._resolve(guild, name)
+        return resolved[0] if resolved else None
+
+    def channels(self, guild: discord.Guild, name: str) -> Tuple[Any, ...]:
+        return self._resolve(guild, name)
+
+    async def set(self, guild_id: int, name: str, target_ids: Sequence[int]) -> None:
+        """
+        Replace the IDs of a guild's setting, or clear it when none are given.
+
+        :raises ValueError: The setting does not exist or takes a single ID.
+        """
+        setting = SETTINGS.get(name)
+        if setting is None:
+            raise ValueError(f"Unknown setting `{name}`.")
+        target_ids = list(dict.fromkeys(target_ids))
+        if len(target_ids) > 1 and not setting.many:
+            raise ValueError(f"`{name}` takes a single {setting.kind}.")
+        if self.database is not None:
+            await self.database.set_guild_setting(guild_id, name, target_ids)
+        guild_settings = self._ids.setdefault(guild_id, {})
+        if target_ids:
+            guild_settings[name] = tuple(target_ids)
+        else:
+            guild_settings.pop(name, None)
+        self._resolved.pop((guild_id, name), None)
+
+    def invalidate(self, guild_id: int) -> None:
+        """
+        Drop the resolved roles and channels of a guild, to be resolved again on next use.
+        """
+        for key in [key for key in self._resolved if key[0] == guild_id]:
+            del self._resolved[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "guilds": len(self._ids),
+            "resolved": len(self._resolved),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,145 @@
+"""
+Description:
+🐍 A memory-capped store of recent message contents, so deleted and edited messages can be logged
+even when discord.py's own message cache has let them go.
+
+Version: 6.2.0
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# A rough count of the bytes a stored message costs besides its text.
+MESSAGE_OVERHEAD = 200
+
+
+class StoredMessage:
+    """
+    What the message logs need of a message, taken when it was sent.
+    """
+
+    __slots__ = ("id", "guild_id", "channel_id", "author_id", "author", "content", "attachments", "stored_at")
+
+    def __init__(
+        self,
+        id: int,
+        guild_id: int,
+        channel_id: int,
+        author_id: int,
+        author: str,
+        content: str,
+        attachments: Tuple[str, ...] = (),
+    ) -> None:
+        self.id = id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author = author
+        self.content = content
+        self.attachments = attachments
+        self.stored_at = time.monotonic()
+
+    @classmethod
+    def from_message(cls, message) -> "StoredMessage":
+        return cls(
+            message.id,
+            message.guild.id,
+            message.channel.id,
+            message.author.id,
+            str(message.author),
+            message.clean_content,
+            tuple(attachment.url for attachment in message.attachments),
+        )
+
+    @property
+    def size(self) -> int:
+        return MESSAGE_OVERHEAD + len(self.author) + len(self.content) + sum(map(len, self.attachments))
+
+
+class MessageStore:
+    """
+    The most recent messages, oldest evicted first once there are more than `max_messages` of them
+    or they take more than `max_bytes`. Messages older than `retention` seconds are dropped too.
+    """
+
+    def __init__(self, *, max_messages: int = 50000, max_bytes: int = 32 * 1024 * 1024, retention: float = 86400.0) -> None:
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._messages: "OrderedDict[int, StoredMessage]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def add(self, message: StoredMessage) -> None:
+        if self.max_messages <= 0:
+            return
+        previous = self._messages.pop(message.id, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self._messages[message.id] = message
+        self.bytes += message.size
+        self.trim()
+
+    def trim(self) -> None:
+        """
+        Drop the expired messages, then the oldest ones until the store fits its limits again.
+        """
+        oldest = time.monotonic() - self.retention
+        while self._messages:
+            message = next(iter(self._messages.values()))
+            if message.stored_at < oldest:
+                self.expirations += 1
+            elif len(self._messages) > self.max_messages or self.bytes > self.max_bytes:
+                self.evictions += 1
+            else:
+                break
+            self._drop(message.id)
+
+    def _drop(self, message_id: int) -> Optional[StoredMessage]:
+        message = self._messages.pop(message_id, None)
+        if message is not None:
+            self.bytes -= message.size
+        return message
+
+    def get(self, message_id: int) -> Optional[StoredMessage]:
+        message = self._messages.get(message_id)
+        if message is None or message.stored_at < time.monotonic() - self.retention:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return message
+
+    def pop(self, message_id: int) -> Optional[StoredMessage]:
+        """
+        :return: The message, which is forgotten since it was deleted, or None if it is not stored.
+        """
+        message = self.get(message_id)
+        self._drop(message_id)
+        return message
+
+    def edit(self, message_id: int, content: str) -> None:
+        message = self._messages.get(message_id)
+        if message is not None:
+            self.bytes += len(content) - len(message.content)
+            message.content = content
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._messages),
+            "max_size": self.max_messages,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -7,6 +7,8 @@ CREATE TABLE IF NOT EXISTS `warns` (
   `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS warns_server_user ON warns (server_id, user_id, id);
+
 CREATE TABLE IF NOT EXISTS user_registration (
     id INTEGER PRIMARY KEY AUTOINCREMENT, 
     discord_id TEXT NOT NULL,
@@ -0,0 +1,43 @@
+-- Rebuild `warns` with integer snowflakes and a primary key on (server_id, user_id, id).
+-- Warn IDs are per user and server; rows that collided under the old SELECT-then-INSERT
+-- code keep their first ID and the duplicates are renumbered after the user's highest ID.
+
+CREATE TABLE warns_new (
+  id INTEGER NOT NULL,
+  user_id INTEGER NOT NULL,
+  server_id INTEGER NOT NULL,
+  moderator_id INTEGER NOT NULL,
+  reason TEXT NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (server_id, user_id, id)
+);
+
+WITH ranked AS (
+  SELECT
+    rowid AS row_id,
+    server_id,
+    user_id,
+    ROW_NUMBER() OVER (PARTITION BY server_id, user_id, id ORDER BY rowid) AS duplicate,
+    MAX(id) OVER (PARTITION BY server_id, user_id) AS highest
+  FROM warns
+),
+renumbered AS (
+  SELECT
+    row_id,
+    highest + ROW_NUMBER() OVER (PARTITION BY server_id, user_id ORDER BY row_id) AS new_id
+  FROM ranked
+  WHERE duplicate > 1
+)
+INSERT INTO warns_new (id, user_id, server_id, moderator_id, reason, created_at)
+SELECT
+  COALESCE(renumbered.new_id, warns.id),
+  CAST(warns.user_id AS INTEGER),
+  CAST(warns.server_id AS INTEGER),
+  CAST(warns.moderator_id AS INTEGER),
+  warns.reason,
+  warns.created_at
+FROM warns
+LEFT JOIN renumbered ON renumbered.row_id = warns.rowid;
+
+DROP TABLE warns;
+ALTER TABLE warns_new RENAME TO warns;
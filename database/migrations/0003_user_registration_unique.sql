@@ -0,0 +1,49 @@
+-- One registration per Discord user, keyed by an integer `discord_id`, with the games moved
+-- out of the comma-separated `games_played` column into `user_games`.
+-- When a user registered more than once, only their latest registration is kept.
+
+CREATE TABLE user_registration_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    discord_id INTEGER NOT NULL UNIQUE,
+    real_name TEXT NOT NULL,
+    in_game_name TEXT NOT NULL,
+    birthday DATE NOT NULL,
+    uuid TEXT NOT NULL,
+    current_rank TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    registration_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+INSERT INTO user_registration_new (id, discord_id, real_name, in_game_name, birthday, uuid, current_rank, age, gender, registration_time)
+SELECT id, CAST(discord_id AS INTEGER), real_name, in_game_name, birthday, uuid, current_rank, age, gender, registration_time
+FROM user_registration
+WHERE id IN (SELECT MAX(id) FROM user_registration GROUP BY CAST(discord_id AS INTEGER));
+
+CREATE TABLE user_games (
+    discord_id INTEGER NOT NULL REFERENCES user_registration_new (discord_id) ON DELETE CASCADE,
+    game TEXT NOT NULL COLLATE NOCASE,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (discord_id, game)
+) WITHOUT ROWID;
+
+CREATE INDEX user_games_game ON user_games (game);
+
+WITH RECURSIVE split (discord_id, position, game, rest) AS (
+    SELECT new.discord_id, 0, '', old.games_played || ','
+    FROM user_registration_new AS new
+    JOIN user_registration AS old ON old.id = new.id
+    UNION ALL
+    SELECT
+        discord_id,
+        position + 1,
+        TRIM(SUBSTR(rest, 1, INSTR(rest, ',') - 1)),
+        SUBSTR(rest, INSTR(rest, ',') + 1)
+    FROM split
+    WHERE rest <> ''
+)
+INSERT OR IGNORE INTO user_games (discord_id, game, position)
+SELECT discord_id, game, position FROM split WHERE game <> '' ORDER BY discord_id, position;
+
+DROP TABLE user_registration;
+ALTER TABLE user_registration_new RENAME TO user_registration;
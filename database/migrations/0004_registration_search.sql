@@ -0,0 +1,32 @@
+-- Trigram full-text index over the names, so `/indb real_name` can find candidates without a
+-- `LIKE '%name%'` table scan. Triggers keep it in step with `user_registration`.
+
+CREATE VIRTUAL TABLE user_registration_search USING fts5 (
+    real_name,
+    in_game_name,
+    content = 'user_registration',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+);
+
+INSERT INTO user_registration_search (user_registration_search) VALUES ('rebuild');
+
+-- How many registrations contain each trigram, used to search on a query's rarest trigrams.
+CREATE VIRTUAL TABLE user_registration_search_terms USING fts5vocab (user_registration_search, 'row');
+
+CREATE TRIGGER user_registration_search_insert AFTER INSERT ON user_registration BEGIN
+    INSERT INTO user_registration_search (rowid, real_name, in_game_name)
+    VALUES (new.id, new.real_name, new.in_game_name);
+END;
+
+CREATE TRIGGER user_registration_search_delete AFTER DELETE ON user_registration BEGIN
+    INSERT INTO user_registration_search (user_registration_search, rowid, real_name, in_game_name)
+    VALUES ('delete', old.id, old.real_name, old.in_game_name);
+END;
+
+CREATE TRIGGER user_registration_search_update AFTER UPDATE OF real_name, in_game_name ON user_registration BEGIN
+    INSERT INTO user_registration_search (user_registration_search, rowid, real_name, in_game_name)
+    VALUES ('delete', old.id, old.real_name, old.in_game_name);
+    INSERT INTO user_registration_search (rowid, real_name, in_game_name)
+    VALUES (new.id, new.real_name, new.in_game_name);
+END;
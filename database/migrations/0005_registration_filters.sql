@@ -0,0 +1,5 @@
+-- Indexes for the `/list_users` rank and gender filters. They end in `id` so a filtered page
+-- can seek straight to the keyset position instead of walking the table.
+
+CREATE INDEX user_registration_rank ON user_registration (current_rank COLLATE NOCASE, id);
+CREATE INDEX user_registration_gender ON user_registration (gender COLLATE NOCASE, id);
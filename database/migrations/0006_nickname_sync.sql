@@ -0,0 +1,23 @@
+-- Checkpoints of the background `/update_nicknames` job, so a sync interrupted by a restart
+-- picks up after the last registration it finished instead of starting over.
+
+CREATE TABLE nickname_sync_jobs (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    requested_by INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'finished', 'failed')),
+    last_registration_id INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    missing INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    failures TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP
+);
+
+-- At most one running job per guild.
+CREATE UNIQUE INDEX nickname_sync_jobs_running ON nickname_sync_jobs (guild_id) WHERE status = 'running';
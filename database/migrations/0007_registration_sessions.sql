@@ -0,0 +1,13 @@
+-- Step 1 of `/register`, kept until the user finishes step 2 or the session expires, so a
+-- restart or a cog reload no longer loses registrations in progress.
+
+CREATE TABLE registration_sessions (
+    discord_id INTEGER PRIMARY KEY,
+    real_name TEXT NOT NULL,
+    in_game_name TEXT NOT NULL,
+    birthday TEXT NOT NULL,
+    -- Unix time, since the expiry has to survive a restart.
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX registration_sessions_expires_at ON registration_sessions (expires_at);
@@ -0,0 +1,39 @@
+-- The roles, channels and messages each guild uses, replacing the snowflakes that were
+-- hard-coded in the cogs. A setting that takes several IDs has one row per ID.
+
+CREATE TABLE guild_settings (
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    -- The order the IDs were given in.
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, name, target_id)
+);
+
+-- The IDs the cogs used to hard-code, for the guild they were written for.
+INSERT INTO guild_settings (guild_id, name, target_id, position) VALUES
+    (1311571732405948476, 'welcome_channel', 1311571732405948482, 0),
+    (1311571732405948476, 'rules_channel', 1311571732405948478, 0),
+    (1311571732405948476, 'onboarding_roles', 1314245202990596187, 0),
+    (1311571732405948476, 'registered_role', 1313488099426308156, 0),
+    (1311571732405948476, 'unregistered_roles', 1314245202990596187, 0),
+    (1311571732405948476, 'unregistered_roles', 1315700246524723292, 1),
+    (1311571732405948476, 'registration_log_channel', 1324582941883502634, 0),
+    (1311571732405948476, 'visitor_role', 1315700246524723292, 0),
+    (1311571732405948476, 'visitor_message', 1321824651357327411, 0),
+    (1311571732405948476, 'command_channel', 1314245176411033620, 0),
+    (1311571732405948476, 'command_channel_exempt_message', 1316606878880632962, 0),
+    (1311571732405948476, 'lobby_channel', 1321770764839686176, 0),
+    (1311571732405948476, 'lobby_role', 1313488099426308156, 0),
+    (1311571732405948476, 'voice_hub_channel', 1321363056537763880, 0),
+    (1311571732405948476, 'voice_category', 1311571732405948485, 0),
+    (1311571732405948476, 'voice_roles', 1313488099426308156, 0),
+    (1311571732405948476, 'voice_roles', 1315700246524723292, 1),
+    (1311571732405948476, 'log_channel', 1324582941883502634, 0),
+    (1311571732405948476, 'tiktok_channel', 1311571732405948476, 0),
+    (1311571732405948476, 'message_log_channel', 1324399249668046940, 0),
+    (1311571732405948476, 'message_log_excluded_channels', 1311571732405948478, 0),
+    (1311571732405948476, 'message_log_excluded_channels', 1314246090308063293, 1),
+    (1311571732405948476, 'message_log_excluded_channels', 1311571732405948479, 2),
+    (1311571732405948476, 'message_log_excluded_channels', 1314244464184791070, 3),
+    (1311571732405948476, 'message_log_excluded_channels', 1321672767124541562, 4);
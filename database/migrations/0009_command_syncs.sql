@@ -0,0 +1,11 @@
+-- The command tree last synced to Discord per scope, so an unchanged tree is not synced again
+-- on every ready event.
+
+CREATE TABLE command_syncs (
+    -- `global`, or `guild:<guild ID>`.
+    scope TEXT PRIMARY KEY,
+    tree_hash TEXT NOT NULL,
+    -- A JSON object of the hash of each command's payload by command name, to report what changed.
+    command_hashes TEXT NOT NULL,
+    synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,13 @@
+-- How long each boot took, phase by phase, to track cold-start regressions over time.
+
+CREATE TABLE boot_profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    total_ms REAL NOT NULL,
+    -- A JSON array of {"name", "depth", "ms"} in the order the phases started.
+    phases TEXT NOT NULL,
+    -- A JSON array of the import and setup time of every cog.
+    cogs TEXT NOT NULL,
+    -- A JSON array of [package, ms] for the slowest imports, when they were profiled.
+    imports TEXT,
+    booted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
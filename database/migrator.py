@@ -0,0 +1,133 @@
+"""
+Description:
+🐍 Applies the numbered SQL files in `database/migrations` in order, tracking progress in `PRAGMA user_version`.
+
+Version: 6.2.0
+"""
+
+import os
+import re
+import time
+from typing import List
+
+import aiosqlite
+
+MIGRATIONS_DIRECTORY = f"{os.path.realpath(os.path.dirname(__file__))}/migrations"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+class Migration:
+    """
+    A single `NNNN_name.sql` file. Its number is the `user_version` the database has once it is applied.
+    """
+
+    __slots__ = ("version", "name", "path")
+
+    def __init__(self, version: int, name: str, path: str) -> None:
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def read(self) -> str:
+        with open(self.path, encoding="utf-8") as file:
+            return file.read()
+
+
+class MigrationResult:
+    """
+    The outcome of running one migration.
+    """
+
+    __slots__ = ("version", "name", "seconds", "dry_run")
+
+    def __init__(self, version: int, name: str, seconds: float, dry_run: bool) -> None:
+        self.version = version
+        self.name = name
+        self.seconds = seconds
+        self.dry_run = dry_run
+
+    def __str__(self) -> str:
+        action = "Checked" if self.dry_run else "Applied"
+        return f"{action} migration {self.version:04d}_{self.name} in {self.seconds * 1000:.1f}ms"
+
+
+class MigrationRunner:
+    def __init__(self, directory: str = MIGRATIONS_DIRECTORY) -> None:
+        self.directory = directory
+        self.migrations = self.discover()
+
+    def discover(self) -> List[Migration]:
+        """
+        Find the migration files, ordered by version.
+        """
+        migrations = []
+        for file in os.listdir(self.directory):
+            match = MIGRATION_FILE.match(file)
+            if match:
+                migrations.append(
+                    Migration(int(match.group(1)), match.group(2), f"{self.directory}/{file}")
+                )
+        migrations.sort(key=lambda migration: migration.version)
+        versions = [migration.version for migration in migrations]
+        if len(versions) != len(set(versions)):
+            raise RuntimeError(f"Duplicate migration versions in {self.directory}")
+        return migrations
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    async def current_version(self, connection: aiosqlite.Connection) -> int:
+        async with connection.execute("PRAGMA user_version") as cursor:
+            row = await cursor.fetchone()
+        return row[0]
+
+    async def pending(self, connection: aiosqlite.Connection) -> List[Migration]:
+        """
+        The migrations that have not been applied to the database yet.
+        """
+        version = await self.current_version(connection)
+        return [migration for migration in self.migrations if migration.version > version]
+
+    async def run(
+        self, connection: aiosqlite.Connection, *, dry_run: bool = False
+    ) -> List[MigrationResult]:
+        """
+        Apply every pending migration, each in its own transaction together with the `user_version` bump.
+        A failing migration is rolled back and stops the run, leaving the earlier ones applied.
+
+        :param connection: The connection to migrate. No other writer may use it meanwhile.
+        :param dry_run: Apply the pending migrations to an in-memory copy of the database instead,
+            to check that they apply and how long they take.
+        :return: One result per pending migration, empty when the database is already current.
+        """
+        if not await self.pending(connection):
+            return []
+        if not dry_run:
+            return await self._apply(connection, dry_run=False)
+        async with aiosqlite.connect(":memory:") as scratch:
+            await connection.backup(scratch)
+            return await self._apply(scratch, dry_run=True)
+
+    async def _apply(
+        self, connection: aiosqlite.Connection, *, dry_run: bool
+    ) -> List[MigrationResult]:
+        results = []
+        for migration in await self.pending(connection):
+            # executescript() commits any open transaction first, so the script opens its own.
+            script = (
+                f"BEGIN IMMEDIATE;\n{migration.read()}\n"
+                f"PRAGMA user_version = {migration.version};\nCOMMIT;\n"
+            )
+            started = time.perf_counter()
+            try:
+                await connection.executescript(script)
+            except Exception:
+                await connection.rollback()
+                raise
+            results.append(
+                MigrationResult(
+                    migration.version, migration.name, time.perf_counter() - started, dry_run
+                )
+            )
+        return results
@@ -0,0 +1,146 @@
+"""
+Description:
+🐍 A small aiosqlite connection pool: several read-only connections in WAL mode and a single serialized writer.
+
+Version: 6.2.0
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiosqlite
+
+
+class LatencyStats:
+    """
+    Running count/total/max of a latency measured in seconds.
+    """
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        :return: The count, mean and max of the recorded latencies, in milliseconds.
+        """
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PoolMetrics:
+    """
+    Pool-wait and query-latency metrics, split between the read and write side of the pool.
+    """
+
+    def __init__(self) -> None:
+        self.read_wait = LatencyStats()
+        self.write_wait = LatencyStats()
+        self.read_query = LatencyStats()
+        self.write_query = LatencyStats()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "read_wait": self.read_wait.snapshot(),
+            "write_wait": self.write_wait.snapshot(),
+            "read_query": self.read_query.snapshot(),
+            "write_query": self.write_query.snapshot(),
+        }
+
+
+class ConnectionPool:
+    """
+    Hands out read connections from a queue and serializes every write through one connection.
+
+    SQLite in WAL mode lets readers run alongside a writer, so a long export on one reader
+    no longer blocks point lookups on the others or inserts on the writer.
+    """
+
+    def __init__(self, path: str, *, readers: int = 4, busy_timeout: int = 5000) -> None:
+        self.path = path
+        self.size = max(1, readers)
+        self.busy_timeout = busy_timeout
+        self.metrics = PoolMetrics()
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._all_readers: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self, *, read_only: bool) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.path)
+        # Rows can be read by index like plain tuples or by column name.
+        connection.row_factory = aiosqlite.Row
+        await connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        await connection.execute("PRAGMA foreign_keys = ON")
+        if read_only:
+            await connection.execute("PRAGMA query_only = ON")
+        else:
+            await connection.execute("PRAGMA journal_mode = WAL")
+            await connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    async def open(self) -> None:
+        """
+        Open the writer first (it switches the database to WAL), then the readers.
+        """
+        self._writer = await self._connect(read_only=False)
+        for _ in range(self.size):
+            connection = await self._connect(read_only=True)
+            self._all_readers.append(connection)
+            self._readers.put_nowait(connection)
+
+    async def close(self) -> None:
+        for connection in self._all_readers:
+            await connection.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a read-only connection for the duration of the block.
+        """
+        started = time.perf_counter()
+        connection = await self._readers.get()
+        self.metrics.read_wait.record(time.perf_counter() - started)
+        try:
+            yield connection
+        finally:
+            self._readers.put_nowait(connection)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Hold the writer for the duration of the block. The block's statements are committed
+        together on success and rolled back if it raises.
+        """
+        if self._writer is None:
+            raise RuntimeError("The connection pool is not open.")
+        started = time.perf_counter()
+        async with self._write_lock:
+            self.metrics.write_wait.record(time.perf_counter() - started)
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
@@ -0,0 +1,157 @@
+"""
+Description:
+🐍 A size-capped store with a time-to-live for registrations between step 1 and step 2, optionally persisted to SQLite.
+
+Version: 6.2.0
+"""
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import aiosqlite
+
+if TYPE_CHECKING:
+    from database import DatabaseManager
+
+
+class RegistrationSession:
+    """
+    Step 1 of a user's registration.
+    """
+
+    __slots__ = ("discord_id", "real_name", "in_game_name", "birthday", "expires_at")
+
+    def __init__(
+        self,
+        discord_id: int,
+        real_name: str,
+        in_game_name: str,
+        birthday: str,
+        expires_at: float,
+    ) -> None:
+        self.discord_id = discord_id
+        self.real_name = real_name
+        self.in_game_name = in_game_name
+        self.birthday = birthday
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_row(cls, row: aiosqlite.Row) -> "RegistrationSession":
+        return cls(**{name: row[name] for name in cls.__slots__})
+
+
+class SessionStore:
+    """
+    Registration sessions by Discord ID, each kept for at most `ttl` seconds and at most
+    `max_size` of them, so a wave of joins that never finish registering cannot grow it without bound.
+
+    Every session lives in memory and, when a database is given, is written through to
+    `registration_sessions` and loaded back by `load()`, so it survives restarts and cog reloads.
+    Expiry uses the wall clock, since it has to mean the same thing after a restart.
+    """
+
+    def __init__(
+        self,
+        database: Optional["DatabaseManager"] = None,
+        *,
+        ttl: float = 1800.0,
+        max_size: int = 10000,
+    ) -> None:
+        self.database = database
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self.evictions = 0
+        self.expirations = 0
+        # Every session gets the same TTL, so insertion order is expiry order.
+        self._sessions: "OrderedDict[int, RegistrationSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, discord_id: int) -> bool:
+        return self.get(discord_id) is not None
+
+    async def load(self) -> int:
+        """
+        Load the sessions that have not expired yet from the database.
+
+        :return: The number of sessions loaded.
+        """
+        if self.database is None:
+            return 0
+        self._sessions.clear()
+        for row in await self.database.get_registration_sessions(time.time()):
+            self._sessions[row["discord_id"]] = RegistrationSession.from_row(row)
+        while len(self._sessions) > self.max_size:
+            self._sessions.popitem(last=False)
+        return len(self._sessions)
+
+    def get(self, discord_id: int) -> Optional[RegistrationSession]:
+        session = self._sessions.get(discord_id)
+        if session is None:
+            return None
+        if session.expires_at <= time.time():
+            # The row is left for the sweeper.
+            del self._sessions[discord_id]
+            self.expirations += 1
+            return None
+        return session
+
+    async def put(
+        self, discord_id: int, real_name: str, in_game_name: str, birthday: str
+    ) -> RegistrationSession:
+        """
+        Start or restart a user's session, evicting the oldest sessions when the store is full.
+        """
+        session = RegistrationSession(discord_id, real_name, in_game_name, birthday, time.time() + self.ttl)
+        self._sessions.pop(discord_id, None)
+        self._sessions[discord_id] = session
+        evicted = []
+        while len(self._sessions) > self.max_size:
+            evicted_id, _ = self._sessions.popitem(last=False)
+            evicted.append(evicted_id)
+            self.evictions += 1
+        if self.database is not None:
+            await self.database.save_registration_session(
+                discord_id, real_name, in_game_name, birthday, session.expires_at, evicted
+            )
+        return session
+
+    async def pop(self, discord_id: int) -> Optional[RegistrationSession]:
+        """
+        Remove and return a user's session, or None if they have none or it expired.
+        """
+        session = self.get(discord_id)
+        self._sessions.pop(discord_id, None)
+        if self.database is not None:
+            await self.database.delete_registration_session(discord_id)
+        return session
+
+    async def sweep(self) -> int:
+        """
+        Drop every expired session from memory and the database.
+
+        :return: The number of sessions dropped from memory.
+        """
+        now = time.time()
+        expired = 0
+        while self._sessions:
+            discord_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            del self._sessions[discord_id]
+            expired += 1
+        self.expirations += expired
+        if self.database is not None:
+            await self.database.delete_expired_registration_sessions(now)
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._sessions),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,212 @@
+"""
+Description:
+🐍 Sends log embeds in batches, so logging costs one message per batch instead of one per event.
+
+Embeds are queued per channel and sent by a single task, one message at a time, up to 10 embeds
+(and 6000 characters) per message. A channel is flushed once it has a full message queued or its
+oldest embed has waited `flush_interval` seconds.
+
+Under backpressure the sink sheds load instead of growing: once the queue is `sample_above` full,
+only one in `sample_every` new embeds is kept, and once it is full new embeds are dropped. Both are
+counted, and the next message to the channel says how many of its embeds were lost.
+
+Version: 6.2.0
+"""
+
+import asyncio
+import collections
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+# What Discord accepts in a single message.
+EMBEDS_PER_MESSAGE = 10
+EMBED_CHARACTERS_PER_MESSAGE = 6000
+# Marks the records the sink logs about itself, so a handler forwarding logs to Discord can skip them
+# instead of feeding a failing channel more messages.
+SINK_RECORD = {"log_sink": True}
+
+
+class LogSink:
+    """
+    :param logger: Where the sink reports the batches it failed to send.
+    """
+
+    def __init__(
+        self,
+        logger,
+        *,
+        batch_size: int = EMBEDS_PER_MESSAGE,
+        flush_interval: float = 2.0,
+        max_queue: int = 500,
+        sample_above: float = 0.5,
+        sample_every: int = 4,
+    ) -> None:
+        self.logger = logger
+        self.configure(
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue=max_queue,
+            sample_above=sample_above,
+            sample_every=sample_every,
+        )
+        self.submitted = 0
+        self.sent = 0
+        self.messages = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.failed = 0
+        # Embeds waiting, with when they were queued, by channel ID.
+        self._queues: Dict[int, Deque[Tuple[float, discord.Embed]]] = {}
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        # Embeds sampled out or dropped since the channel's last message, by channel ID.
+        self._lost: Dict[int, int] = {}
+        self._queued = 0
+        self._seen_under_pressure = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(
+        self,
+        *,
+        batch_size: int = EMBEDS_PER_MESSAGE,
+        flush_interval: float = 2.0,
+        max_queue: int = 500,
+        sample_above: float = 0.5,
+        sample_every: int = 4,
+    ) -> None:
+        self.batch_size = max(1, min(batch_size, EMBEDS_PER_MESSAGE))
+        self.flush_interval = max(flush_interval, 0.1)
+        self.max_queue = max(1, max_queue)
+        self.sample_above = min(max(sample_above, 0.0), 1.0)
+        self.sample_every = max(1, sample_every)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """
+        Stop the sink, giving whatever is still queued up to `timeout` seconds to be sent.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await asyncio.wait_for(self.flush(force=True), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Stopped the log sink with {self._queued} embed(s) still queued", extra=SINK_RECORD)
+
+    def submit(self, channel: discord.abc.Messageable, embed: discord.Embed) -> bool:
+        """
+        Queue an embed for a channel. Never blocks: under backpressure the embed may be sampled out or dropped.
+
+        :return: Whether the embed was queued.
+        """
+        self.submitted += 1
+        if self._queued >= self.max_queue:
+            self.dropped += 1
+            self._lost[channel.id] = self._lost.get(channel.id, 0) + 1
+            return False
+        if self._queued >= self.max_queue * self.sample_above:
+            self._seen_under_pressure += 1
+            if self._seen_under_pressure % self.sample_every:
+                self.sampled += 1
+                self._lost[channel.id] = self._lost.get(channel.id, 0) + 1
+                return False
+        else:
+            self._seen_under_pressure = 0
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = collections.deque()
+        self._channels[channel.id] = channel
+        queue.append((time.monotonic(), embed))
+        self._queued += 1
+        # Wake the sender to start the channel's timer, or to send a full message at once.
+        if len(queue) == 1 or len(queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _next_due(self) -> Optional[float]:
+        """
+        :return: The seconds until the oldest queued embed is due, or None if nothing is queued.
+        """
+        oldest = min((queue[0][0] for queue in self._queues.values() if queue), default=None)
+        if oldest is None:
+            return None
+        return max(0.0, oldest + self.flush_interval - time.monotonic())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_due())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"Error flushing the log sink: {e}", extra=SINK_RECORD)
+
+    def _take_batch(self, queue: Deque[Tuple[float, discord.Embed]]) -> List[discord.Embed]:
+        batch = [queue.popleft()[1]]
+        characters = len(batch[0])
+        while queue and len(batch) < self.batch_size and characters + len(queue[0][1]) <= EMBED_CHARACTERS_PER_MESSAGE:
+            embed = queue.popleft()[1]
+            characters += len(embed)
+            batch.append(embed)
+        self._queued -= len(batch)
+        return batch
+
+    async def flush(self, force: bool = False) -> int:
+        """
+        Send every channel's full messages, and the rest of its embeds once the oldest is due.
+
+        :param force: Send everything queued, due or not.
+        :return: The number of messages sent.
+        """
+        sent = 0
+        for channel_id, queue in list(self._queues.items()):
+            while queue and (
+                force or len(queue) >= self.batch_size or time.monotonic() - queue[0][0] >= self.flush_interval
+            ):
+                batch = self._take_batch(queue)
+                if await self._send(self._channels[channel_id], batch):
+                    sent += 1
+            if not queue:
+                del self._queues[channel_id]
+                self._channels.pop(channel_id, None)
+        return sent
+
+    async def _send(self, channel: discord.abc.Messageable, batch: List[discord.Embed]) -> bool:
+        lost = self._lost.pop(channel.id, 0)
+        content = f"⚠️ {lost} log event(s) were skipped to keep up with the load." if lost else None
+        try:
+            await channel.send(content=content, embeds=batch)
+        except discord.HTTPException as e:
+            self.failed += len(batch)
+            self.logger.warning(
+                f"Failed to send {len(batch)} log embed(s) to {getattr(channel, 'name', channel.id)}: {e}", extra=SINK_RECORD
+            )
+            return False
+        self.sent += len(batch)
+        self.messages += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "messages": self.messages,
+            "embeds_per_message": round(self.sent / self.messages, 2) if self.messages else 0.0,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -75,13 +75,15 @@ class TikTokMonitor(commands.Cog, name="TikTokMonitor"):
                             today = datetime.datetime.utcnow().date()
 
                             if video_timestamp.date() == today:
-                                guild = self.bot.get_guild(1311571732405948476)
-                                discord_user = guild.get_member(discord_user_id)
-                                role = guild.get_role(role_id)
-                                channel = guild.get_channel(1311571732405948476)
-
-                                if channel:
-                                    await channel.send(f"New TikTok post from `{tiktok_username}`: {latest_video_url}")
+                                # Announce the post in every guild that set a TikTok channel and has the creator
+                                for guild_id in self.bot.guild_settings.guilds("tiktok_channel"):
+                                    guild = self.bot.get_guild(guild_id)
+                                    if guild is None or guild.get_member(discord_user_id) is None:
+                                        continue
+                                    channel = self.bot.guild_settings.channel(guild, "tiktok_channel")
+
+                                    if channel:
+                                        await channel.send(f"New TikTok post from `{tiktok_username}`: {latest_video_url}")
                     except Exception as e:
                         print(f"Error monitoring {tiktok_username}: {e}")
 